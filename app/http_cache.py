@@ -0,0 +1,84 @@
+from typing import Any, Callable, Hashable
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from src.cache.response_cache import RESPONSE_CACHE_MAX_AGE, CachedBody, response_cache
+from src.scheduling.request_executor import request_executor
+
+CACHE_CONTROL = f"public, max-age={RESPONSE_CACHE_MAX_AGE}, must-revalidate"
+
+
+def request_cache_key(request: Request, version: Hashable) -> tuple:
+    """
+    Clé de cache d'une requête : endpoint, paramètres et version des données.
+
+    Les paramètres sont triés par nom ; l'ordre des valeurs répétées
+    (?dataset=high&dataset=low) est conservé car il apparaît dans certaines réponses.
+    """
+    params = tuple(sorted(request.query_params.multi_items(), key=lambda item: item[0]))
+    return request.url.path, params, version
+
+
+def serialize_json(content: Any) -> bytes:
+    """Sérialise un modèle de réponse comme FastAPI (mêmes octets qu'une réponse non cachée)."""
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+
+def matches_if_none_match(request: Request, etag: str) -> bool:
+    """Indique si l'en-tête If-None-Match contient l'ETag (comparaison faible, RFC 9110)."""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def conditional_response(request: Request, entry: CachedBody) -> Response:
+    """Retourne 304 si le client a déjà cette version, sinon la réponse JSON sérialisée."""
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+    if matches_if_none_match(request, entry.etag):
+        response_cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+async def cached_body(key: Hashable, build: Callable[[], bytes], weak: bool = False) -> CachedBody:
+    """
+    Retourne la réponse sérialisée en cache, ou la construit hors de la boucle d'événements.
+
+    La construction s'exécute dans le pool de request_executor, une seule fois
+    pour toutes les requêtes de même clé arrivées pendant le calcul.
+
+    Args:
+        key: Clé de cache (endpoint, paramètres, version des données)
+        build: Fonction bloquante produisant le contenu sérialisé
+        weak: ETag faible
+    """
+    entry = response_cache.get(key)
+    if entry is None:
+        entry = await request_executor.run(key, lambda: response_cache.put(key, build(), weak))
+    return entry
+
+
+async def cached_json_response(request: Request, version: Hashable, build: Callable[[], BaseModel]) -> Response:
+    """
+    Retourne la réponse en cache pour cette version des données, ou la calcule.
+
+    Une réponse en cache est servie sans calcul ni validation Pydantic ; si le
+    client envoie l'ETag courant dans If-None-Match, la réponse est un 304
+    sans corps. Le calcul s'exécute hors de la boucle d'événements et les
+    requêtes identiques simultanées l'attendent au lieu de le répéter (voir
+    cached_body).
+
+    Args:
+        request: Requête entrante
+        version: Version des données (signature des fichiers, du store...)
+        build: Fonction construisant le modèle de réponse (appelée seulement en cas d'absence)
+    """
+    entry = await cached_body(request_cache_key(request, version), lambda: serialize_json(build()))
+    return conditional_response(request, entry)
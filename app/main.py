@@ -1,17 +1,189 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.routers import spotify
 from app.routers import deezer_chart
+from src.cache.response_cache import response_cache
+from src.extractors.dataset_catalog import ARROW_FORMAT, SPOTIFY_STORAGE_FORMAT, loader_pool_stats, shutdown_loader_pool
+from src.extractors.deezer_client import deezer_circuit_breaker
+from src.loaders.deezer_chart_history import DEEZER_CHART_HISTORY_ENABLED, deezer_chart_history
+from src.loaders.materialized_store import MATERIALIZED_MODE, OPENSOUND_SERVING_MODE
+from src.observability.logs import configure_logging
+from src.observability.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
+from src.observability.tracing import end_request_trace, start_request_trace
+from src.scheduling.deezer_chart_refresher import DeezerChartRefresher
+from src.scheduling.request_executor import request_executor
+from src.scheduling.warmup import OPENSOUND_WARMUP_DEEZER, Warmup, warmup_dataset_names
+from src.transformers.deezer_genre_enricher import DeezerGenreEnricher, deezer_genre_cache
+
+logger = logging.getLogger(__name__)
+
+# Autorise le profilage à la demande (en-tête X-Profile: 1), désactivé par défaut
+OPENSOUND_PROFILING_ENABLED = os.getenv("OPENSOUND_PROFILING_ENABLED", "0") == "1"
+PROFILE_HEADER = "X-Profile"
+
+REQUEST_DURATION = REGISTRY.histogram(
+    "opensound_http_request_duration_seconds",
+    "Durée de traitement des requêtes HTTP",
+    ["method", "route", "status"],
+)
+
+configure_logging()
+
+# Statistiques des caches et du disjoncteur Deezer, lues au moment de l'export /metrics
+REGISTRY.register_stats("opensound_deezer_cache", "tier", deezer_genre_cache.stats)
+REGISTRY.register_stats("opensound_dataset_cache", "dataset", spotify.dataset_registry.stats)
+REGISTRY.register_stats("opensound_response_cache", "cache", lambda: {"responses": response_cache.stats()})
+REGISTRY.register_stats("opensound_deezer_circuit", "upstream", lambda: {"deezer": deezer_circuit_breaker.stats()})
+if DEEZER_CHART_HISTORY_ENABLED:
+    REGISTRY.register_stats("opensound_chart_history", "history", deezer_chart_history.stats)
+
+# Pools d'exécution (profondeur de file) et mise en commun des requêtes identiques simultanées
+REGISTRY.register_stats(
+    "opensound_executor",
+    "pool",
+    lambda: {**request_executor.stats(), "processes": loader_pool_stats()},
+)
+
+
+def build_warmup(app: FastAPI) -> Warmup:
+    """
+    Construit le préchauffage : analyses des datasets configurés et premier chart Deezer.
+
+    Args:
+        app: Application (ressources créées par le lifespan)
+
+    Returns:
+        Warmup à démarrer
+    """
+    warmup = Warmup()
+
+    datasets = warmup_dataset_names()
+    try:
+        names = list(spotify.dataset_catalog.resolve(datasets)) if datasets else []
+    except KeyError as e:
+        logger.warning("Datasets de préchauffage inconnus, préchauffage des datasets ignoré", extra={"datasets": e.args[0]})
+        names = []
+    for name in names:
+        warmup.add(f"spotify.{name}", lambda name=name: request_executor.run(None, lambda: spotify.warm_up_dataset(name)))
+
+    # Le premier rafraîchissement du chart remplit aussi le cache des genres
+    if OPENSOUND_WARMUP_DEEZER and OPENSOUND_SERVING_MODE != MATERIALIZED_MODE:
+        warmup.add("deezer.chart", app.state.deezer_chart_refresher.wait_first_refresh)
+    return warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Crée les ressources partagées au démarrage et les libère à l'arrêt."""
+    # Mode 'arrow' : un seul worker publie chaque dataset, les autres attendent puis le projettent en mémoire
+    if SPOTIFY_STORAGE_FORMAT == ARROW_FORMAT:
+        from src.loaders.loader_spotify import publish_spotify_datasets
+
+        await asyncio.to_thread(publish_spotify_datasets, spotify.dataset_catalog.discover().values())
+
+    # Client HTTP Deezer mutualisé (connexions keep-alive) pour l'enrichissement des genres
+    app.state.deezer_enricher = DeezerGenreEnricher()
+
+    # Rafraîchissement du chart Deezer en tâche de fond (inutile en mode matérialisé : le pipeline s'en charge)
+    app.state.deezer_chart_refresher = DeezerChartRefresher(app.state.deezer_enricher)
+    if OPENSOUND_SERVING_MODE != MATERIALIZED_MODE:
+        app.state.deezer_chart_refresher.start()
+
+    # Préchauffage en tâche de fond : /health répond tout de suite, /ready à la fin du préchauffage
+    app.state.warmup = build_warmup(app)
+    REGISTRY.register_stats("opensound_startup", "phase", app.state.warmup.stats)
+    app.state.warmup.start()
+
+    yield
+
+    await app.state.warmup.stop()
+    await app.state.deezer_chart_refresher.stop()
+    await app.state.deezer_enricher.aclose()
+    request_executor.shutdown()
+    shutdown_loader_pool()
+
 
 app = FastAPI(
     title="OpenSound Analytics API",
     description="API pour analyser des données musicales",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Liste des routers de traitement ajoutés
 app.include_router(spotify.router)
 app.include_router(deezer_chart.router)
 
+
+class TimingMiddleware:
+    """
+    Mesure chaque requête et ses étapes (en-tête Server-Timing, histogrammes /metrics).
+
+    Si le profilage est autorisé et que la requête porte l'en-tête X-Profile: 1,
+    la réponse est remplacée par le détail des étapes et un résumé cProfile
+    des étapes (extraction, transformations, appels Deezer).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = OPENSOUND_PROFILING_ENABLED and dict(scope["headers"]).get(PROFILE_HEADER.lower().encode()) == b"1"
+        trace, token = start_request_trace(profile=profile)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                stages = [("app", time.perf_counter() - start)] + list(trace.stage_totals().items())
+                server_timing = ", ".join(f"{name};dur={value * 1000:.1f}" for name, value in stages)
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", server_timing.encode())]
+            # En mode profilage, la réponse d'origine est remplacée par le profil
+            if not profile:
+                await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request_trace(token)
+            duration = time.perf_counter() - start
+            # Route déclarée (ex: /spotify/top-genres) plutôt que l'URL : nombre de séries borné
+            route = scope.get("route")
+            REQUEST_DURATION.observe(
+                duration,
+                method=scope["method"],
+                route=route.path if route is not None else "unmatched",
+                status=status,
+            )
+
+        if profile:
+            response = JSONResponse({
+                "path": scope["path"],
+                "status_code": status,
+                "duration_ms": round(duration * 1000, 3),
+                "stages": [
+                    {"stage": name, "duration_ms": round(value * 1000, 3)} for name, value in trace.stage_totals().items()
+                ],
+                "profile": trace.profile_summary(),
+            })
+            await response(scope, receive, send)
+
+
+app.add_middleware(TimingMiddleware)
+
+
 @app.get("/")
 def read_root():
     """Page d'accueil de l'API OpenSound"""
@@ -24,3 +196,16 @@ def read_root():
 def health_check():
     """Endpoint de vérification de l'état de l'application"""
     return {"status": "healthy"}
+
+@app.get("/ready")
+def readiness_check(request: Request):
+    """Endpoint de disponibilité : 200 une fois le préchauffage terminé, 503 pendant (avec son avancement)"""
+    warmup = getattr(request.app.state, "warmup", None)
+    if warmup is None:
+        return JSONResponse({"ready": False, "elapsed_ms": 0.0, "steps": []}, status_code=503)
+    return JSONResponse(warmup.status(), status_code=200 if warmup.ready else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Métriques au format texte Prometheus (durées des requêtes et des étapes, caches)"""
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
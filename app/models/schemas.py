@@ -1,5 +1,7 @@
+from datetime import date, datetime
+
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+from typing import Literal, Optional, List, Dict
 
 class TopGenresResponse(BaseModel):
     """Modèle de réponse pour les genres les plus populaires"""
@@ -111,11 +113,23 @@ class DeezerChartResponse(BaseModel):
         ...,
         description="Liste des tracks du chart avec leurs métadonnées enrichies"
     )
+    snapshot_age_seconds: float = Field(
+        ...,
+        description="Âge (en secondes) du snapshot du chart servi",
+        example=42.0
+    )
+    is_stale: bool = Field(
+        ...,
+        description="Indique si le snapshot est périmé (rafraîchissement en cours ou Deezer indisponible)",
+        example=False
+    )
 
     class Config:
         json_schema_extra = {
             "example": {
                 "total_tracks": 3,
+                "snapshot_age_seconds": 42.0,
+                "is_stale": False,
                 "tracks": [
                     {
                         "track": "Flowers",
@@ -141,3 +155,277 @@ class DeezerChartResponse(BaseModel):
                 ]
             }
         }
+
+
+class DatasetCacheStats(BaseModel):
+    """Statistiques du registre pour un dataset."""
+
+    hits: int = Field(..., description="Nombre d'accès servis depuis la mémoire", example=42)
+    misses: int = Field(..., description="Nombre de (re)chargements depuis le disque", example=1)
+    coalesced: int = Field(
+        0, description="Calculs attendus plutôt que relancés (déjà en cours pour une autre requête)", example=3
+    )
+    results: int = Field(..., description="Nombre de résultats dérivés (tables agrégées, index) en mémoire", example=4)
+
+
+class DatasetCacheStatsResponse(BaseModel):
+    """Modèle de réponse pour les statistiques du registre de datasets."""
+
+    datasets: Dict[str, DatasetCacheStats] = Field(
+        ...,
+        description="Statistiques du cache par dataset",
+    )
+
+
+SpotifyMetric = Literal[
+    "top_genres", "top_subgenres", "top_decades", "duration_popularity_correlation", "mean_popularity"
+]
+
+
+class SpotifyAnalyticsResult(BaseModel):
+    """Statistiques calculées pour un ensemble de datasets."""
+
+    total_tracks_analyzed: int = Field(
+        ...,
+        description="Nombre total de morceaux analysés",
+        example=4831,
+    )
+    top_genres: Optional[Dict[str, int]] = Field(
+        None,
+        description="Genres avec leur popularité moyenne (si 'top_genres' est demandé)",
+        example={"r&b": 76, "gaming": 71, "metal": 69},
+    )
+    top_subgenres: Optional[Dict[str, int]] = Field(
+        None,
+        description="Sous-genres avec leur popularité moyenne (si 'top_subgenres' est demandé)",
+        example={"modern rock": 74, "classic rock": 70, "hard rock": 66},
+    )
+    top_decades: Optional[Dict[int, int]] = Field(
+        None,
+        description="Décennies avec leur popularité moyenne (si 'top_decades' est demandé)",
+        example={1950: 62, 1970: 58, 1960: 57},
+    )
+    duration_popularity_correlation: Optional[float] = Field(
+        None,
+        description="Corrélation durée (min) / popularité (si 'duration_popularity_correlation' est demandé)",
+        example=-0.06,
+    )
+    mean_popularity: Optional[float] = Field(
+        None,
+        description="Popularité moyenne des morceaux (si 'mean_popularity' est demandé)",
+        example=57.83,
+    )
+    errors: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Statistiques demandées mais impossibles à calculer, avec la raison",
+        example={},
+    )
+
+
+class SpotifyBatchAnalyticsResponse(SpotifyAnalyticsResult):
+    """Modèle de réponse du calcul groupé de statistiques Spotify."""
+
+    datasets: List[str] = Field(
+        ...,
+        description="Datasets analysés ensemble",
+        example=["high", "low"],
+    )
+    metrics: List[SpotifyMetric] = Field(
+        ...,
+        description="Statistiques calculées",
+        example=["top_genres", "top_decades", "duration_popularity_correlation"],
+    )
+    by_dataset: Optional[Dict[str, SpotifyAnalyticsResult]] = Field(
+        None,
+        description="Mêmes statistiques pour chaque dataset séparément (si by_dataset=true)",
+    )
+
+
+class SpotifyIngestionResponse(BaseModel):
+    """Modèle de réponse de l'ajout de morceaux à un dataset Spotify."""
+
+    dataset: str = Field(
+        ...,
+        description="Dataset alimenté",
+        example="high",
+    )
+    received: int = Field(
+        ...,
+        description="Lignes reçues dans le lot",
+        example=100,
+    )
+    appended: int = Field(
+        ...,
+        description="Lignes ajoutées au dataset",
+        example=97,
+    )
+    duplicates: int = Field(
+        ...,
+        description="Lignes ignorées car leur track_id est déjà présent (dataset ou lot)",
+        example=2,
+    )
+    missing_track_id: int = Field(
+        ...,
+        description="Lignes ignorées car sans track_id",
+        example=1,
+    )
+    total_tracks: int = Field(
+        ...,
+        description="Nombre de morceaux du dataset après l'ajout",
+        example=1783,
+    )
+
+
+class SimilarTrack(BaseModel):
+    """Morceau d'un dataset Spotify, avec sa distance au morceau de départ."""
+
+    track_id: str = Field(..., description="ID Spotify du morceau", example="2plbrEY59IikOBgBGLjaoe")
+    track_name: Optional[str] = Field(None, description="Titre du morceau", example="Die With A Smile")
+    track_artist: Optional[str] = Field(None, description="Artiste(s) du morceau", example="Lady Gaga, Bruno Mars")
+    playlist_genre: Optional[str] = Field(None, description="Genre de la playlist du morceau", example="pop")
+    distance: Optional[float] = Field(
+        None,
+        description="Distance euclidienne entre les caractéristiques audio standardisées (absente pour le départ)",
+        example=1.2074,
+    )
+
+
+class SpotifySimilarTracks(BaseModel):
+    """Morceaux les plus proches d'un morceau de départ."""
+
+    track: SimilarTrack = Field(..., description="Morceau de départ")
+    similar_tracks: List[SimilarTrack] = Field(
+        ...,
+        description="Morceaux les plus proches, par distance croissante (le départ exclu)",
+    )
+
+
+class SpotifySimilarTracksResponse(SpotifySimilarTracks):
+    """Modèle de réponse de la recherche de morceaux similaires."""
+
+    dataset: str = Field(..., description="Dataset parcouru", example="high")
+    k: int = Field(..., description="Nombre de morceaux similaires demandés", example=10)
+
+
+class SpotifySimilarBatchRequest(BaseModel):
+    """Corps de la recherche groupée de morceaux similaires."""
+
+    track_ids: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=1000,
+        description="Morceaux de départ (ID Spotify)",
+        example=["2plbrEY59IikOBgBGLjaoe", "6dOtVTDdiauQNBQEDOtlAB"],
+    )
+    k: int = Field(10, ge=1, le=100, description="Nombre de morceaux similaires par départ", example=10)
+
+
+class SpotifySimilarBatchResponse(BaseModel):
+    """Modèle de réponse de la recherche groupée de morceaux similaires."""
+
+    dataset: str = Field(..., description="Dataset parcouru", example="high")
+    k: int = Field(..., description="Nombre de morceaux similaires demandés", example=10)
+    tracks: Dict[str, SpotifySimilarTracks] = Field(
+        ...,
+        description="Morceaux similaires de chaque départ trouvé, par track_id",
+    )
+    not_found: List[str] = Field(
+        default_factory=list,
+        description="Morceaux de départ absents du dataset (ou sans caractéristiques audio complètes)",
+        example=[],
+    )
+
+
+class DeezerChartVersion(BaseModel):
+    """Version enregistrée du chart Deezer (un snapshot identique au précédent prolonge la version)."""
+
+    snapshot_at: datetime = Field(..., description="Date du premier snapshot de cette version (UTC)")
+    last_seen_at: datetime = Field(..., description="Date du dernier snapshot identique (UTC)")
+    until: datetime = Field(..., description="Date de la version suivante, ou last_seen_at pour la dernière (UTC)")
+    total_tracks: int = Field(..., description="Nombre de titres du chart", example=100)
+
+
+class DeezerChartVersionsResponse(BaseModel):
+    """Modèle de réponse de la liste des versions du chart sur une période"""
+
+    start: datetime = Field(..., description="Début de la période (UTC)")
+    end: datetime = Field(..., description="Fin de la période (UTC)")
+    versions: List[DeezerChartVersion] = Field(..., description="Versions servies sur la période, par date croissante")
+
+
+class DeezerChartRank(BaseModel):
+    """Rang d'un titre dans une version du chart."""
+
+    at: datetime = Field(..., description="Début de la version (UTC)")
+    until: datetime = Field(..., description="Fin de la version (UTC)")
+    rank: int = Field(..., description="Rang du titre (1 : premier)", example=3)
+
+
+class DeezerTrackHistory(BaseModel):
+    """Historique des rangs d'un titre sur la période."""
+
+    artist: str = Field(..., description="Nom de l'artiste", example="Miley Cyrus")
+    track: str = Field(..., description="Titre de la chanson", example="Flowers")
+    best_rank: int = Field(..., description="Meilleur rang atteint sur la période", example=1)
+    seconds_in_chart: float = Field(..., description="Temps passé dans le chart sur la période (secondes)")
+    seconds_in_top: float = Field(..., description="Temps passé dans les `top` premiers rangs sur la période (secondes)")
+    ranks: List[DeezerChartRank] = Field(..., description="Rang du titre dans chaque version où il figure")
+
+
+class DeezerTrackHistoryResponse(BaseModel):
+    """Modèle de réponse de l'historique des rangs des titres d'un artiste"""
+
+    start: datetime = Field(..., description="Début de la période (UTC)")
+    end: datetime = Field(..., description="Fin de la période (UTC)")
+    top: int = Field(..., description="Rang limite utilisé pour seconds_in_top", example=10)
+    tracks: List[DeezerTrackHistory] = Field(..., description="Titres présents dans le chart, par meilleur rang")
+
+
+class DeezerGenreShareDay(BaseModel):
+    """Part des genres dans le chart sur une journée."""
+
+    day: date = Field(..., description="Jour (UTC)", example="2026-10-17")
+    shares: Dict[str, float] = Field(
+        ...,
+        description="Part de chaque genre (titres sans genre exclus), pondérée par la durée de chaque version",
+        example={"Pop": 0.41, "Rap/Hip Hop": 0.27},
+    )
+
+
+class DeezerGenreTrend(BaseModel):
+    """Évolution de la part d'un genre sur la période."""
+
+    genre: str = Field(..., description="Genre musical", example="Pop")
+    share: float = Field(..., description="Part du genre sur toute la période", example=0.38)
+    first_share: float = Field(..., description="Part le premier jour de la période", example=0.31)
+    last_share: float = Field(..., description="Part le dernier jour de la période", example=0.41)
+    change: float = Field(..., description="Progression : last_share - first_share", example=0.1)
+
+
+class DeezerGenreShareResponse(BaseModel):
+    """Modèle de réponse de la part des genres dans le chart au fil du temps"""
+
+    start: datetime = Field(..., description="Début de la période (UTC)")
+    end: datetime = Field(..., description="Fin de la période (UTC)")
+    top: Optional[int] = Field(None, description="Rangs pris en compte (absent : tout le chart)", example=10)
+    days: List[DeezerGenreShareDay] = Field(..., description="Parts des genres jour par jour")
+    genres: List[DeezerGenreTrend] = Field(..., description="Genres, du plus en progression au plus en recul")
+
+
+class DeezerChartChange(BaseModel):
+    """Titre entré dans le chart ou sorti du chart entre deux versions."""
+
+    artist: str = Field(..., description="Nom de l'artiste", example="Miley Cyrus")
+    track: str = Field(..., description="Titre de la chanson", example="Flowers")
+    genre: Optional[str] = Field(None, description="Genre musical du titre", example="Pop")
+    rank: Optional[int] = Field(None, description="Rang dans la seconde version (entrées)", example=12)
+    previous_rank: Optional[int] = Field(None, description="Rang dans la première version (sorties)", example=87)
+
+
+class DeezerChartChangesResponse(BaseModel):
+    """Modèle de réponse des entrées et sorties du chart entre deux versions"""
+
+    from_version: DeezerChartVersion = Field(..., description="Première version comparée")
+    to_version: DeezerChartVersion = Field(..., description="Seconde version comparée")
+    newcomers: List[DeezerChartChange] = Field(..., description="Titres entrés, par rang")
+    dropouts: List[DeezerChartChange] = Field(..., description="Titres sortis, par rang précédent")
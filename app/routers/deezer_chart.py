@@ -1,7 +1,33 @@
-from fastapi import APIRouter, HTTPException
-from app.models.schemas import DeezerChartResponse
-from src.extractors.extractor_deezer_chart import extract_deezer_chart
-from src.transformers.transformer_deezer_chart import transform_deezer_chart
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from app.http_cache import CACHE_CONTROL, cached_body, matches_if_none_match, serialize_json
+from app.models.schemas import (
+    DeezerChartChangesResponse,
+    DeezerChartResponse,
+    DeezerChartVersionsResponse,
+    DeezerGenreShareResponse,
+    DeezerTrack,
+    DeezerTrackHistoryResponse,
+)
+from src.cache.response_cache import make_etag, response_cache
+from src.loaders.deezer_chart_history import DEEZER_CHART_HISTORY_ENABLED, DeezerChartHistory, deezer_chart_history
+from src.loaders.materialized_store import MATERIALIZED_MODE, OPENSOUND_SERVING_MODE, materialized_store
+from src.scheduling.deezer_chart_refresher import DEEZER_CHART_REFRESH_INTERVAL
+from src.scheduling.request_executor import request_executor
+
+# Nombre de tracks sérialisées par morceau de réponse en mode streaming
+DEEZER_CHART_STREAM_BATCH = 50
+
+# Période des requêtes d'historique sans date de début
+DEEZER_HISTORY_DEFAULT_DAYS = 30
+
+HISTORY_START_DESCRIPTION = f"Début de la période (ISO 8601, UTC si sans fuseau ; défaut : fin - {DEEZER_HISTORY_DEFAULT_DAYS} jours)"
+HISTORY_END_DESCRIPTION = "Fin de la période (ISO 8601, UTC si sans fuseau ; défaut : maintenant)"
 
 router = APIRouter(
     prefix="/deezer",
@@ -10,33 +36,287 @@ router = APIRouter(
 
 
 @router.get("/chart", response_model=DeezerChartResponse)
-def get_deezer_chart():
+async def get_deezer_chart(
+    request: Request,
+    limit: int = Query(10, ge=1, description="Nombre de tracks retournées (dans la limite du snapshot)"),
+    stream: bool = Query(False, description="Envoie les tracks par lots au fil de leur sérialisation"),
+):
     """
     Récupère le chart Deezer avec les genres enrichis.
 
-    Ce endpoint interroge l'API Deezer pour obtenir le top10 des titres actuel,
-    puis enrichit chaque titre avec son genre musical en récupérant
-    les informations des albums et genres associés.
+    Le chart (top DEEZER_CHART_LIMIT des titres enrichis avec leur genre
+    musical) est rafraîchi en tâche de fond à intervalle régulier. Ce
+    endpoint sert immédiatement les `limit` premiers titres du dernier
+    snapshot disponible et indique son âge ; si Deezer est lent ou
+    indisponible, le snapshot précédent continue d'être servi. En mode
+    'materialized', le chart est lu dans le store écrit par le pipeline.
+
+    Les tracks sont sérialisées une seule fois par snapshot et par limit,
+    hors de la boucle d'événements (une fois pour des requêtes simultanées).
+    L'ETag (faible, car l'âge du snapshot change à chaque requête) couvre les
+    tracks et is_stale : un client qui a déjà ce chart reçoit un 304 sans
+    corps. Avec stream=true, le corps (même JSON) est envoyé par lots de
+    DEEZER_CHART_STREAM_BATCH tracks, sans être construit en entier en
+    mémoire ni mis en cache.
+
+    Args:
+        request: Requête entrante
+        limit: Nombre de tracks retournées
+        stream: Réponse envoyée par lots
 
     Returns:
         DeezerChartResponse: Liste des tracks du chart avec métadonnées enrichies
 
     Raises:
-        HTTPException: En cas d'erreur lors de la récupération ou transformation des données
+        HTTPException: Si aucun snapshot n'a encore pu être récupéré
     """
-    try:
-        # Extraction des données brutes
-        raw_data = extract_deezer_chart()
+    if OPENSOUND_SERVING_MODE == MATERIALIZED_MODE:
+        return await _get_materialized_chart(request, limit, stream)
 
-        # Transformation et enrichissement en associant le genre au titre
-        transformed_data = transform_deezer_chart(raw_data)
+    refresher = request.app.state.deezer_chart_refresher
+    try:
+        snapshot = await refresher.get_snapshot()
 
-        return {
-            "total_tracks": len(transformed_data),
-            "tracks": transformed_data
-        }
+        return await _chart_response(
+            request, snapshot.tracks[:limit], snapshot.fetched_at, snapshot.age_seconds, refresher.is_stale(), stream
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Erreur lors de la récupération du chart Deezer: {str(e)}"
         )
+
+
+@router.get("/chart/history", response_model=DeezerChartVersionsResponse)
+async def get_deezer_chart_versions(
+    request: Request,
+    start: Optional[datetime] = Query(None, description=HISTORY_START_DESCRIPTION),
+    end: Optional[datetime] = Query(None, description=HISTORY_END_DESCRIPTION),
+):
+    """
+    Liste les versions du chart Deezer enregistrées sur une période.
+
+    Chaque rafraîchissement du chart (et chaque exécution du pipeline) est
+    enregistré dans l'historique ; un snapshot identique au précédent
+    prolonge seulement la version en cours (last_seen_at).
+
+    Raises:
+        HTTPException: 404 si l'historique est désactivé, 400 si la période est invalide
+    """
+    history = _get_history()
+    start_at, end_at = _history_period(start, end)
+    return await request_executor.run(
+        _history_key(request),
+        lambda: DeezerChartVersionsResponse(
+            start=start_at,
+            end=end_at,
+            versions=[version.describe() for version in history.versions(start_at, end_at)],
+        ),
+    )
+
+
+@router.get("/chart/history/tracks", response_model=DeezerTrackHistoryResponse)
+async def get_deezer_track_history(
+    request: Request,
+    artist: str = Query(..., description="Nom de l'artiste, tel qu'affiché dans le chart (sans tenir compte de la casse)"),
+    track: Optional[str] = Query(None, description="Titre (défaut : tous les titres de l'artiste)"),
+    top: int = Query(10, ge=1, description="Rang limite pour le temps passé dans le top (seconds_in_top)"),
+    start: Optional[datetime] = Query(None, description=HISTORY_START_DESCRIPTION),
+    end: Optional[datetime] = Query(None, description=HISTORY_END_DESCRIPTION),
+):
+    """
+    Historique des rangs des titres d'un artiste (ou d'un titre) dans le chart Deezer.
+
+    Pour chaque titre présent dans le chart sur la période : son rang dans
+    chaque version, son meilleur rang, et le temps passé dans le chart et
+    dans les `top` premiers rangs (ex: depuis combien de temps il est dans le
+    top 10). Seules les lignes de ces titres sont lues (index titre, jour).
+
+    Raises:
+        HTTPException: 404 si l'historique est désactivé, 400 si la période est invalide
+    """
+    history = _get_history()
+    start_at, end_at = _history_period(start, end)
+    return await request_executor.run(
+        _history_key(request),
+        lambda: DeezerTrackHistoryResponse(
+            start=start_at,
+            end=end_at,
+            top=top,
+            tracks=history.track_history(artist, track, start_at, end_at, top),
+        ),
+    )
+
+
+@router.get("/chart/history/genres", response_model=DeezerGenreShareResponse)
+async def get_deezer_genre_share(
+    request: Request,
+    top: Optional[int] = Query(None, ge=1, description="Ne compte que les `top` premiers rangs (défaut : tout le chart)"),
+    start: Optional[datetime] = Query(None, description=HISTORY_START_DESCRIPTION),
+    end: Optional[datetime] = Query(None, description=HISTORY_END_DESCRIPTION),
+):
+    """
+    Part de chaque genre dans le chart Deezer, jour par jour, et sa progression sur la période.
+
+    Les genres sont triés du plus en progression (part du dernier jour moins
+    part du premier jour) au plus en recul. Seules les partitions (jours) de
+    la période sont lues.
+
+    Raises:
+        HTTPException: 404 si l'historique est désactivé, 400 si la période est invalide
+    """
+    history = _get_history()
+    start_at, end_at = _history_period(start, end)
+    return await request_executor.run(
+        _history_key(request),
+        lambda: DeezerGenreShareResponse(start=start_at, end=end_at, top=top, **history.genre_share(start_at, end_at, top)),
+    )
+
+
+@router.get("/chart/history/changes", response_model=DeezerChartChangesResponse)
+async def get_deezer_chart_changes(
+    request: Request,
+    from_: Optional[datetime] = Query(
+        None, alias="from", description="Date de la première version comparée (défaut : version précédant celle de 'to')"
+    ),
+    to: Optional[datetime] = Query(None, description="Date de la seconde version comparée (défaut : dernière version)"),
+    top: Optional[int] = Query(None, ge=1, description="Ne compare que les `top` premiers rangs (défaut : tout le chart)"),
+):
+    """
+    Titres entrés dans le chart Deezer et sortis du chart entre deux versions.
+
+    Les versions comparées sont celles servies aux dates 'from' et 'to' ;
+    chacune est lue dans sa seule partition.
+
+    Raises:
+        HTTPException: 404 si l'historique est désactivé ou si aucune version n'existe à ces dates
+    """
+    history = _get_history()
+    from_at = _timestamp(from_) if from_ is not None else None
+    to_at = _timestamp(to) if to is not None else None
+    try:
+        return await request_executor.run(
+            _history_key(request),
+            lambda: DeezerChartChangesResponse(**history.changes(from_at, to_at, top)),
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+async def _get_materialized_chart(request: Request, limit: int, stream: bool) -> Response:
+    """Retourne le chart précalculé par le pipeline (503 s'il n'a pas encore été matérialisé)."""
+    # Relecture du store (s'il a changé) hors de la boucle d'événements
+    chart = await request_executor.run(
+        (request.url.path, MATERIALIZED_MODE, materialized_store.version()), materialized_store.deezer_chart
+    )
+    if chart is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Chart Deezer non matérialisé : lancer python -m src.pipeline.",
+        )
+
+    age_seconds = time.time() - chart["fetched_at"]
+    return await _chart_response(
+        request,
+        chart["tracks"][:limit],
+        chart["fetched_at"],
+        age_seconds,
+        age_seconds > DEEZER_CHART_REFRESH_INTERVAL,
+        stream,
+    )
+
+
+async def _chart_response(
+    request: Request,
+    tracks: List[Dict[str, Any]],
+    fetched_at: float,
+    age_seconds: float,
+    is_stale: bool,
+    stream: bool = False,
+) -> Response:
+    """
+    Construit la réponse du chart à partir des tracks sérialisées du snapshot.
+
+    Args:
+        request: Requête entrante (If-None-Match)
+        tracks: Tracks enrichies du snapshot (déjà limitées)
+        fetched_at: Date de récupération du snapshot (version des tracks)
+        age_seconds: Âge du snapshot
+        is_stale: Snapshot périmé
+        stream: Envoie le corps par lots (sans ETag ni cache)
+
+    Returns:
+        Response: 304 si le client a déjà ce chart, sinon le JSON DeezerChartResponse
+    """
+    if stream:
+        return StreamingResponse(
+            _stream_chart(tracks, age_seconds, is_stale), media_type="application/json"
+        )
+
+    entry = await cached_body(
+        (request.url.path, fetched_at, len(tracks)),
+        lambda: serialize_json([DeezerTrack(**track) for track in tracks]),
+        weak=True,
+    )
+    etag = make_etag(f"{entry.etag}:{is_stale}".encode(), weak=True)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if matches_if_none_match(request, etag):
+        response_cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+
+    # Enveloppe (quelques octets) formatée à chaque requête, comme l'aurait fait json.dumps
+    body = b"".join((
+        _envelope_head(tracks), entry.body, _envelope_tail(age_seconds, is_stale),
+    ))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _stream_chart(tracks: List[Dict[str, Any]], age_seconds: float, is_stale: bool) -> Iterator[bytes]:
+    """Produit le JSON DeezerChartResponse morceau par morceau (mêmes octets que la réponse complète)."""
+    yield _envelope_head(tracks) + b"["
+    for start in range(0, len(tracks), DEEZER_CHART_STREAM_BATCH):
+        batch = serialize_json([DeezerTrack(**track) for track in tracks[start:start + DEEZER_CHART_STREAM_BATCH]])
+        yield (b"," if start else b"") + batch[1:-1]
+    yield b"]" + _envelope_tail(age_seconds, is_stale)
+
+
+def _envelope_head(tracks: List[Dict[str, Any]]) -> bytes:
+    """Début de l'enveloppe JSON, jusqu'à la liste des tracks."""
+    return b'{"total_tracks":' + str(len(tracks)).encode() + b',"tracks":'
+
+
+def _envelope_tail(age_seconds: float, is_stale: bool) -> bytes:
+    """Fin de l'enveloppe JSON, après la liste des tracks."""
+    return b"".join((
+        b',"snapshot_age_seconds":', json.dumps(round(age_seconds, 1)).encode(),
+        b',"is_stale":', json.dumps(is_stale).encode(),
+        b"}",
+    ))
+
+
+def _get_history() -> DeezerChartHistory:
+    """Retourne l'historique du chart (404 s'il est désactivé)."""
+    if not DEEZER_CHART_HISTORY_ENABLED:
+        raise HTTPException(status_code=404, detail="Historique du chart désactivé (DEEZER_CHART_HISTORY=0).")
+    return deezer_chart_history
+
+
+def _history_period(start: Optional[datetime], end: Optional[datetime]) -> Tuple[float, float]:
+    """Période d'une requête d'historique en timestamps Unix (défaut : les derniers jours)."""
+    end_at = _timestamp(end) if end is not None else time.time()
+    start_at = _timestamp(start) if start is not None else end_at - timedelta(days=DEEZER_HISTORY_DEFAULT_DAYS).total_seconds()
+    if start_at > end_at:
+        raise HTTPException(status_code=400, detail="start doit être antérieur ou égal à end.")
+    return start_at, end_at
+
+
+def _history_key(request: Request) -> tuple:
+    """Clé de mise en commun des requêtes d'historique identiques simultanées."""
+    return request.url.path, str(request.query_params)
+
+
+def _timestamp(value: datetime) -> float:
+    """Date → timestamp Unix (une date sans fuseau est en UTC)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
@@ -1,70 +1,258 @@
-from typing import Literal
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from app.http_cache import cached_json_response
 from app.models.schemas import (
+    DatasetCacheStatsResponse,
     DurationPopularityCorrelationResponse,
+    SpotifyAnalyticsResult,
+    SpotifyBatchAnalyticsResponse,
+    SpotifyIngestionResponse,
+    SpotifyMetric,
+    SpotifySimilarBatchRequest,
+    SpotifySimilarBatchResponse,
+    SpotifySimilarTracksResponse,
     TopDecadesResponse,
     TopGenresResponse,
 )
-from src.extractors.extractor_spotify import extract_spotify_data
+from src.extractors.dataset_catalog import DatasetCatalog, get_loader_pool
+from src.extractors.dataset_registry import DatasetRegistry
+from src.loaders.materialized_store import (
+    MATERIALIZED_MODE,
+    OPENSOUND_SERVING_MODE,
+    combination_key,
+    materialized_store,
+)
+from src.observability.tracing import stage
+from src.scheduling.request_executor import request_executor
+from src.transformers.spotify_filters import SpotifyFilters
 from src.transformers.transformer_spotify import (
-    compute_duration_popularity_correlation,
-    get_top_decades_by_popularity,
-    get_top_genres_by_popularity,
+    DURATION_POPULARITY_CORRELATION,
+    SPOTIFY_METRICS,
+    TOP_DECADES,
+    TOP_GENRES,
+    compute_filtered_spotify_analytics,
+    summarize_spotify_analytics,
 )
 
+# Les modules de calcul (pandas, NumPy) sont importés au premier usage, pas à l'import de l'API
+if TYPE_CHECKING:
+    from src.transformers.spotify_similarity import SimilarityIndex
+
 router = APIRouter(
     prefix="/spotify",
     tags=["Spotify Analytics"]
 )
 
-# Chemins vers les fichiers CSV (high / low popularity)
-DATA_PATHS = {
-    "high": "data/raw/high_popularity_spotify_data.csv",
-    "low": "data/raw/low_popularity_spotify_data.csv",
-}
+# Catalogue des fichiers Spotify (data/raw/*.csv et data/processed/*.parquet)
+dataset_catalog = DatasetCatalog()
+
+# Registre partagé : chaque fichier n'est relu que s'il change
+dataset_registry = DatasetRegistry(dataset_catalog.discover())
+
+DATASET_DESCRIPTION = (
+    "Un ou plusieurs datasets du catalogue (ex: 'high' pour high_popularity_spotify_data.csv, "
+    "'low' pour low_popularity_spotify_data.csv), ou 'all' pour tous. Paramètre répétable : ?dataset=high&dataset=low"
+)
 
+# Nombre maximal de morceaux similaires retournés par morceau de départ
+SIMILAR_MAX_K = 100
 
-def _get_data_path(dataset: Literal["high", "low"]) -> str:
-    """Retourne le chemin CSV en fonction du dataset choisi."""
+
+def _spotify_filters(
+    genre: List[str] = Query([], description="Genres de playlist retenus (valeur exacte, répétable)"),
+    subgenre: List[str] = Query([], description="Sous-genres de playlist retenus (valeur exacte, répétable)"),
+    artist: List[str] = Query([], description="Artistes retenus, tels qu'écrits dans 'track_artist' (répétable)"),
+    playlist: List[str] = Query([], description="Noms de playlists retenus (valeur exacte, répétable)"),
+    year_min: Optional[int] = Query(None, description="Année de sortie minimale (incluse)"),
+    year_max: Optional[int] = Query(None, description="Année de sortie maximale (incluse)"),
+) -> SpotifyFilters:
+    """Filtres communs aux endpoints d'analyse (combinés entre eux, valeurs d'un même filtre combinées en OU)."""
+    if year_min is not None and year_max is not None and year_min > year_max:
+        raise HTTPException(status_code=400, detail="year_min doit être inférieur ou égal à year_max.")
+    return SpotifyFilters(
+        genre=tuple(genre),
+        subgenre=tuple(subgenre),
+        artist=tuple(artist),
+        playlist=tuple(playlist),
+        year_min=year_min,
+        year_max=year_max,
+    )
+
+
+def _resolve_datasets(datasets: List[str]) -> List[str]:
+    """Retourne les noms des datasets demandés et les déclare dans le registre."""
     try:
-        return DATA_PATHS[dataset]
-    except KeyError:
+        paths = dataset_catalog.resolve(datasets)
+    except KeyError as e:
+        available = ", ".join(f"'{name}'" for name in dataset_catalog.discover())
         raise HTTPException(
             status_code=400,
-            detail="Paramètre 'dataset' doit être 'high' ou 'low'.",
+            detail=f"Dataset(s) inconnu(s): {e.args[0]}. Valeurs possibles : {available} ou 'all'.",
+        )
+    if not paths:
+        raise HTTPException(status_code=404, detail="Aucun dataset disponible dans le catalogue.")
+
+    for name, path in paths.items():
+        dataset_registry.register(name, path)
+    return list(paths)
+
+
+def _get_summary(
+    names: List[str],
+    metrics: List[str],
+    top_n_genres: int = 3,
+    top_n_decades: int = 3,
+    top_n_subgenres: int = 3,
+    filters: SpotifyFilters = SpotifyFilters(),
+) -> Dict[str, Any]:
+    """
+    Retourne les statistiques demandées pour des datasets analysés ensemble.
+
+    Avec des filtres, les analyses portent sur les seules lignes retenues :
+    elles sont lues dans les index secondaires de chaque dataset, construits
+    une fois par version du fichier (sans conserver le DataFrame), dans les
+    deux modes de service.
+
+    En mode 'lazy', chaque dataset est analysé une fois par version de fichier
+    (en parallèle dans le pool de processus s'il y en a plusieurs à calculer,
+    en streaming pour les CSV volumineux, ou repris de l'état tenu à jour par
+    l'ajout de morceaux), puis les agrégats partiels sont fusionnés. Les étapes exécutées dans le pool de processus ne remontent pas
+    dans /metrics : l'étape 'spotify.analytics' couvre leur durée totale.
+
+    En mode 'materialized', les résultats sont lus dans le store écrit par le
+    pipeline hors ligne, sans aucun calcul.
+    """
+    from src.loaders.spotify_ingestion import get_spotify_analytics
+    from src.transformers.spotify_analytics import merge_spotify_analytics
+    from src.transformers.spotify_index import build_spotify_file_index
+
+    if not filters.is_empty():
+        try:
+            with stage("spotify.filtered_analytics"):
+                indexes = dataset_registry.get_derived_many(names, "index", build_spotify_file_index, get_loader_pool())
+                parts = [compute_filtered_spotify_analytics(index, filters) for index in indexes]
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Filtre invalide: {str(e)}")
+        return summarize_spotify_analytics(
+            merge_spotify_analytics(parts), metrics, top_n_genres, top_n_decades, top_n_subgenres
         )
 
+    if OPENSOUND_SERVING_MODE == MATERIALIZED_MODE:
+        summary = materialized_store.spotify_summary(names, metrics, top_n_genres, top_n_decades, top_n_subgenres)
+        if summary is None:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Résultats non matérialisés pour '{combination_key(names)}' : lancer python -m src.pipeline.",
+            )
+        return summary
+
+    with stage("spotify.analytics"):
+        parts = dataset_registry.get_derived_many(names, "analytics", get_spotify_analytics, get_loader_pool())
+    return summarize_spotify_analytics(
+        merge_spotify_analytics(parts), metrics, top_n_genres, top_n_decades, top_n_subgenres
+    )
+
+
+def warm_up_dataset(name: str) -> None:
+    """
+    Prépare les analyses d'un dataset avant les premières requêtes (préchauffage, hors de la boucle d'événements).
+
+    Même chemin que les endpoints sans filtre : analyse en mode 'lazy' (pool
+    de processus, conservée dans le registre), relecture du store en mode
+    'materialized'.
+
+    Args:
+        name: Nom du dataset dans le catalogue
+
+    Raises:
+        HTTPException: Si le dataset est inconnu ou absent du store matérialisé
+    """
+    _get_summary(_resolve_datasets([name]), list(SPOTIFY_METRICS))
+
+
+def _resolve_similarity_dataset(dataset: str) -> str:
+    """
+    Retourne le nom du dataset parcouru par une recherche de morceaux similaires.
+
+    Les caractéristiques sont standardisées sur le dataset : les distances ne
+    sont comparables qu'à l'intérieur d'un même dataset, d'où un seul dataset
+    par recherche.
+    """
+    names = _resolve_datasets([dataset])
+    if len(names) != 1:
+        raise HTTPException(status_code=400, detail="La recherche de morceaux similaires porte sur un seul dataset.")
+    return names[0]
+
+
+def _get_similarity_index(name: str) -> "SimilarityIndex":
+    """Retourne la matrice de similarité d'un dataset, construite une fois par version du fichier."""
+    from src.transformers.spotify_similarity import build_file_similarity_index
+
+    try:
+        with stage("spotify.similarity_index"):
+            return dataset_registry.get_derived_many(
+                [name], "similarity", build_file_similarity_index, get_loader_pool()
+            )[0]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Données invalides pour la similarité: {str(e)}")
+
+
+def _data_version(names: List[str], filters: SpotifyFilters) -> Hashable:
+    """Version des données servies : signature des fichiers sources, ou du store en mode matérialisé (sans filtre)."""
+    if OPENSOUND_SERVING_MODE == MATERIALIZED_MODE and filters.is_empty():
+        return MATERIALIZED_MODE, materialized_store.version()
+    return dataset_registry.version(names)
+
+
+def _metric(summary: Dict[str, Any], metric: str) -> Any:
+    """
+    Retourne une statistique calculée.
+
+    Raises:
+        ValueError: Si la statistique n'a pas pu être calculée
+    """
+    if metric in summary["errors"]:
+        raise ValueError(summary["errors"][metric])
+    return summary[metric]
+
+
 @router.get("/top-genres", response_model=TopGenresResponse)
-def get_top_genres(
+async def get_top_genres(
+    request: Request,
     top_n: int = 3,
-    dataset: Literal["high", "low"] = Query(
-        ...,
-        description="Choisir 'high' (high_popularity_spotify_data.csv) ou 'low' (low_popularity_spotify_data.csv)",
-    ),
+    dataset: List[str] = Query(..., description=DATASET_DESCRIPTION),
+    filters: SpotifyFilters = Depends(_spotify_filters),
 ):
     """
     Retourne les N genres musicaux les plus populaires d'après Spotify.
 
     Args:
         top_n: Nombre de genres à retourner (par défaut 3)
+        dataset: Datasets à analyser ensemble (ou 'all')
+        filters: Sous-ensemble des morceaux analysés (genre, sous-genre, artiste, playlist, années)
 
     Returns:
         TopGenresResponse avec les genres et statistiques
     """
     try:
-        # Extraction des données
-        df = extract_spotify_data(_get_data_path(dataset))
+        names = _resolve_datasets(dataset)
 
-        # Transformation et obtention du résultat
-        top_genres = get_top_genres_by_popularity(df, top_n=top_n)
+        def build() -> TopGenresResponse:
+            # Analyses précalculées (recalculées seulement si le fichier change)
+            summary = _get_summary(names, [TOP_GENRES], top_n_genres=top_n, filters=filters)
 
-        # Construction de la réponse
-        return TopGenresResponse(
-            top_genres=top_genres,
-            total_tracks_analyzed=len(df)
-        )
+            # Construction de la réponse
+            return TopGenresResponse(
+                top_genres=_metric(summary, TOP_GENRES),
+                total_tracks_analyzed=summary["total_tracks_analyzed"]
+            )
 
+        # Réponse sérialisée en cache tant que les fichiers ne changent pas (ETag / 304)
+        return await cached_json_response(request, _data_version(names, filters), build)
+
+    except HTTPException:
+        raise
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=f"Fichier de données introuvable: {str(e)}")
     except Exception as e:
@@ -75,23 +263,27 @@ def get_top_genres(
     "/duration-popularity-correlation",
     response_model=DurationPopularityCorrelationResponse,
 )
-def get_duration_popularity_correlation(
-    dataset: Literal["high", "low"] = Query(
-        ...,
-        description="Choisir 'high' (high_popularity_spotify_data.csv) ou 'low' (low_popularity_spotify_data.csv)",
-    ),
+async def get_duration_popularity_correlation(
+    request: Request,
+    dataset: List[str] = Query(..., description=DATASET_DESCRIPTION),
+    filters: SpotifyFilters = Depends(_spotify_filters),
 ):
     """
     Retourne la corrélation entre la durée (minutes) et la popularité des morceaux.
     """
     try:
-        df = extract_spotify_data(_get_data_path(dataset))
-        correlation = compute_duration_popularity_correlation(df)
+        names = _resolve_datasets(dataset)
 
-        return DurationPopularityCorrelationResponse(
-            correlation=correlation,
-            total_tracks_analyzed=len(df),
-        )
+        def build() -> DurationPopularityCorrelationResponse:
+            summary = _get_summary(names, [DURATION_POPULARITY_CORRELATION], filters=filters)
+            return DurationPopularityCorrelationResponse(
+                correlation=_metric(summary, DURATION_POPULARITY_CORRELATION),
+                total_tracks_analyzed=summary["total_tracks_analyzed"],
+            )
+
+        return await cached_json_response(request, _data_version(names, filters), build)
+    except HTTPException:
+        raise
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=f"Fichier de données introuvable: {str(e)}")
     except ValueError as e:
@@ -101,27 +293,231 @@ def get_duration_popularity_correlation(
 
 
 @router.get("/top-decades", response_model=TopDecadesResponse)
-def get_top_decades(
+async def get_top_decades(
+    request: Request,
     top_n: int = 3,
-    dataset: Literal["high", "low"] = Query(
-        ...,
-        description="Choisir 'high' (high_popularity_spotify_data.csv) ou 'low' (low_popularity_spotify_data.csv)",
-    ),
+    dataset: List[str] = Query(..., description=DATASET_DESCRIPTION),
+    filters: SpotifyFilters = Depends(_spotify_filters),
 ):
     """
     Retourne les décennies les plus populaires (popularité moyenne des morceaux).
     """
     try:
-        df = extract_spotify_data(_get_data_path(dataset))
-        top_decades = get_top_decades_by_popularity(df, top_n=top_n)
+        names = _resolve_datasets(dataset)
 
-        return TopDecadesResponse(
-            top_decades=top_decades,
-            total_tracks_analyzed=len(df),
-        )
+        def build() -> TopDecadesResponse:
+            summary = _get_summary(names, [TOP_DECADES], top_n_decades=top_n, filters=filters)
+            return TopDecadesResponse(
+                top_decades=_metric(summary, TOP_DECADES),
+                total_tracks_analyzed=summary["total_tracks_analyzed"],
+            )
+
+        return await cached_json_response(request, _data_version(names, filters), build)
+    except HTTPException:
+        raise
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=f"Fichier de données introuvable: {str(e)}")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Données invalides pour les décennies: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors du traitement: {str(e)}")
+
+
+@router.get("/analytics", response_model=SpotifyBatchAnalyticsResponse)
+async def get_batch_analytics(
+    request: Request,
+    dataset: List[str] = Query(..., description=DATASET_DESCRIPTION),
+    metric: List[SpotifyMetric] = Query(
+        list(SPOTIFY_METRICS),
+        description="Statistiques à calculer (répétable, toutes par défaut) : ?metric=top_genres&metric=top_decades",
+    ),
+    top_n_genres: int = 3,
+    top_n_decades: int = 3,
+    top_n_subgenres: int = 3,
+    by_dataset: bool = False,
+    filters: SpotifyFilters = Depends(_spotify_filters),
+):
+    """
+    Calcule plusieurs statistiques Spotify en une seule requête.
+
+    Chaque dataset est chargé et nettoyé une seule fois, puis toutes les
+    statistiques demandées sont calculées à partir des mêmes analyses. Une
+    statistique impossible à calculer est signalée dans 'errors' sans faire
+    échouer la requête.
+
+    Args:
+        dataset: Datasets à analyser ensemble (ou 'all')
+        metric: Statistiques demandées
+        top_n_genres: Nombre de genres à retourner
+        top_n_decades: Nombre de décennies à retourner
+        top_n_subgenres: Nombre de sous-genres à retourner
+        by_dataset: Ajoute les statistiques de chaque dataset séparément
+        filters: Sous-ensemble des morceaux analysés (genre, sous-genre, artiste, playlist, années)
+
+    Returns:
+        SpotifyBatchAnalyticsResponse avec les statistiques demandées
+    """
+    try:
+        names = _resolve_datasets(dataset)
+
+        def build() -> SpotifyBatchAnalyticsResponse:
+            summary = _get_summary(names, metric, top_n_genres, top_n_decades, top_n_subgenres, filters)
+
+            # Les analyses de chaque dataset sont déjà en cache (ou matérialisées)
+            per_dataset = None
+            if by_dataset:
+                per_dataset = {
+                    name: SpotifyAnalyticsResult(
+                        **_get_summary([name], metric, top_n_genres, top_n_decades, top_n_subgenres, filters)
+                    )
+                    for name in names
+                }
+
+            return SpotifyBatchAnalyticsResponse(
+                datasets=names,
+                metrics=list(dict.fromkeys(metric)),
+                by_dataset=per_dataset,
+                **summary,
+            )
+
+        return await cached_json_response(request, _data_version(names, filters), build)
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Fichier de données introuvable: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors du traitement: {str(e)}")
+
+
+@router.get("/similar/{track_id}", response_model=SpotifySimilarTracksResponse)
+async def get_similar_tracks(
+    request: Request,
+    track_id: str,
+    dataset: str = Query(..., description="Dataset parcouru (ex: 'high')"),
+    k: int = Query(10, ge=1, le=SIMILAR_MAX_K, description="Nombre de morceaux similaires"),
+):
+    """
+    Retourne les k morceaux les plus proches d'un morceau, d'après ses caractéristiques audio.
+
+    Les caractéristiques (energy, tempo, danceability, loudness, valence,
+    acousticness, speechiness, instrumentalness, liveness) sont standardisées
+    sur le dataset ; la proximité est la distance euclidienne entre morceaux.
+
+    Args:
+        track_id: ID Spotify du morceau de départ
+        dataset: Dataset parcouru
+        k: Nombre de morceaux similaires
+
+    Returns:
+        SpotifySimilarTracksResponse avec les morceaux par distance croissante
+    """
+    try:
+        name = _resolve_similarity_dataset(dataset)
+
+        def build() -> SpotifySimilarTracksResponse:
+            from src.transformers.spotify_similarity import find_similar_tracks
+
+            index = _get_similarity_index(name)
+            with stage("spotify.similar_tracks"):
+                result = find_similar_tracks(index, [track_id], k)
+            if track_id not in result["tracks"]:
+                raise HTTPException(status_code=404, detail=f"Morceau '{track_id}' introuvable dans '{dataset}'.")
+            return SpotifySimilarTracksResponse(dataset=name, k=k, **result["tracks"][track_id])
+
+        return await cached_json_response(request, dataset_registry.version([name]), build)
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Fichier de données introuvable: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors du traitement: {str(e)}")
+
+
+@router.post("/similar", response_model=SpotifySimilarBatchResponse)
+async def get_similar_tracks_batch(
+    request: Request,
+    body: SpotifySimilarBatchRequest,
+    dataset: str = Query(..., description="Dataset parcouru (ex: 'high')"),
+):
+    """
+    Retourne les k morceaux les plus proches de plusieurs morceaux de départ.
+
+    Les distances de tous les départs sont calculées ensemble, bloc de
+    lignes par bloc de lignes : une requête groupée coûte bien moins que
+    autant d'appels à /similar/{track_id}. Les départs absents du dataset
+    sont listés dans 'not_found' sans faire échouer la requête.
+
+    Args:
+        body: Morceaux de départ et nombre de morceaux similaires
+        dataset: Dataset parcouru
+
+    Returns:
+        SpotifySimilarBatchResponse avec les morceaux similaires de chaque départ
+    """
+    try:
+        name = _resolve_similarity_dataset(dataset)
+
+        def build() -> SpotifySimilarBatchResponse:
+            from src.transformers.spotify_similarity import find_similar_tracks
+
+            index = _get_similarity_index(name)
+            with stage("spotify.similar_tracks"):
+                result = find_similar_tracks(index, body.track_ids, body.k)
+            return SpotifySimilarBatchResponse(dataset=name, k=body.k, **result)
+
+        # Lots identiques simultanés : un seul calcul
+        key = (request.url.path, dataset_registry.version([name]), tuple(body.track_ids), body.k)
+        return await request_executor.run(key, build)
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Fichier de données introuvable: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors du traitement: {str(e)}")
+
+
+@router.get("/cache-stats", response_model=DatasetCacheStatsResponse)
+def get_cache_stats():
+    """
+    Retourne les statistiques du registre de datasets (hits / misses par dataset).
+    """
+    return DatasetCacheStatsResponse(datasets=dataset_registry.stats())
+
+
+@router.post("/datasets/{dataset}/tracks", response_model=SpotifyIngestionResponse)
+async def append_tracks(dataset: str, request: Request):
+    """
+    Ajoute des morceaux à la fin du CSV d'un dataset.
+
+    Corps de la requête : fragment CSV avec ligne d'en-tête (Content-Type: text/csv)
+    ou lot JSON (liste d'objets, ou objet {"tracks": [...]}). Les lignes dont le
+    track_id est déjà présent sont ignorées ; les statistiques servies sont mises
+    à jour à partir du lot seul.
+    """
+    from src.loaders.spotify_ingestion import CSV_BATCH, JSON_BATCH, append_spotify_tracks, parse_spotify_batch
+
+    try:
+        file_path = dataset_catalog.resolve([dataset])[dataset]
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Dataset inconnu: '{dataset}'")
+
+    content_type = request.headers.get("content-type", "")
+    batch_format = CSV_BATCH if "csv" in content_type else JSON_BATCH
+    body = await request.body()
+
+    def ingest() -> Dict[str, int]:
+        # Lecture du lot (taille quelconque) et écriture hors de la boucle d'événements
+        return append_spotify_tracks(file_path, parse_spotify_batch(body, batch_format))
+
+    try:
+        # Pas de mise en commun : chaque lot est ajouté
+        report = await request_executor.run(None, ingest)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Fichier de données introuvable: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Lot invalide: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de l'ajout: {str(e)}")
+
+    dataset_registry.register(dataset, file_path)
+    return SpotifyIngestionResponse(dataset=dataset, **report)
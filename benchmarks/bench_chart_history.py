@@ -0,0 +1,108 @@
+import argparse
+import itertools
+import random
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import peak_rss_mb, time_call, write_results
+from src.loaders.deezer_chart_history import SECONDS_PER_DAY, DeezerChartHistory
+
+# Titres, artistes et genres du faux chart
+CHART_SIZE = 100
+TRACK_POOL = 5000
+ARTISTS = 800
+GENRES = ["Pop", "Rap/Hip Hop", "Dance", "Rock", "R&B", "Alternative", "Electro", "Reggaeton", "Jazz", "Country", None]
+
+
+def make_pool(seed: int = 0) -> List[Dict[str, Any]]:
+    """Titres candidats au chart (sortie de transform_deezer_chart)."""
+    rng = random.Random(seed)
+    return [
+        {
+            "track": f"track {index}",
+            "artist": f"artist {index % ARTISTS}",
+            "artist_picture": f"https://api.deezer.com/artist/{index % ARTISTS}/image",
+            "genre": rng.choice(GENRES),
+            "is_explicit_lyrics": rng.random() < 0.2,
+        }
+        for index in range(TRACK_POOL)
+    ]
+
+
+def build_history(history: DeezerChartHistory, pool: List[Dict[str, Any]], days: int, versions_per_day: int,
+                  end: float, seed: int = 0) -> List[Dict[str, Any]]:
+    """Remplit l'historique : à chaque version, quelques titres entrent, sortent ou changent de rang."""
+    rng = random.Random(seed)
+    chart = rng.sample(pool, CHART_SIZE)
+    step = SECONDS_PER_DAY / versions_per_day
+    start = end - days * SECONDS_PER_DAY
+    for version in range(days * versions_per_day):
+        current = {(track["artist"], track["track"]) for track in chart}
+        newcomers = [track for track in rng.sample(pool, 20) if (track["artist"], track["track"]) not in current][:5]
+        chart = chart[:CHART_SIZE - len(newcomers)]
+        for track in newcomers:
+            chart.insert(rng.randrange(len(chart) + 1), track)
+        # Quelques échanges de rangs voisins
+        for _ in range(10):
+            position = rng.randrange(CHART_SIZE - 1)
+            chart[position], chart[position + 1] = chart[position + 1], chart[position]
+        history.append(chart, start + version * step)
+    return chart
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Historique du chart Deezer : ajouts et requêtes par période selon sa profondeur.")
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 365], help="Profondeurs d'historique (jours)")
+    parser.add_argument("--versions-per-day", type=int, default=4, help="Changements du chart par jour")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pool = make_pool()
+    end = 1_760_000_000.0
+    results: Dict[str, Any] = {"versions_per_day": args.versions_per_day, "chart_size": CHART_SIZE, "depths": {}}
+
+    for days in args.days:
+        with tempfile.TemporaryDirectory() as directory:
+            history = DeezerChartHistory(str(Path(directory) / "history.sqlite"))
+            chart = build_history(history, pool, days, args.versions_per_day, end)
+            stats = history.stats()["deezer_chart"]
+            artist = chart[0]["artist"]
+
+            # Snapshot identique (cas courant : le chart n'a pas changé depuis le dernier rafraîchissement)
+            refresh_times = itertools.count(end + 60, 60)
+            depth: Dict[str, Any] = {
+                "versions": stats["versions"],
+                "entries": stats["entries"],
+                "size_mb": round(stats["size_bytes"] / 1024 ** 2, 2),
+                "append_unchanged": time_call(lambda: history.append(chart, next(refresh_times)), args.repeat),
+                "queries": {},
+            }
+            for window in (1, 7, 30):
+                start = end - window * SECONDS_PER_DAY
+                depth["queries"][f"{window}d"] = {
+                    "versions": time_call(lambda: history.versions(start, end), args.repeat),
+                    "track_history": time_call(lambda: history.track_history(artist, None, start, end, 10), args.repeat),
+                    "genre_share": time_call(lambda: history.genre_share(start, end, 10), args.repeat),
+                }
+            depth["changes"] = time_call(lambda: history.changes(top=CHART_SIZE), args.repeat)
+            results["depths"][f"{days}d"] = depth
+
+        print(
+            f"Historique {days:>4} jours : {depth['versions']} versions, {depth['entries']} lignes, "
+            f"{depth['size_mb']} Mo | ajout inchangé {depth['append_unchanged']['median_ms']:.2f} ms"
+            f" | entrées/sorties {depth['changes']['median_ms']:.2f} ms"
+        )
+        for window, queries in depth["queries"].items():
+            print(
+                f"  période {window:>3} | versions {queries['versions']['median_ms']:>7.2f} ms"
+                f" | rangs d'un artiste {queries['track_history']['median_ms']:>7.2f} ms"
+                f" | parts des genres {queries['genre_share']['median_ms']:>7.2f} ms"
+            )
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    write_results("chart-history", results)
+
+
+if __name__ == "__main__":
+    main()
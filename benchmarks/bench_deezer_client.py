@@ -0,0 +1,94 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from benchmarks.common import latency_percentiles, write_results
+from benchmarks.fake_deezer import FakeDeezerServer
+from src.extractors.deezer_client import CircuitBreaker, DeezerClient, DeezerError, TokenBucket
+
+
+def run_scenario(
+    server: FakeDeezerServer,
+    calls: int,
+    concurrency: int,
+    timeout: float,
+    rate_limit: int,
+    backoff_base: float,
+) -> Dict[str, Any]:
+    """
+    Envoie `calls` requêtes /album/{id} au faux serveur avec un client neuf.
+
+    Returns:
+        Succès, échecs par type, requêtes reçues par le serveur, latences par appel
+    """
+    client = DeezerClient(
+        base_url=server.url,
+        timeout=timeout,
+        connect_timeout=timeout,
+        backoff_base=backoff_base,
+        pool_size=concurrency,
+        rate_limiter=TokenBucket(rate_limit, 1.0) if rate_limit else None,
+        circuit_breaker=CircuitBreaker(failure_threshold=5, reset_timeout=60),
+    )
+    failures: Dict[str, int] = {}
+    latencies = []
+
+    def call(album_id: int) -> None:
+        start = time.perf_counter()
+        try:
+            client.get_json(f"/album/{album_id}")
+        except DeezerError as e:
+            failures[e.outcome] = failures.get(e.outcome, 0) + 1
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(call, range(calls)))
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    return {
+        "calls": calls,
+        "succeeded": calls - sum(failures.values()),
+        "failures": failures,
+        "server_requests": server.requests,
+        "elapsed_s": round(elapsed, 3),
+        **latency_percentiles(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Comportement du client Deezer face à un faux serveur local (quota, pannes).")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.01, help="Latence simulée par requête (s)")
+    parser.add_argument("--timeout", type=float, default=0.2, help="Timeout du client (s)")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Requêtes par seconde du limiteur (0 : aucun)")
+    parser.add_argument("--backoff-base", type=float, default=0.05)
+    args = parser.parse_args()
+
+    scenarios = {
+        "healthy": {"latency": args.latency},
+        "throttled": {"latency": args.latency, "quota_every": 5},
+        "flaky": {"latency": args.latency, "server_errors": 3},
+        "hung": {"hang": args.timeout * 5},
+    }
+    results = {}
+    for name, options in scenarios.items():
+        with FakeDeezerServer(**options) as server:
+            results[name] = run_scenario(
+                server, args.calls, args.concurrency, args.timeout, args.rate_limit, args.backoff_base
+            )
+        run = results[name]
+        print(
+            f"{name:<10} succès {run['succeeded']:>5}/{run['calls']:<5} | requêtes serveur {run['server_requests']:>5}"
+            f" | p50 {run['p50_ms']:>8.2f} ms | p99 {run['p99_ms']:>8.2f} ms | {run['elapsed_s']:.2f} s"
+            f" | échecs {run['failures']}"
+        )
+
+    write_results("deezer-client", {"options": vars(args), "scenarios": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from benchmarks.fake_deezer import make_fake_chart, make_fake_deezer_transport
+from src.cache.tiered_cache import MemoryCacheTier, TieredCache
+from src.transformers.deezer_genre_enricher import DeezerGenreEnricher
+from src.transformers.transformer_deezer_chart import transform_deezer_chart_async
+
+
+async def _run(chart: dict, max_concurrency: int, latency: float) -> float:
+    """Enrichit le chart avec un cache vide et retourne la durée (secondes)."""
+    async with DeezerGenreEnricher(
+        max_concurrency=max_concurrency,
+        transport=make_fake_deezer_transport(latency),
+        cache=TieredCache([MemoryCacheTier()], ttl=60, negative_ttl=60),
+        rate_limiter=None,
+    ) as enricher:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            await transform_deezer_chart_async(chart, enricher)
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare l'enrichissement séquentiel et parallèle (hors réseau).")
+    parser.add_argument("--tracks", type=int, default=100)
+    parser.add_argument("--albums", type=int, default=80)
+    parser.add_argument("--latency", type=float, default=0.05, help="Latence simulée par requête (s)")
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    chart = make_fake_chart(args.tracks, args.albums)
+    sequential = asyncio.run(_run(chart, 1, args.latency))
+    concurrent = asyncio.run(_run(chart, args.concurrency, args.latency))
+
+    print(f"Séquentiel (1 requête à la fois) : {sequential * 1000:.0f} ms")
+    print(f"Parallèle ({args.concurrency} requêtes max)     : {concurrent * 1000:.0f} ms")
+    print(f"Gain : x{sequential / concurrent:.1f}")
+
+
+if __name__ == "__main__":
+    main()
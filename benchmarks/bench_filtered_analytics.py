@@ -0,0 +1,80 @@
+import argparse
+import contextlib
+import io
+from typing import Any, Dict
+
+import pandas as pd
+
+from benchmarks.common import peak_rss_mb, time_call, write_results
+from benchmarks.synthetic_spotify import SIZES, get_synthetic_dataset
+from src.extractors.extractor_spotify import extract_spotify_data
+from src.transformers.spotify_analytics import compute_spotify_analytics
+from src.transformers.spotify_index import SpotifyFilters, build_spotify_index
+from src.transformers.transformer_spotify import compute_filtered_spotify_analytics, summarize_spotify_analytics
+
+# Requêtes mesurées : du filtre très sélectif (un artiste) au filtre large (un genre)
+QUERIES = {
+    "artist": SpotifyFilters(artist=("Coldplay",)),
+    "genre_decade": SpotifyFilters(genre=("rock",), year_min=2010, year_max=2019),
+    "subgenre": SpotifyFilters(subgenre=("classic rock", "hard rock")),
+    "genre": SpotifyFilters(genre=("pop",)),
+}
+
+
+def boolean_mask_analytics(df: pd.DataFrame, filters: SpotifyFilters):
+    """Chemin sans index : masque booléen sur le DataFrame complet à chaque requête."""
+    years = df["release_year"]
+    mask = pd.Series(True, index=df.index)
+    for name, column in (
+        ("genre", "playlist_genre"), ("subgenre", "playlist_subgenre"),
+        ("artist", "track_artist"), ("playlist", "playlist_name"),
+    ):
+        if getattr(filters, name):
+            mask &= df[column].isin(getattr(filters, name))
+    if filters.year_min is not None:
+        mask &= years >= filters.year_min
+    if filters.year_max is not None:
+        mask &= years <= filters.year_max
+    return compute_spotify_analytics(df[mask.to_numpy(dtype=bool)])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Analyses filtrées : index secondaires contre masque booléen.")
+    parser.add_argument("--size", choices=sorted(SIZES), default="1m")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = extract_spotify_data(str(get_synthetic_dataset(args.size)))
+    print(f"Dataset : {len(df)} lignes")
+
+    results: Dict[str, Any] = {"rows": len(df), "build_index": time_call(lambda: build_spotify_index(df), 1, 0)}
+    index = build_spotify_index(df)
+    print(f"Construction des index : {results['build_index']['min_ms']:.1f} ms")
+
+    # Années converties une fois pour le dataset (comme à la conversion Parquet), communes aux deux chemins
+    df = df.assign(release_year=index.data.years)
+
+    for name, filters in QUERIES.items():
+        indexed = summarize_spotify_analytics(compute_filtered_spotify_analytics(index, filters))
+        masked = summarize_spotify_analytics(boolean_mask_analytics(df, filters))
+        if indexed != masked:
+            raise AssertionError(f"Résultats différents pour '{name}'")
+
+        results[name] = {
+            "matching_rows": indexed["total_tracks_analyzed"],
+            "boolean_mask": time_call(lambda: boolean_mask_analytics(df, filters), args.repeat),
+            "secondary_index": time_call(lambda: compute_filtered_spotify_analytics(index, filters), args.repeat),
+        }
+        run = results[name]
+        print(
+            f"{name:<13} {run['matching_rows']:>9} lignes | masque {run['boolean_mask']['median_ms']:>9.1f} ms"
+            f" | index {run['secondary_index']['median_ms']:>9.1f} ms"
+        )
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    write_results(f"filtered-analytics-{args.size}", results)
+
+
+if __name__ == "__main__":
+    main()
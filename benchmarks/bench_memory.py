@@ -0,0 +1,57 @@
+import argparse
+from typing import Any, Dict
+
+import pandas as pd
+
+from benchmarks.common import peak_rss_mb, write_results
+from benchmarks.synthetic_spotify import SIZES, get_synthetic_dataset
+from src.loaders.loader_spotify import URL_DROP, URL_INTERN, compact_spotify_frame, memory_usage_mb
+
+
+def bench_memory(csv_path: str) -> Dict[str, Any]:
+    """Compare la mémoire (memory_usage(deep=True)) du DataFrame brut et des DataFrames compacts."""
+    raw = pd.read_csv(csv_path)
+    compact = compact_spotify_frame(raw, URL_INTERN)
+    without_urls = compact_spotify_frame(compact, URL_DROP)
+
+    raw_columns = raw.memory_usage(deep=True, index=False)
+    compact_columns = compact.memory_usage(deep=True, index=False)
+    return {
+        "raw_mb": memory_usage_mb(raw),
+        "compact_mb": memory_usage_mb(compact),
+        "compact_without_urls_mb": memory_usage_mb(without_urls),
+        "columns": {
+            column: {
+                "raw_dtype": str(raw[column].dtype),
+                "compact_dtype": str(compact[column].dtype),
+                "raw_mb": round(raw_columns[column] / 1024 ** 2, 3),
+                "compact_mb": round(compact_columns[column] / 1024 ** 2, 3),
+            }
+            for column in raw.columns
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Empreinte mémoire des DataFrames Spotify, brut et compact.")
+    parser.add_argument("--size", choices=sorted(SIZES), default="10k", help="Taille du dataset synthétique")
+    args = parser.parse_args()
+
+    results = {"size": args.size, "rows": SIZES[args.size], **bench_memory(str(get_synthetic_dataset(args.size)))}
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    for column, usage in results["columns"].items():
+        print(
+            f"{column:<26} {usage['raw_dtype']:>10} -> {usage['compact_dtype'][:16]:<16}"
+            f" {usage['raw_mb']:>10.2f} Mo -> {usage['compact_mb']:>10.2f} Mo"
+        )
+    print(
+        f"Total : {results['raw_mb']} Mo -> {results['compact_mb']} Mo"
+        f" ({results['compact_without_urls_mb']} Mo sans les URLs)"
+    )
+
+    write_results(f"memory-{args.size}", results)
+
+
+if __name__ == "__main__":
+    main()
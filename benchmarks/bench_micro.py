@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+from typing import Any, Dict
+from unittest import mock
+
+from benchmarks.common import peak_rss_mb, time_call, write_results
+from benchmarks.fake_deezer import FakeDeezerServer, make_fake_chart, make_fake_deezer_transport
+from benchmarks.synthetic_spotify import SIZES, get_synthetic_dataset
+from src.cache.tiered_cache import MemoryCacheTier, TieredCache
+from src.extractors.deezer_client import DeezerClient
+from src.extractors.extractor_spotify import extract_spotify_data
+from src.loaders.loader_spotify import get_processed_path, load_spotify_csv
+from src.transformers import transformer_deezer_chart, transformer_spotify
+from src.transformers.deezer_genre_enricher import DeezerGenreEnricher
+from src.transformers.spotify_analytics import compute_spotify_analytics
+
+
+def bench_extract(csv_path: str, repeat: int) -> Dict[str, Any]:
+    """Mesure la lecture CSV, la lecture Parquet et la lecture d'une projection de colonnes."""
+    # Le Parquet est prioritaire s'il existe : on le supprime pour mesurer le CSV
+    get_processed_path(csv_path).unlink(missing_ok=True)
+    results = {"csv": time_call(lambda: extract_spotify_data(csv_path), repeat)}
+
+    load_spotify_csv(csv_path)
+    results["parquet"] = time_call(lambda: extract_spotify_data(csv_path), repeat)
+    results["parquet_projection"] = time_call(
+        lambda: extract_spotify_data(csv_path, ["playlist_genre", "track_popularity"]), repeat
+    )
+    return results
+
+
+def bench_transformers(csv_path: str, repeat: int) -> Dict[str, Any]:
+    """Mesure chaque transformation Spotify sur le DataFrame déjà chargé."""
+    df = extract_spotify_data(csv_path)
+    functions = {
+        "compute_spotify_analytics": compute_spotify_analytics,
+        "build_genre_popularity_table": transformer_spotify.build_genre_popularity_table,
+        "get_top_genres_by_popularity": transformer_spotify.get_top_genres_by_popularity,
+        "compute_duration_popularity_correlation": transformer_spotify.compute_duration_popularity_correlation,
+        "build_decade_popularity_table": transformer_spotify.build_decade_popularity_table,
+        "get_top_decades_by_popularity": transformer_spotify.get_top_decades_by_popularity,
+    }
+    return {name: time_call(lambda function=function: function(df), repeat) for name, function in functions.items()}
+
+
+def bench_deezer_chart(tracks: int, albums: int, latency: float, repeat: int) -> Dict[str, Any]:
+    """Mesure la transformation du chart Deezer (cache vide) sur un faux serveur, sans limite de débit."""
+    chart = make_fake_chart(tracks, albums)
+
+    def run_sync(client: DeezerClient) -> None:
+        cache = TieredCache([MemoryCacheTier()], ttl=60, negative_ttl=60)
+        with mock.patch.object(transformer_deezer_chart, "deezer_genre_cache", cache), \
+                mock.patch.object(transformer_deezer_chart, "deezer_client", client):
+            transformer_deezer_chart.transform_deezer_chart(chart)
+
+    async def enrich() -> None:
+        async with DeezerGenreEnricher(
+            transport=make_fake_deezer_transport(latency),
+            cache=TieredCache([MemoryCacheTier()], ttl=60, negative_ttl=60),
+            rate_limiter=None,
+        ) as enricher:
+            await transformer_deezer_chart.transform_deezer_chart_async(chart, enricher)
+
+    with FakeDeezerServer(latency=latency) as server:
+        client = DeezerClient(base_url=server.url, rate_limiter=None, circuit_breaker=None)
+        sync_timing = time_call(lambda: run_sync(client), repeat)
+        client.close()
+
+    return {
+        "transform_deezer_chart": sync_timing,
+        "transform_deezer_chart_async": time_call(lambda: asyncio.run(enrich()), repeat),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks de l'extraction et des transformations.")
+    parser.add_argument("--size", choices=sorted(SIZES), default="10k", help="Taille du dataset synthétique")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tracks", type=int, default=100, help="Tracks du faux chart Deezer")
+    parser.add_argument("--albums", type=int, default=80, help="Albums distincts du faux chart Deezer")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence simulée par requête Deezer (s)")
+    args = parser.parse_args()
+
+    csv_path = str(get_synthetic_dataset(args.size))
+    results = {
+        "size": args.size,
+        "rows": SIZES[args.size],
+        "extract_spotify_data": bench_extract(csv_path, args.repeat),
+        "transformer_spotify": bench_transformers(csv_path, args.repeat),
+        "deezer_chart": bench_deezer_chart(args.tracks, args.albums, args.latency, args.repeat),
+    }
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    for group in ("extract_spotify_data", "transformer_spotify", "deezer_chart"):
+        for name, timing in results[group].items():
+            print(f"{name:<42} médiane {timing['median_ms']:>10.2f} ms | min {timing['min_ms']:>10.2f} ms")
+    print(f"Pic RSS : {results['peak_rss_mb']} Mo")
+
+    write_results(f"micro-{args.size}", results)
+
+
+if __name__ == "__main__":
+    main()
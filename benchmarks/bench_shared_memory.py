@@ -0,0 +1,95 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import write_results
+from benchmarks.synthetic_spotify import SIZES, get_synthetic_dataset
+from src.loaders.loader_spotify import ARROW_FORMAT, PARQUET_FORMAT, load_spotify_csv, publish_spotify_arrow
+
+
+def _memory_mb(pid: int) -> Dict[str, float]:
+    """Mémoire d'un processus (Linux, /proc/<pid>/smaps_rollup) : RSS, PSS et pages privées."""
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        fields[name] = int(value.split()[0]) / 1024
+    return {
+        "rss_mb": round(fields["Rss"], 1),
+        "pss_mb": round(fields["Pss"], 1),
+        "private_mb": round(fields["Private_Clean"] + fields["Private_Dirty"], 1),
+    }
+
+
+def _child(file_path: str) -> None:
+    """Charge le dataset comme un worker de l'API, signale qu'il est prêt puis attend."""
+    from src.extractors.extractor_spotify import extract_spotify_data
+
+    start = time.perf_counter()
+    df = extract_spotify_data(file_path)
+    print(f"{time.perf_counter() - start:.3f} {len(df)}", flush=True)
+    sys.stdin.read()
+
+
+def run_workers(file_path: str, storage_format: str, workers: int) -> Dict[str, Any]:
+    """Lance `workers` processus qui chargent le même dataset et mesure leur mémoire une fois chargés."""
+    env = {**os.environ, "SPOTIFY_STORAGE_FORMAT": storage_format, "OPENSOUND_LOG_LEVEL": "WARNING"}
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.bench_shared_memory", "--child", file_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            env=env,
+        )
+        for _ in range(workers)
+    ]
+    try:
+        load_seconds = [float(process.stdout.readline().split()[0]) for process in processes]
+        memory = [_memory_mb(process.pid) for process in processes]
+    finally:
+        for process in processes:
+            process.communicate("")
+
+    return {
+        "workers": workers,
+        "load_s": load_seconds,
+        "per_worker": memory,
+        "total_pss_mb": round(sum(usage["pss_mb"] for usage in memory), 1),
+        "total_private_mb": round(sum(usage["private_mb"] for usage in memory), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mémoire de N workers chargeant le même dataset (Parquet vs Arrow projeté).")
+    parser.add_argument("--size", choices=sorted(SIZES), default="1m", help="Taille du dataset synthétique")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--child", metavar="FILE", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child)
+        return
+
+    csv_path = str(get_synthetic_dataset(args.size))
+    # Fichiers préparés à l'avance : seule la lecture par les workers est mesurée
+    load_spotify_csv(csv_path)
+    publish_spotify_arrow(csv_path)
+
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    for storage_format in (PARQUET_FORMAT, ARROW_FORMAT):
+        results[storage_format] = [run_workers(csv_path, storage_format, workers) for workers in args.workers]
+        for run in results[storage_format]:
+            print(
+                f"{storage_format:<8} {run['workers']:>2} workers | PSS total {run['total_pss_mb']:>8.1f} Mo"
+                f" | privé total {run['total_private_mb']:>8.1f} Mo | chargement max {max(run['load_s']):.2f} s"
+            )
+
+    write_results(f"shared-memory-{args.size}", {"size": args.size, "rows": SIZES[args.size], "formats": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import contextlib
+import io
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import peak_rss_mb, time_call, write_results
+from benchmarks.synthetic_spotify import SIZES, get_synthetic_dataset
+from src.extractors.extractor_spotify import extract_spotify_data
+from src.transformers.spotify_similarity import SIMILARITY_FEATURES, build_similarity_index, find_similar_tracks
+
+
+def standardize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Préparation du chemin pandas (une fois) : mêmes lignes et même standardisation que l'index."""
+    frame = df.dropna(subset=list(SIMILARITY_FEATURES)).drop_duplicates("track_id").set_index("track_id")
+    features = frame[list(SIMILARITY_FEATURES)].astype("float64")
+    return (features - features.mean()) / features.std(ddof=0)
+
+
+def pandas_similar(standardized: pd.DataFrame, track_id: str, k: int) -> pd.Series:
+    """Chemin brute-force : distance du morceau à toutes les lignes du DataFrame, puis nsmallest."""
+    seed = standardized.loc[track_id]
+    distances = ((standardized - seed) ** 2).sum(axis=1) ** 0.5
+    return distances.drop(track_id).nsmallest(k)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Morceaux similaires : matrice float32 par blocs contre pandas.")
+    parser.add_argument("--size", choices=sorted(SIZES), default="1m")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seeds", type=int, default=100, help="Morceaux de départ de la requête groupée")
+    parser.add_argument("--pandas-seeds", type=int, default=5, help="Départs mesurés sur le chemin pandas")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = extract_spotify_data(str(get_synthetic_dataset(args.size)))
+    print(f"Dataset : {len(df)} lignes")
+
+    results: Dict[str, Any] = {"rows": len(df), "k": args.k}
+    results["build_index"] = time_call(lambda: build_similarity_index(df), 1, 0)
+    index = build_similarity_index(df)
+    standardized = standardize_frame(df)
+    print(f"Construction de la matrice : {results['build_index']['min_ms']:.1f} ms ({len(index)} morceaux)")
+
+    seeds = list(index.tracks["track_id"].sample(args.seeds, random_state=0).astype(object))
+
+    # Mêmes distances sur les deux chemins (les ex aequo peuvent être départagés autrement)
+    for track_id in seeds[:args.pandas_seeds]:
+        expected = pandas_similar(standardized, track_id, args.k).to_numpy()
+        found = [track["distance"] for track in find_similar_tracks(index, [track_id], args.k)["tracks"][track_id]["similar_tracks"]]
+        if not np.allclose(expected, found, atol=1e-3):
+            raise AssertionError(f"Distances différentes pour '{track_id}'")
+
+    results["single"] = {
+        "pandas": time_call(lambda: pandas_similar(standardized, seeds[0], args.k), args.repeat),
+        "index": time_call(lambda: find_similar_tracks(index, [seeds[0]], args.k), args.repeat),
+    }
+    results["batch"] = {
+        "seeds": args.seeds,
+        "pandas_per_seed": time_call(
+            lambda: [pandas_similar(standardized, seed, args.k) for seed in seeds[:args.pandas_seeds]], 1, 0
+        ),
+        "index_per_seed": time_call(lambda: [find_similar_tracks(index, [seed], args.k) for seed in seeds], 1, 0),
+        "index_batched": time_call(lambda: find_similar_tracks(index, seeds, args.k), args.repeat),
+    }
+    # Temps pandas mesuré sur quelques départs, ramené au nombre de départs de la requête groupée
+    results["batch"]["pandas_estimated_ms"] = round(
+        results["batch"]["pandas_per_seed"]["min_ms"] / args.pandas_seeds * args.seeds, 1
+    )
+
+    single, batch = results["single"], results["batch"]
+    print(f"1 départ      | pandas {single['pandas']['median_ms']:>9.1f} ms | index {single['index']['median_ms']:>9.1f} ms")
+    print(
+        f"{args.seeds} départs | pandas ~{batch['pandas_estimated_ms']:>9.1f} ms"
+        f" | index un par un {batch['index_per_seed']['min_ms']:>9.1f} ms"
+        f" | index groupé {batch['index_batched']['median_ms']:>9.1f} ms"
+    )
+
+    results["matrix_mb"] = round((index.features.nbytes + index.norms.nbytes) / 1024 ** 2, 1)
+    results["peak_rss_mb"] = peak_rss_mb()
+    write_results(f"similarity-{args.size}", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import pandas as pd
+
+from src.extractors.extractor_spotify import extract_spotify_data
+from src.transformers.spotify_analytics import compute_spotify_analytics
+
+
+def legacy_three_endpoints(df: pd.DataFrame) -> None:
+    """Ancien chemin : chaque endpoint copie et nettoie le DataFrame de son côté."""
+    # /spotify/top-genres
+    df_clean = df.copy().drop_duplicates().dropna()
+    popularity_by_genre = df_clean.groupby("playlist_genre", observed=True)["track_popularity"].mean()
+    popularity_by_genre.sort_values(ascending=False).sort_values(ascending=False).head(3)
+
+    # /spotify/duration-popularity-correlation
+    df_corr = df[["duration_ms", "track_popularity"]].dropna()
+    df_corr = df_corr.assign(duration_min=df_corr["duration_ms"] / 60000)
+    df_corr[["duration_min", "track_popularity"]].corr().iloc[0, 1]
+
+    # /spotify/top-decades
+    df_dec = df[["track_album_release_date", "track_popularity"]].dropna()
+    df_dec = df_dec.assign(release_year=pd.to_datetime(df_dec["track_album_release_date"], errors="coerce").dt.year)
+    df_dec = df_dec.dropna(subset=["release_year"])
+    df_dec = df_dec.assign(decade=(df_dec["release_year"] // 10) * 10)
+    df_dec.groupby("decade")["track_popularity"].mean().sort_values(ascending=False).head(3)
+
+
+def single_pass_engine(df: pd.DataFrame) -> None:
+    """Nouveau chemin : un seul nettoyage et les trois analyses en une passe."""
+    analytics = compute_spotify_analytics(df)
+    analytics.genre_popularity_table().head(3)
+    analytics.duration_popularity_correlation()
+    analytics.decade_popularity_table().head(3)
+
+
+def measure(function: Callable[[pd.DataFrame], None], df: pd.DataFrame, repeat: int) -> Tuple[float, float]:
+    """Retourne (meilleur temps en ms, pic d'allocation en Mo)."""
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function(df)
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        function(df)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return min(timings) * 1000, peak / 1024 ** 2
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare l'ancien nettoyage par endpoint et le moteur en une passe.")
+    parser.add_argument("--file", default="data/raw/low_popularity_spotify_data.csv")
+    parser.add_argument("--scale", type=int, default=20, help="Nombre de copies concaténées du dataset")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = extract_spotify_data(args.file)
+    # Copies avec des track_id distincts pour ne pas créer de doublons artificiels
+    df = pd.concat([df.assign(track_id=df["track_id"] + f"-{i}") for i in range(args.scale)], ignore_index=True)
+    print(f"Dataset : {len(df)} lignes, {df.shape[1]} colonnes")
+
+    for name, function in [("Ancien (3 endpoints)", legacy_three_endpoints), ("Moteur en une passe", single_pass_engine)]:
+        elapsed, peak = measure(function, df, args.repeat)
+        print(f"{name:<22} : {elapsed:8.1f} ms | pic d'allocation {peak:8.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+from benchmarks.common import write_results
+from benchmarks.synthetic_spotify import SIZES, SYNTHETIC_DIR, get_synthetic_dataset
+
+
+def run_child(args: List[str], env: Dict[str, str]) -> Dict[str, Any]:
+    """Lance un processus neuf (benchmarks.startup_child) et retourne sa mesure (dernière ligne, JSON)."""
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup_child", *args],
+        env={**os.environ, **env},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(samples: List[Dict[str, Any]], key: str) -> Dict[str, float]:
+    """Min et médiane d'une mesure sur plusieurs processus."""
+    values = [sample[key] for sample in samples]
+    return {"min_ms": round(min(values), 1), "median_ms": round(statistics.median(values), 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Temps d'import et démarrage à froid de l'API (préchauffage ou non).")
+    parser.add_argument("--size", choices=sorted(SIZES), default="1m", help="Taille du dataset synthétique")
+    parser.add_argument("--repeat", type=int, default=5, help="Processus lancés par mesure")
+    args = parser.parse_args()
+
+    get_synthetic_dataset(args.size)
+    dataset = f"synthetic_{args.size}"
+    endpoint = f"/spotify/top-genres?dataset={dataset}"
+    env = {
+        "SPOTIFY_RAW_DIR": str(SYNTHETIC_DIR),
+        "SPOTIFY_PROCESSED_DIR": str(SYNTHETIC_DIR.parent / "processed"),
+        "OPENSOUND_LOG_LEVEL": "ERROR",
+        # Pas d'appel réseau : seul le préchauffage des datasets est mesuré
+        "OPENSOUND_WARMUP_DEEZER": "0",
+    }
+
+    imports = [run_child(["import"], env) for _ in range(args.repeat)]
+    loaded = sorted({name for sample in imports for name in sample["loaded"]})
+    results: Dict[str, Any] = {
+        "import": {**summarize(imports, "import_ms"), "heavy_modules_loaded": loaded},
+    }
+    print(f"Import de app.main : {results['import']['median_ms']:.1f} ms (médiane) | modules lourds : {loaded or 'aucun'}")
+
+    for label, datasets in (("warmup", dataset), ("no_warmup", "")):
+        samples = [
+            run_child(["cold-start", endpoint], {**env, "OPENSOUND_WARMUP_DATASETS": datasets})
+            for _ in range(args.repeat)
+        ]
+        results[label] = {key: summarize(samples, key) for key in samples[0]}
+        medians = {key: value["median_ms"] for key, value in results[label].items()}
+        print(
+            f"{label:<10} | /health {medians['health_ms']:>8.1f} ms | /ready {medians['ready_ms']:>8.1f} ms"
+            f" | première requête {medians['first_request_ms']:>8.1f} ms"
+            f" (réponse à {medians['first_response_ms']:>8.1f} ms du lancement)"
+        )
+
+    write_results(f"startup-{args.size}", {"size": args.size, "rows": SIZES[args.size], "repeat": args.repeat, **results})
+
+
+if __name__ == "__main__":
+    main()
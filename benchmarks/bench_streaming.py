@@ -0,0 +1,74 @@
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic_spotify import write_synthetic_spotify_csv
+
+
+def _run_in_subprocess(mode: str, file_path: str, chunksize: int) -> str:
+    """Exécute une analyse dans un processus neuf pour mesurer son pic de RSS."""
+    return subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_streaming", "--child", mode, file_path, "--chunksize", str(chunksize)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def _child(mode: str, file_path: str, chunksize: int) -> None:
+    """Analyse le fichier puis affiche la durée, le pic de RSS et l'empreinte du résultat."""
+    from src.extractors.extractor_spotify import extract_spotify_data
+    from src.transformers.spotify_analytics import compute_spotify_analytics, compute_spotify_analytics_streaming
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == "streaming":
+            analytics = compute_spotify_analytics_streaming(file_path, chunksize)
+        else:
+            analytics = compute_spotify_analytics(extract_spotify_data(file_path))
+    elapsed = time.perf_counter() - start
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    fingerprint = hashlib.sha1(
+        f"{analytics.genre_table.to_json()}|{analytics.decade_table.to_json()}|{analytics.correlation}".encode()
+    ).hexdigest()
+    print(f"{elapsed:.1f} {peak_mb:.0f} {fingerprint}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mémoire et exactitude du mode streaming sur des CSV synthétiques.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 3_000_000])
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--in-memory", action="store_true", help="Mesure aussi le chargement complet (comparaison)")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child[0], args.child[1], args.chunksize)
+        return
+
+    modes = ["streaming", "in-memory"] if args.in_memory else ["streaming"]
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            file_path = os.path.join(directory, f"spotify_{rows}.csv")
+            write_synthetic_spotify_csv(file_path, rows)
+            size_mb = os.path.getsize(file_path) / 1024 ** 2
+
+            fingerprints = set()
+            for mode in modes:
+                elapsed, peak_mb, fingerprint = _run_in_subprocess(mode, file_path, args.chunksize).split()
+                fingerprints.add(fingerprint)
+                print(f"{rows:>10} lignes ({size_mb:6.0f} Mo) | {mode:<10} | {elapsed:>6} s | pic RSS {peak_mb:>6} Mo")
+            if len(modes) > 1:
+                print(f"{'':>10} résultats identiques : {len(fingerprints) == 1}")
+
+
+if __name__ == "__main__":
+    main()
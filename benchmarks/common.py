@@ -0,0 +1,90 @@
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+RESULTS_DIR = Path("benchmarks/results")
+
+
+def time_call(function: Callable[[], Any], repeat: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """
+    Mesure la durée d'un appel.
+
+    Returns:
+        Dict avec min, médiane, moyenne et max en millisecondes
+    """
+    for _ in range(warmup):
+        function()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "repeat": repeat,
+    }
+
+
+def latency_percentiles(latencies_ms: List[float]) -> Dict[str, float]:
+    """Retourne p50 / p95 / p99 / max d'une liste de latences (ms)."""
+    values = np.asarray(latencies_ms)
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus (Mo)."""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def write_results(name: str, results: Dict[str, Any]) -> Path:
+    """
+    Écrit les résultats d'un benchmark en JSON, avec le contexte d'exécution.
+
+    Returns:
+        Chemin du fichier benchmarks/results/<name>-<horodatage>.json
+    """
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now(timezone.utc)
+    payload = {
+        "benchmark": name,
+        "timestamp": timestamp.isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    path = RESULTS_DIR / f"{name}-{timestamp.strftime('%Y%m%dT%H%M%S')}.json"
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False))
+    print(f"💾 Résultats écrits dans {path}")
+    return path
+
+
+def _git_commit() -> str:
+    """Retourne le commit courant (ou 'unknown' hors dépôt git)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
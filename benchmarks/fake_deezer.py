@@ -0,0 +1,194 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+# Genres Deezer fictifs utilisés par le faux serveur
+FAKE_GENRES = {132: "Pop", 116: "Rap/Hip Hop", 152: "Rock", 113: "Dance", 165: "R&B"}
+
+# Réponse de Deezer quand le quota est dépassé (statut HTTP 200)
+QUOTA_ERROR = {"error": {"type": "Exception", "message": "Quota limit exceeded", "code": 4}}
+
+
+def make_fake_chart(n_tracks: int = 10, n_albums: int = 8) -> Dict[str, Any]:
+    """
+    Construit une réponse /chart factice au format de l'API Deezer.
+
+    Args:
+        n_tracks: Nombre de tracks du chart
+        n_albums: Nombre d'albums distincts (plusieurs tracks peuvent partager un album)
+
+    Returns:
+        Dict au format de https://api.deezer.com/chart
+    """
+    tracks = [
+        {
+            "id": 3000 + i,
+            "title": f"Track {i}",
+            "explicit_lyrics": i % 3 == 0,
+            "artist": {"name": f"Artist {i}", "picture": f"https://api.deezer.com/artist/{i}/image"},
+            "album": {"id": 1000 + i % n_albums},
+        }
+        for i in range(n_tracks)
+    ]
+    return {"tracks": {"data": tracks, "total": n_tracks}}
+
+
+def make_fake_deezer_transport(latency: float = 0.05) -> httpx.MockTransport:
+    """
+    Crée un transport httpx simulant les endpoints /chart, /album/{id}, /genre et /genre/{id} de Deezer.
+
+    Args:
+        latency: Latence simulée (secondes) de chaque requête
+
+    Returns:
+        httpx.MockTransport utilisable par DeezerGenreEnricher
+    """
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        status_code, payload = _fake_response(request.url.path, dict(request.url.params))
+        return httpx.Response(status_code, json=payload)
+
+    return httpx.MockTransport(handler)
+
+
+class FakeDeezerServer:
+    """
+    Faux serveur HTTP Deezer local (/chart, /album/{id}, /genre/{id}), dans un thread.
+
+    Permet de tester les clients réels (pool de connexions, timeouts, quota,
+    nouvelles tentatives, disjoncteur) sans réseau, en simulant les pannes :
+
+        with FakeDeezerServer(quota_every=5) as server:
+            client = DeezerClient(base_url=server.url)
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        quota_every: int = 0,
+        server_errors: int = 0,
+        hang: float = 0.0,
+        chart: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            latency: Latence (secondes) de chaque réponse
+            quota_every: Une requête sur N reçoit l'erreur de quota Deezer (HTTP 200, code 4), 0 : jamais
+            server_errors: Nombre de premières requêtes en erreur HTTP 500
+            hang: Délai (secondes) avant chaque réponse, pour provoquer des timeouts
+            chart: Réponse de /chart (par défaut make_fake_chart())
+        """
+        self.latency = latency
+        self.quota_every = quota_every
+        self.server_errors = server_errors
+        self.hang = hang
+        self.chart = chart if chart is not None else make_fake_chart()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL de base du serveur (à passer en base_url aux clients Deezer)."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeDeezerServer":
+        """Démarre le serveur dans un thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Arrête le serveur."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeDeezerServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _respond(self, path: str, params: Dict[str, str]) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Réponse à une requête, selon les pannes simulées."""
+        with self._lock:
+            self.requests += 1
+            number = self.requests
+        time.sleep(self.latency + self.hang)
+        if number <= self.server_errors:
+            return 500, {"error": "internal"}
+        if self.quota_every and number % self.quota_every == 0:
+            return 200, QUOTA_ERROR
+        return _fake_response(path, params, self.chart)
+
+    def _make_handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # En-têtes et corps sont écrits séparément : sans Nagle, pas d'attente de l'ACK différé
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                url = urlsplit(self.path)
+                status_code, payload = server._respond(url.path, dict(parse_qsl(url.query)))
+                body = json.dumps(payload).encode()
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
+
+
+def _fake_response(
+    path: str,
+    params: Optional[Dict[str, str]] = None,
+    chart: Optional[Dict[str, Any]] = None,
+) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """Retourne (code HTTP, corps JSON) du faux serveur pour un chemin d'API et ses paramètres."""
+    params = params or {}
+    chart = chart if chart is not None else make_fake_chart()
+    if path == "/chart":
+        return 200, chart
+
+    # Catégorie paginée du chart : /chart/{id}/tracks?index=0&limit=100
+    chart_page = re.fullmatch(r"/chart/\d+/(\w+)", path)
+    if chart_page:
+        items = chart.get(chart_page.group(1), {}).get("data", [])
+        index = int(params.get("index", 0))
+        limit = int(params.get("limit", 10))
+        return 200, {"data": items[index:index + limit], "total": len(items)}
+
+    if path == "/genre":
+        return 200, {"data": [{"id": genre_id, "name": name} for genre_id, name in FAKE_GENRES.items()]}
+
+    album = re.fullmatch(r"/album/(\d+)", path)
+    if album:
+        genre_ids = list(FAKE_GENRES)
+        genre_id = genre_ids[int(album.group(1)) % len(genre_ids)]
+        return 200, {"genres": {"data": [{"id": genre_id}]}}
+
+    genre = re.fullmatch(r"/genre/(\d+)", path)
+    if genre and int(genre.group(1)) in FAKE_GENRES:
+        return 200, {"name": FAKE_GENRES[int(genre.group(1))]}
+
+    # Ressource inconnue : Deezer répond 200 avec l'erreur 800 ("no data")
+    return 200, {"error": {"type": "DataException", "message": "no data", "code": 800}}
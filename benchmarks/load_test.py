@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+from benchmarks.common import latency_percentiles, peak_rss_mb, write_results
+from benchmarks.fake_deezer import make_fake_chart, make_fake_deezer_transport
+from benchmarks.synthetic_spotify import SIZES, SYNTHETIC_DIR, get_synthetic_dataset
+from src.cache.tiered_cache import MemoryCacheTier, TieredCache
+
+
+def default_endpoints(dataset: str) -> List[str]:
+    """Endpoints interrogés par défaut (chemins relatifs avec query string)."""
+    return [
+        f"/spotify/top-genres?dataset={dataset}&top_n=3",
+        f"/spotify/duration-popularity-correlation?dataset={dataset}",
+        f"/spotify/top-decades?dataset={dataset}&top_n=3",
+        f"/spotify/analytics?dataset={dataset}",
+        "/deezer/chart",
+        "/health",
+    ]
+
+
+async def run_load_test(
+    app: Any,
+    endpoints: List[str],
+    requests_per_endpoint: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    """
+    Envoie des requêtes concurrentes à l'application dans le même processus.
+
+    Chaque endpoint est d'abord appelé une fois à froid (chargement et calcul
+    initial), puis interrogé en boucle par `concurrency` clients simultanés.
+
+    Args:
+        app: Application ASGI
+        endpoints: Chemins à interroger
+        requests_per_endpoint: Nombre de requêtes mesurées par endpoint
+        concurrency: Nombre de clients simultanés
+
+    Returns:
+        Dict des résultats par endpoint (débit, percentiles, erreurs)
+    """
+    transport = httpx.ASGITransport(app=app)
+    results: Dict[str, Any] = {}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        for endpoint in endpoints:
+            start = time.perf_counter()
+            cold = await client.get(endpoint)
+            cold_ms = (time.perf_counter() - start) * 1000
+
+            queue: asyncio.Queue = asyncio.Queue()
+            for _ in range(requests_per_endpoint):
+                queue.put_nowait(endpoint)
+            samples: List[Tuple[float, int]] = []
+
+            async def worker() -> None:
+                while not queue.empty():
+                    path = queue.get_nowait()
+                    request_start = time.perf_counter()
+                    response = await client.get(path)
+                    samples.append(((time.perf_counter() - request_start) * 1000, response.status_code))
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+
+            latencies = [latency for latency, _ in samples]
+            results[endpoint] = {
+                "cold_ms": round(cold_ms, 3),
+                "cold_status": cold.status_code,
+                "requests": len(samples),
+                "errors": sum(1 for _, status in samples if status >= 400),
+                "throughput_rps": round(len(samples) / elapsed, 1),
+                **latency_percentiles(latencies),
+            }
+
+    return results
+
+
+async def run_burst(app: Any, endpoints: List[str], burst: int) -> Dict[str, Any]:
+    """
+    Envoie des rafales de requêtes identiques simultanées, caches vides (pire cas du single-flight).
+
+    Pour chaque endpoint, les caches de réponses et de datasets sont vidés,
+    puis `burst` requêtes identiques partent en même temps : avec la mise en
+    commun, un seul calcul est exécuté pour toute la rafale.
+
+    Args:
+        app: Application ASGI
+        endpoints: Chemins à interroger
+        burst: Nombre de requêtes identiques simultanées
+
+    Returns:
+        Dict des résultats par endpoint (durée, calculs exécutés, requêtes mises en commun)
+    """
+    from app.routers.spotify import dataset_registry
+    from src.cache.response_cache import response_cache
+    from src.scheduling.request_executor import request_executor
+
+    transport = httpx.ASGITransport(app=app)
+    results: Dict[str, Any] = {}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        for endpoint in endpoints:
+            response_cache.clear()
+            dataset_registry.clear()
+            before = request_executor.stats()["requests"]
+            samples: List[Tuple[float, int]] = []
+
+            async def call() -> None:
+                request_start = time.perf_counter()
+                response = await client.get(endpoint)
+                samples.append(((time.perf_counter() - request_start) * 1000, response.status_code))
+
+            start = time.perf_counter()
+            await asyncio.gather(*(call() for _ in range(burst)))
+            elapsed = time.perf_counter() - start
+
+            after = request_executor.stats()["requests"]
+            calls = after["calls"] - before["calls"]
+            coalesced = after["coalesced"] - before["coalesced"]
+            results[endpoint] = {
+                "requests": burst,
+                "errors": sum(1 for _, status in samples if status >= 400),
+                "elapsed_ms": round(elapsed * 1000, 3),
+                "computations": calls - coalesced,
+                "coalesced": coalesced,
+                **latency_percentiles([latency for latency, _ in samples]),
+            }
+
+    return results
+
+
+async def _with_fake_deezer(app: Any, coroutine_factory) -> Dict[str, Any]:
+    """Installe un enrichisseur et un chart Deezer hors réseau, puis exécute le test."""
+    from src.scheduling.deezer_chart_refresher import DeezerChartRefresher
+    from src.transformers.deezer_genre_enricher import DeezerGenreEnricher
+
+    app.state.deezer_enricher = DeezerGenreEnricher(
+        transport=make_fake_deezer_transport(latency=0.0),
+        cache=TieredCache([MemoryCacheTier()], ttl=3600, negative_ttl=3600),
+        rate_limiter=None,
+    )
+    app.state.deezer_chart_refresher = DeezerChartRefresher(
+        app.state.deezer_enricher, extractor=lambda: make_fake_chart(100, 80)
+    )
+    try:
+        return await coroutine_factory()
+    finally:
+        await app.state.deezer_chart_refresher.stop()
+        await app.state.deezer_enricher.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Test de charge des endpoints de l'API, dans le processus.")
+    parser.add_argument("--size", choices=sorted(SIZES), default="10k", help="Taille du dataset synthétique")
+    parser.add_argument("--requests", type=int, default=200, help="Requêtes mesurées par endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--endpoint", action="append", help="Endpoint à interroger (répétable)")
+    parser.add_argument("--burst", type=int, default=0, help="Rafale de N requêtes identiques à froid (0 : test de charge)")
+    args = parser.parse_args()
+
+    get_synthetic_dataset(args.size)
+    # Le catalogue lit ces variables à l'import : à fixer avant d'importer l'application
+    os.environ.setdefault("SPOTIFY_RAW_DIR", str(SYNTHETIC_DIR))
+    os.environ.setdefault("SPOTIFY_PROCESSED_DIR", str(SYNTHETIC_DIR.parent / "processed"))
+    os.environ.setdefault("OPENSOUND_LOG_LEVEL", "WARNING")
+    # Les charts du faux serveur Deezer ne vont pas dans l'historique local
+    os.environ.setdefault("DEEZER_CHART_HISTORY", "0")
+
+    from app.main import app
+    from src.extractors.dataset_catalog import shutdown_loader_pool
+
+    endpoints = args.endpoint or default_endpoints(f"synthetic_{args.size}")
+    try:
+        if args.burst:
+            results = asyncio.run(_with_fake_deezer(app, lambda: run_burst(app, endpoints, args.burst)))
+        else:
+            results = asyncio.run(_with_fake_deezer(
+                app, lambda: run_load_test(app, endpoints, args.requests, args.concurrency)
+            ))
+    finally:
+        shutdown_loader_pool()
+
+    if args.burst:
+        for endpoint, result in results.items():
+            print(
+                f"{endpoint:<62} {result['requests']:>4} requêtes en {result['elapsed_ms']:>9.1f} ms"
+                f" | calculs {result['computations']:>3} | mises en commun {result['coalesced']:>3}"
+                f" | erreurs {result['errors']}"
+            )
+        write_results(f"burst-{args.size}", {"size": args.size, "burst": args.burst, "endpoints": results})
+        return
+
+    for endpoint, result in results.items():
+        print(
+            f"{endpoint:<62} {result['throughput_rps']:>8.1f} req/s | p50 {result['p50_ms']:>8.2f} ms"
+            f" | p95 {result['p95_ms']:>8.2f} ms | p99 {result['p99_ms']:>8.2f} ms | erreurs {result['errors']}"
+        )
+    rss = peak_rss_mb()
+    print(f"Pic RSS : {rss} Mo")
+
+    write_results(f"load-{args.size}", {
+        "size": args.size,
+        "rows": SIZES[args.size],
+        "concurrency": args.concurrency,
+        "requests_per_endpoint": args.requests,
+        "endpoints": results,
+        "peak_rss_mb": rss,
+    })
+
+
+if __name__ == "__main__":
+    main()
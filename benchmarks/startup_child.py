@@ -0,0 +1,47 @@
+import json
+import sys
+import time
+from typing import Dict
+
+# Mesures exécutées dans un processus neuf, sans les imports des autres benchmarks (pandas, NumPy)
+
+# Modules lourds qui ne doivent plus être chargés par l'import de l'application
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "requests")
+
+
+def measure_import() -> Dict[str, object]:
+    """Mesure l'import de l'application et liste les modules lourds chargés."""
+    start = time.perf_counter()
+    import app.main  # noqa: F401
+
+    elapsed = time.perf_counter() - start
+    return {"import_ms": elapsed * 1000, "loaded": [name for name in HEAVY_MODULES if name in sys.modules]}
+
+
+def measure_cold_start(endpoint: str) -> Dict[str, float]:
+    """Mesure l'import, le démarrage (lifespan), la fin du préchauffage, puis la première requête."""
+    start = time.perf_counter()
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    timings = {"import_ms": (time.perf_counter() - start) * 1000}
+    with TestClient(app) as client:
+        client.get("/health").raise_for_status()
+        timings["health_ms"] = (time.perf_counter() - start) * 1000
+        while client.get("/ready").status_code != 200:
+            time.sleep(0.01)
+        timings["ready_ms"] = (time.perf_counter() - start) * 1000
+
+        request_start = time.perf_counter()
+        client.get(endpoint).raise_for_status()
+        timings["first_request_ms"] = (time.perf_counter() - request_start) * 1000
+        timings["first_response_ms"] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+if __name__ == "__main__":
+    if sys.argv[1] == "import":
+        print(json.dumps(measure_import()))
+    else:
+        print(json.dumps(measure_cold_start(sys.argv[2])))
@@ -0,0 +1,103 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TEMPLATE_PATHS = [
+    "data/raw/high_popularity_spotify_data.csv",
+    "data/raw/low_popularity_spotify_data.csv",
+]
+
+# Tailles prédéfinies des datasets synthétiques
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+SYNTHETIC_DIR = Path("benchmarks/data/raw")
+
+
+def write_synthetic_spotify_csv(
+    output_path: str,
+    rows: int,
+    seed: int = 0,
+    block_size: int = 100_000,
+    duplicate_ratio: float = 0.01,
+) -> Path:
+    """
+    Écrit un CSV Spotify synthétique au schéma des fichiers bruts.
+
+    Les lignes sont tirées des CSV réels avec un track_id unique, une
+    popularité et une durée aléatoires ; une fraction de lignes est recopiée
+    à l'identique pour exercer la suppression des doublons. Le fichier est
+    écrit par blocs : la mémoire utilisée ne dépend pas du nombre de lignes.
+
+    Args:
+        output_path: Chemin du CSV à écrire
+        rows: Nombre de lignes
+        seed: Graine aléatoire
+        block_size: Nombre de lignes générées par bloc
+        duplicate_ratio: Proportion de lignes dupliquées
+
+    Returns:
+        Chemin du fichier écrit
+    """
+    rng = np.random.default_rng(seed)
+    template = pd.concat([pd.read_csv(path) for path in TEMPLATE_PATHS], ignore_index=True)
+    columns = list(pd.read_csv(TEMPLATE_PATHS[0], nrows=0).columns)
+    template = template[columns]
+
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    while written < rows:
+        size = min(block_size, rows - written)
+        block = template.iloc[rng.integers(0, len(template), size)].reset_index(drop=True)
+        block["track_id"] = [f"syn{written + i:010d}" for i in range(size)]
+        block["track_popularity"] = rng.integers(0, 101, size)
+        block["duration_ms"] = rng.integers(60_000, 600_000, size)
+
+        duplicates = np.flatnonzero(rng.random(size) < duplicate_ratio)
+        duplicates = duplicates[duplicates > 0]
+        block.iloc[duplicates] = block.iloc[duplicates - 1].to_numpy()
+
+        block.to_csv(path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+        written += size
+
+    return path
+
+
+def get_synthetic_dataset(size: str, seed: int = 0) -> Path:
+    """
+    Retourne le CSV synthétique d'une taille prédéfinie, généré au premier appel.
+
+    Le fichier suit la convention de nommage des CSV bruts
+    (benchmarks/data/raw/synthetic_<taille>_spotify_data.csv) : le dossier peut
+    servir de SPOTIFY_RAW_DIR pour exposer le dataset 'synthetic_<taille>'.
+
+    Args:
+        size: Taille prédéfinie ('10k', '1m' ou '10m')
+        seed: Graine aléatoire utilisée à la génération
+
+    Returns:
+        Chemin du CSV
+    """
+    path = SYNTHETIC_DIR / f"synthetic_{size}_spotify_data.csv"
+    if not path.exists():
+        print(f"⏳ Génération de {path} ({SIZES[size]} lignes)...")
+        write_synthetic_spotify_csv(str(path), SIZES[size], seed)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génère un CSV Spotify synthétique.")
+    parser.add_argument("output", nargs="?", help="Chemin du CSV à écrire (ignoré avec --size)")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--size", choices=sorted(SIZES), help="Taille prédéfinie, écrite dans benchmarks/data/raw")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.size:
+        print(get_synthetic_dataset(args.size, args.seed))
+    elif args.output:
+        write_synthetic_spotify_csv(args.output, args.rows, args.seed)
+    else:
+        parser.error("indiquer un chemin de sortie ou --size")
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional
+
+# Nombre maximal de réponses sérialisées conservées et durée de fraîcheur côté client
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "0"))
+
+
+def make_etag(body: bytes, weak: bool = False) -> str:
+    """
+    Calcule l'ETag d'un contenu (empreinte SHA-256 tronquée).
+
+    Args:
+        body: Contenu de la réponse (ou partie stable de la réponse si weak)
+        weak: ETag faible (W/"...") : contenu équivalent mais pas identique octet par octet
+
+    Returns:
+        ETag entre guillemets, prêt pour l'en-tête HTTP
+    """
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return f"W/{etag}" if weak else etag
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    """Réponse JSON déjà sérialisée et son ETag."""
+
+    body: bytes
+    etag: str
+
+
+class ResponseCache:
+    """
+    Cache LRU de réponses JSON sérialisées.
+
+    La clé contient la version des données (signature des fichiers, date du
+    snapshot) : une nouvelle version est une nouvelle clé, et les anciennes
+    entrées sortent du cache par éviction LRU. Une réponse en cache est
+    renvoyée telle quelle, sans calcul ni validation Pydantic.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        """
+        Args:
+            max_entries: Nombre maximal de réponses conservées
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[CachedBody]:
+        """Retourne la réponse en cache, ou None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, body: bytes, weak: bool = False) -> CachedBody:
+        """Conserve une réponse sérialisée et retourne l'entrée avec son ETag."""
+        entry = CachedBody(body=body, etag=make_etag(body, weak))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def record_not_modified(self) -> None:
+        """Compte une réponse 304 Not Modified."""
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Retourne les statistiques du cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        """Vide le cache et remet les compteurs à zéro."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.not_modified = self.evictions = 0
+
+
+# Cache partagé par les routers
+response_cache = ResponseCache()
@@ -0,0 +1,335 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Valeur retournée quand une clé est absente (None est une valeur cachable)
+MISSING = object()
+
+# Capacité atteinte, un niveau SQLite est ramené à (1 - marge) de sa capacité : le comptage
+# des entrées (parcours de la table) n'a lieu qu'une fois tous les (marge x capacité) ajouts
+SQLITE_EVICTION_HEADROOM = 0.1
+
+
+class CacheTier(ABC):
+    """
+    Niveau de cache : stocke des valeurs JSON avec une date d'expiration.
+
+    Les niveaux concrets implémentent _get, _set, _clear et size.
+    """
+
+    name = "tier"
+    # Accès bloquant (disque) : exécuté hors de la boucle asyncio par TieredCache.aget_many/aset_many
+    blocking = False
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Tuple[Any, float]:
+        """Retourne (valeur, expiration) ou (MISSING, 0) si absente ou expirée."""
+        value, expires_at = self._get(key)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value, expires_at
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        """Stocke une valeur jusqu'à la date d'expiration (timestamp epoch)."""
+        self._set(key, value, expires_at)
+
+    def set_many(self, items: List[Tuple[str, Any, float]]) -> None:
+        """Stocke plusieurs valeurs (clé, valeur, expiration) en une seule écriture si le niveau le permet."""
+        if items:
+            self._set_many(items)
+
+    def clear(self) -> None:
+        """Vide le niveau et remet les compteurs à zéro."""
+        self._clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Retourne les statistiques du niveau."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": self.size()}
+
+    @abstractmethod
+    def size(self) -> int:
+        """Nombre d'entrées stockées."""
+
+    @abstractmethod
+    def _get(self, key: str) -> Tuple[Any, float]:
+        """Retourne (valeur, expiration) ou (MISSING, 0), sans mettre à jour les compteurs."""
+
+    @abstractmethod
+    def _set(self, key: str, value: Any, expires_at: float) -> None:
+        """Stocke une valeur (les évictions éventuelles sont comptées dans evictions)."""
+
+    @abstractmethod
+    def _clear(self) -> None:
+        """Supprime toutes les entrées."""
+
+    def _set_many(self, items: List[Tuple[str, Any, float]]) -> None:
+        """Stocke plusieurs valeurs ; par défaut, une à une."""
+        for key, value, expires_at in items:
+            self._set(key, value, expires_at)
+
+
+class MemoryCacheTier(CacheTier):
+    """Niveau mémoire propre au processus, borné en nombre d'entrées (éviction LRU)."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1000):
+        super().__init__()
+        self._max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def size(self) -> int:
+        return len(self._data)
+
+    def _get(self, key: str) -> Tuple[Any, float]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING, 0
+            if item[1] <= time.time():
+                del self._data[key]
+                return MISSING, 0
+            self._data.move_to_end(key)
+            return item
+
+    def _set(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCacheTier(CacheTier):
+    """
+    Niveau disque SQLite, partagé entre les processus (workers uvicorn) d'une même machine.
+
+    Le nombre d'entrées est borné : capacité atteinte, les entrées expirées puis
+    les plus anciennes sont supprimées, jusqu'à (1 - SQLITE_EVICTION_HEADROOM) de la
+    capacité. Le nombre d'entrées est estimé en mémoire (majoré par les ajouts)
+    et recompté seulement quand l'estimation dépasse la capacité, ou tous les
+    SQLITE_EVICTION_HEADROOM x capacité ajouts pour tenir compte des écritures
+    des autres processus. Un lot de valeurs est écrit en une seule transaction.
+    """
+
+    name = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 50000):
+        super().__init__()
+        self._path = Path(path)
+        self._max_entries = max_entries
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # Entrées estimées (majorant) et ajouts depuis le dernier comptage
+        self._estimated_size = 0
+        self._writes_since_count = 0
+        self._recount_every = max(1, int(max_entries * SQLITE_EVICTION_HEADROOM))
+
+    def _connect(self) -> sqlite3.Connection:
+        """Ouvre la base à la première utilisation (mode WAL pour les accès concurrents)."""
+        if self._connection is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, stored_at REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS cache_stored_at ON cache (stored_at)")
+            self._estimated_size = connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            self._connection = connection
+        return self._connection
+
+    def size(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def _get(self, key: str) -> Tuple[Any, float]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        if row is None:
+            return MISSING, 0
+        return json.loads(row[0]), row[1]
+
+    def _set(self, key: str, value: Any, expires_at: float) -> None:
+        self._set_many([(key, value, expires_at)])
+
+    def _set_many(self, items: List[Tuple[str, Any, float]]) -> None:
+        now = time.time()
+        rows = [(key, json.dumps(value), expires_at, now) for key, value, expires_at in items]
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, stored_at) VALUES (?, ?, ?, ?)", rows
+                )
+                self._estimated_size += len(rows)
+                self._writes_since_count += len(rows)
+                if self._estimated_size > self._max_entries or self._writes_since_count >= self._recount_every:
+                    self._evict(connection, now)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        """Recompte les entrées et, capacité atteinte, supprime les expirées puis les plus anciennes."""
+        count = connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        self._writes_since_count = 0
+        if count >= self._max_entries:
+            target = int(self._max_entries * (1 - SQLITE_EVICTION_HEADROOM))
+            evicted = connection.execute("DELETE FROM cache WHERE expires_at <= ?", (now,)).rowcount
+            overflow = count - evicted - target
+            if overflow > 0:
+                evicted += connection.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY stored_at LIMIT ?)",
+                    (overflow,),
+                ).rowcount
+            self.evictions += evicted
+            count -= evicted
+        self._estimated_size = count
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM cache")
+            self._estimated_size = 0
+            self._writes_since_count = 0
+
+
+class TieredCache:
+    """
+    Cache à plusieurs niveaux (ex: mémoire puis SQLite) avec expiration (TTL).
+
+    Les résultats négatifs (None) sont conservés avec un TTL court pour qu'une
+    erreur passagère ne soit pas mémorisée durablement. Une valeur trouvée dans
+    un niveau inférieur est recopiée dans les niveaux supérieurs.
+    """
+
+    def __init__(self, tiers: List[CacheTier], ttl: float, negative_ttl: float):
+        """
+        Args:
+            tiers: Niveaux de cache, du plus rapide au plus lent
+            ttl: Durée de vie (secondes) d'un résultat trouvé
+            negative_ttl: Durée de vie (secondes) d'un résultat None
+        """
+        self.tiers = tiers
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+    def get(self, key: str) -> Any:
+        """Retourne la valeur en cache ou MISSING."""
+        return self._lookup(key, 0, len(self.tiers))
+
+    def set(self, key: str, value: Any) -> None:
+        """Stocke la valeur dans tous les niveaux (TTL court si la valeur est None)."""
+        self._store({key: value}, self.tiers)
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Version asynchrone de get pour plusieurs clés.
+
+        Les niveaux non bloquants (mémoire) sont lus directement ; les clés
+        restantes sont cherchées dans les niveaux bloquants (SQLite) en un seul
+        appel hors de la boucle asyncio.
+
+        Args:
+            keys: Clés recherchées
+
+        Returns:
+            Dict[str, Any]: {clé: valeur} des clés trouvées (les absentes sont omises)
+        """
+        split = self._blocking_index()
+        found: Dict[str, Any] = {}
+        remaining = []
+        for key in dict.fromkeys(keys):
+            value = self._lookup(key, 0, split)
+            if value is MISSING:
+                remaining.append(key)
+            else:
+                found[key] = value
+        if remaining and split < len(self.tiers):
+            found.update(await asyncio.to_thread(self._lookup_many, remaining, split))
+        return found
+
+    async def aset_many(self, values: Dict[str, Any]) -> None:
+        """
+        Version asynchrone de set pour plusieurs clés.
+
+        Les niveaux non bloquants sont écrits directement, les niveaux
+        bloquants en un seul appel hors de la boucle asyncio.
+
+        Args:
+            values: {clé: valeur} à stocker
+        """
+        if not values:
+            return
+        split = self._blocking_index()
+        self._store(values, self.tiers[:split])
+        if split < len(self.tiers):
+            await asyncio.to_thread(self._store, values, self.tiers[split:])
+
+    def clear(self) -> Dict[str, Dict[str, int]]:
+        """Vide tous les niveaux et retourne leurs statistiques avant vidage."""
+        stats = self.stats()
+        for tier in self.tiers:
+            tier.clear()
+        return stats
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Retourne les statistiques par niveau."""
+        return {tier.name: tier.stats() for tier in self.tiers}
+
+    def _blocking_index(self) -> int:
+        """Indice du premier niveau bloquant (len(tiers) si aucun)."""
+        return next((index for index, tier in enumerate(self.tiers) if tier.blocking), len(self.tiers))
+
+    def _lookup(self, key: str, start: int, stop: int) -> Any:
+        """Cherche la clé dans les niveaux [start, stop) et la recopie dans tous les niveaux supérieurs."""
+        for index in range(start, stop):
+            value, expires_at = self.tiers[index].get(key)
+            if value is not MISSING:
+                for upper_tier in self.tiers[:index]:
+                    upper_tier.set(key, value, expires_at)
+                return value
+        return MISSING
+
+    def _lookup_many(self, keys: List[str], start: int) -> Dict[str, Any]:
+        """Cherche plusieurs clés à partir du niveau start ; retourne celles trouvées."""
+        found = {}
+        for key in keys:
+            value = self._lookup(key, start, len(self.tiers))
+            if value is not MISSING:
+                found[key] = value
+        return found
+
+    def _store(self, values: Dict[str, Any], tiers: List[CacheTier]) -> None:
+        """Stocke les valeurs dans les niveaux donnés (TTL court si la valeur est None)."""
+        now = time.time()
+        items = [
+            (key, value, now + (self.negative_ttl if value is None else self.ttl)) for key, value in values.items()
+        ]
+        for tier in tiers:
+            tier.set_many(items)
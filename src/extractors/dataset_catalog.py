@@ -0,0 +1,248 @@
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.scheduling.request_executor import InstrumentedExecutor
+
+logger = logging.getLogger(__name__)
+
+# Dossiers par défaut des CSV bruts et des fichiers traités
+RAW_DIR = "data/raw"
+PROCESSED_DIR = "data/processed"
+
+# Format des fichiers lus par l'API : 'parquet' (compressé, décodé par chaque processus) ou
+# 'arrow' (Arrow IPC non compressé, projeté en mémoire et partagé entre les workers)
+PARQUET_FORMAT = "parquet"
+ARROW_FORMAT = "arrow"
+SPOTIFY_STORAGE_FORMAT = os.getenv("SPOTIFY_STORAGE_FORMAT", PARQUET_FORMAT)
+
+# Dossiers scannés et nombre de processus de chargement, configurables par variables d'environnement
+SPOTIFY_RAW_DIR = os.getenv("SPOTIFY_RAW_DIR", RAW_DIR)
+SPOTIFY_PROCESSED_DIR = os.getenv("SPOTIFY_PROCESSED_DIR", PROCESSED_DIR)
+SPOTIFY_LOADER_WORKERS = int(os.getenv("SPOTIFY_LOADER_WORKERS", str(os.cpu_count() or 1)))
+
+# Valeur spéciale désignant tous les datasets du catalogue
+ALL_DATASETS = "all"
+
+_loader_pool: Optional[InstrumentedExecutor] = None
+# Protège la création, le remplacement et l'arrêt du pool (préchauffage et requêtes l'appellent en parallèle)
+_loader_pool_lock = threading.Lock()
+# Nombre de pools cassés remplacés depuis le démarrage
+_loader_pool_restarts = 0
+
+
+def dataset_name(path: Path) -> str:
+    """
+    Retourne le nom court d'un dataset à partir de son fichier.
+
+    Exemple : high_popularity_spotify_data.csv -> 'high', spotify_2024_01.csv -> 'spotify_2024_01'
+    """
+    return re.sub(r"(_popularity)?_spotify_data$", "", path.stem)
+
+
+class DatasetCatalog:
+    """
+    Catalogue des datasets Spotify disponibles.
+
+    Tous les CSV du dossier brut sont découverts, ainsi que les fichiers
+    Parquet du dossier traité qui n'ont pas de CSV correspondant. Le dossier
+    est relu à chaque appel : un nouvel export déposé est pris en compte sans
+    redémarrage.
+    """
+
+    def __init__(self, raw_dir: str = SPOTIFY_RAW_DIR, processed_dir: str = SPOTIFY_PROCESSED_DIR):
+        self.raw_dir = Path(raw_dir)
+        self.processed_dir = Path(processed_dir)
+
+    def discover(self) -> Dict[str, str]:
+        """
+        Retourne les datasets disponibles.
+
+        Returns:
+            Dict {nom: chemin}, trié par nom
+        """
+        paths: Dict[str, str] = {}
+        for csv_path in sorted(self.raw_dir.glob("*.csv")):
+            paths[dataset_name(csv_path)] = str(csv_path)
+        for parquet_path in sorted(self.processed_dir.glob("*.parquet")):
+            paths.setdefault(dataset_name(parquet_path), str(parquet_path))
+        return dict(sorted(paths.items()))
+
+    def resolve(self, names: List[str]) -> Dict[str, str]:
+        """
+        Retourne les chemins des datasets demandés ('all' désigne tout le catalogue).
+
+        Args:
+            names: Noms des datasets, ou ['all']
+
+        Returns:
+            Dict {nom: chemin} des datasets demandés, sans doublons
+
+        Raises:
+            KeyError: Si un dataset est inconnu
+        """
+        available = self.discover()
+        if ALL_DATASETS in names:
+            return available
+
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise KeyError(", ".join(unknown))
+        return {name: available[name] for name in dict.fromkeys(names)}
+
+
+class LoaderPool(Executor):
+    """
+    Executor des chargements : délègue au pool de processus courant et le remplace s'il est cassé.
+
+    Un processus du pool qui meurt (mémoire épuisée, crash, échec du
+    lancement) casse tout le ProcessPoolExecutor : ses tâches en cours et
+    toutes les suivantes échouent (BrokenProcessPool). Le pool cassé est alors
+    arrêté et recréé, et chaque tâche touchée est relancée une fois sur le
+    nouveau pool. Si celui-ci casse aussi, la tâche est exécutée dans un
+    thread du processus courant : la requête aboutit, plus lentement.
+    """
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        self._submit(future, fn, args, kwargs, retried=False)
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        shutdown_loader_pool()
+
+    def _submit(self, future: Future, fn: Callable[..., Any], args: Tuple, kwargs: Dict[str, Any], retried: bool) -> None:
+        """Soumet la tâche au pool courant ; son résultat (ou son échec) est reporté sur future."""
+        pool = _get_process_pool()
+        try:
+            task = pool.submit(fn, *args, **kwargs)
+        except (BrokenProcessPool, RuntimeError) as e:
+            # RuntimeError : pool déjà arrêté par un autre thread qui l'a trouvé cassé
+            if not isinstance(e, BrokenProcessPool) and _loader_pool is pool:
+                raise
+            self._recover(future, pool, fn, args, kwargs, retried, e)
+            return
+        task.add_done_callback(lambda done: self._settle(future, done, pool, fn, args, kwargs, retried))
+
+    def _settle(
+        self,
+        future: Future,
+        task: Future,
+        pool: InstrumentedExecutor,
+        fn: Callable[..., Any],
+        args: Tuple,
+        kwargs: Dict[str, Any],
+        retried: bool,
+    ) -> None:
+        """Reporte le résultat d'une tâche terminée, ou la relance si le pool a cassé."""
+        if task.cancelled():
+            future.cancel()
+            return
+        error = task.exception()
+        if isinstance(error, BrokenProcessPool):
+            # Appelé par le thread de gestion du pool cassé : la relance se fait depuis un autre thread
+            threading.Thread(
+                target=self._recover,
+                args=(future, pool, fn, args, kwargs, retried, error),
+                name="opensound-loader-recovery",
+                daemon=True,
+            ).start()
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(task.result())
+
+    def _recover(
+        self,
+        future: Future,
+        pool: InstrumentedExecutor,
+        fn: Callable[..., Any],
+        args: Tuple,
+        kwargs: Dict[str, Any],
+        retried: bool,
+        error: BaseException,
+    ) -> None:
+        """Remplace le pool cassé et relance la tâche une fois, puis dans le thread courant."""
+        _reset_process_pool(pool, error)
+        try:
+            if retried:
+                logger.warning("Pool de processus indisponible, calcul exécuté dans le thread courant")
+                future.set_result(fn(*args, **kwargs))
+            else:
+                self._submit(future, fn, args, kwargs, retried=True)
+        except BaseException as e:
+            future.set_exception(e)
+
+
+# Executor partagé des chargements (le pool de processus est créé à la première tâche)
+_loader_executor = LoaderPool()
+
+
+def get_loader_pool() -> LoaderPool:
+    """
+    Retourne l'executor de chargement, adossé à un pool de processus créé à la première utilisation.
+
+    Les chargements et les calculs lourds (analyses, index) y sont exécutés :
+    ils ne monopolisent ni le GIL ni les threads qui servent les requêtes. Un
+    pool cassé est remplacé (voir LoaderPool).
+    """
+    return _loader_executor
+
+
+def loader_pool_stats() -> Dict[str, int]:
+    """Retourne les compteurs du pool de processus (tous à zéro s'il n'a pas encore été créé) et ses remplacements."""
+    pool = _loader_pool
+    if pool is None:
+        stats = {"workers": SPOTIFY_LOADER_WORKERS, "submitted": 0, "completed": 0, "running": 0, "queued": 0}
+    else:
+        stats = pool.stats()
+    return {**stats, "restarts": _loader_pool_restarts}
+
+
+def shutdown_loader_pool() -> None:
+    """Arrête le pool de processus de chargement s'il a été créé."""
+    global _loader_pool
+    with _loader_pool_lock:
+        if _loader_pool is not None:
+            _loader_pool.shutdown(cancel_futures=True)
+            _loader_pool = None
+
+
+def _get_process_pool() -> InstrumentedExecutor:
+    """Retourne le pool de processus courant, créé à la première utilisation."""
+    global _loader_pool
+    if _loader_pool is None:
+        with _loader_pool_lock:
+            if _loader_pool is None:
+                _loader_pool = _create_process_pool()
+    return _loader_pool
+
+
+def _create_process_pool() -> InstrumentedExecutor:
+    """Crée le pool de processus ('spawn' : les processus n'héritent pas des threads du serveur)."""
+    return InstrumentedExecutor(
+        ProcessPoolExecutor(
+            max_workers=SPOTIFY_LOADER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        ),
+        SPOTIFY_LOADER_WORKERS,
+    )
+
+
+def _reset_process_pool(broken: InstrumentedExecutor, error: BaseException) -> None:
+    """Oublie le pool cassé (le suivant sera créé à la prochaine tâche) ; sans effet s'il a déjà été remplacé."""
+    global _loader_pool, _loader_pool_restarts
+    with _loader_pool_lock:
+        if _loader_pool is not broken:
+            return
+        _loader_pool = None
+        _loader_pool_restarts += 1
+    logger.warning("Pool de processus de chargement cassé, remplacé", extra={"error": str(error)})
+    # Les tâches du pool cassé ont déjà échoué (BrokenProcessPool) : rien à annuler
+    broken.shutdown(wait=False)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+
+@dataclass
+class _DatasetEntry:
+    """Entrée du registre : résultats dérivés et signature du fichier source."""
+
+    signature: Optional[Tuple[int, int]] = None
+    derived: Dict[str, Any] = field(default_factory=dict)
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+
+
+class DatasetRegistry:
+    """
+    Registre partagé des résultats dérivés des datasets Spotify.
+
+    Les résultats dérivés (tables agrégées, index) sont construits depuis le
+    fichier, éventuellement dans des processus séparés, sans garder le
+    DataFrame en mémoire. Ils ne sont recalculés que si la date de
+    modification (mtime) ou la taille du fichier lu change. Les accès sont
+    comptés (hits / misses) par dataset.
+    """
+
+    def __init__(self, paths: Mapping[str, str]):
+        self._paths: Dict[str, str] = dict(paths)
+        self._entries: Dict[Tuple[str, Optional[Tuple[str, ...]]], _DatasetEntry] = {}
+        self._locks: Dict[str, threading.RLock] = {name: threading.RLock() for name in paths}
+        # Résultats dérivés en cours de calcul, par (nom, résultat, signature du fichier)
+        self._flights: Dict[Tuple[str, str, Tuple[int, int]], Future] = {}
+        self._flights_lock = threading.Lock()
+
+    def register(self, name: str, path: str) -> None:
+        """Déclare un dataset (ou met à jour son chemin, ce qui vide ses entrées)."""
+        if self._paths.get(name) == path:
+            return
+        lock = self._locks.setdefault(name, threading.RLock())
+        with lock:
+            self._paths[name] = path
+            for key in [key for key in self._entries if key[0] == name]:
+                del self._entries[key]
+
+    def names(self) -> List[str]:
+        """Retourne les noms des datasets déclarés."""
+        return list(self._paths)
+
+    def get_path(self, name: str) -> str:
+        """Retourne le chemin du fichier associé au dataset (KeyError si inconnu)."""
+        return self._paths[name]
+
+    def get_derived_many(
+        self,
+        names: Sequence[str],
+        key: str,
+        file_builder: Callable[[str], Any],
+        executor: Optional[Executor] = None,
+    ) -> List[Any]:
+        """
+        Retourne un résultat dérivé pour plusieurs datasets, construit directement depuis leurs fichiers.
+
+        Le DataFrame n'est pas conservé : seul le résultat l'est, jusqu'à la
+        prochaine modification du fichier. Les résultats à calculer le sont
+        dans l'executor (ex: pool de processus, en parallèle s'il y en a
+        plusieurs), sinon localement. Un résultat déjà en cours de calcul pour
+        la même version du fichier (requête concurrente) est attendu plutôt que
+        recalculé.
+
+        Args:
+            names: Noms des datasets
+            key: Nom du résultat dérivé
+            file_builder: Fonction (picklable) construisant le résultat à partir du chemin du fichier
+            executor: Executor des calculs (calcul local si None)
+
+        Returns:
+            Résultats dans l'ordre des noms
+        """
+        results: Dict[str, Any] = {}
+        pending: Dict[str, Tuple[str, Tuple[int, int]]] = {}
+
+        for name in names:
+            file_path = self.get_path(name)
+            with self._locks[name]:
+                entry = self._entries.setdefault((name, None), _DatasetEntry())
+                signature = _source_signature(file_path)
+                if key in entry.derived and entry.signature == signature:
+                    entry.hits += 1
+                    results[name] = entry.derived[key]
+                else:
+                    pending[name] = (file_path, signature)
+
+        futures: Dict[str, Future] = {}
+        owned: List[str] = []
+        with self._flights_lock:
+            for name, (file_path, signature) in pending.items():
+                flight = self._flights.get((name, key, signature))
+                if flight is None:
+                    flight = executor.submit(file_builder, file_path) if executor is not None else Future()
+                    self._flights[(name, key, signature)] = flight
+                    owned.append(name)
+                else:
+                    self._entries.setdefault((name, None), _DatasetEntry()).coalesced += 1
+                futures[name] = flight
+
+        try:
+            if executor is None:
+                for name in owned:
+                    _run_local(futures[name], file_builder, pending[name][0])
+            values = {name: future.result() for name, future in futures.items()}
+        finally:
+            with self._flights_lock:
+                for name in owned:
+                    self._flights.pop((name, key, pending[name][1]), None)
+
+        for name, value in values.items():
+            with self._locks[name]:
+                entry = self._entries.setdefault((name, None), _DatasetEntry())
+                signature = pending[name][1]
+                if name in owned:
+                    entry.misses += 1
+                if entry.signature != signature:
+                    entry.derived = {}
+                    entry.signature = signature
+                entry.derived[key] = value
+                results[name] = value
+
+        return [results[name] for name in names]
+
+    def version(self, names: Sequence[str]) -> Tuple[Tuple[str, Tuple[int, int]], ...]:
+        """
+        Retourne la version des fichiers lus pour ces datasets, sans les charger.
+
+        La version change dès qu'un fichier source est modifié : elle sert de
+        clé aux caches de réponses.
+
+        Raises:
+            FileNotFoundError: Si un fichier n'existe pas
+        """
+        return tuple(
+            (name, _source_signature(self.get_path(name))) for name in names
+        )
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Retourne les statistiques du cache par dataset (toutes projections confondues)."""
+        stats = {name: {"hits": 0, "misses": 0, "coalesced": 0, "results": 0} for name in self._paths}
+        for (name, _), entry in list(self._entries.items()):
+            stats[name]["hits"] += entry.hits
+            stats[name]["misses"] += entry.misses
+            stats[name]["coalesced"] += entry.coalesced
+            stats[name]["results"] += len(entry.derived)
+        return stats
+
+    def clear(self) -> None:
+        """Vide le registre et remet les compteurs à zéro."""
+        for name, lock in self._locks.items():
+            with lock:
+                for key in [key for key in self._entries if key[0] == name]:
+                    del self._entries[key]
+
+
+def _run_local(future: Future, builder: Callable[[str], Any], file_path: str) -> None:
+    """Calcule un résultat dans le thread courant et le transmet aux requêtes qui l'attendent."""
+    try:
+        future.set_result(builder(file_path))
+    except BaseException as e:
+        future.set_exception(e)
+
+
+def _source_signature(file_path: str) -> Tuple[int, int]:
+    """Retourne la signature du fichier réellement lu pour ce dataset (Arrow, Parquet ou CSV)."""
+    from src.extractors.extractor_spotify import resolve_spotify_source
+
+    return _file_signature(str(resolve_spotify_source(file_path)))
+
+
+def _file_signature(file_path: str) -> Tuple[int, int]:
+    """Retourne (mtime_ns, taille) du fichier, utilisé pour détecter les modifications."""
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Le fichier {file_path} n'existe pas")
+    return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,526 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Union
+
+import httpx
+
+from src.observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+DEEZER_API_URL = os.getenv("DEEZER_API_URL", "https://api.deezer.com")
+
+# Timeouts (secondes) : établissement de la connexion, puis lecture de la réponse
+DEEZER_CONNECT_TIMEOUT = float(os.getenv("DEEZER_CONNECT_TIMEOUT", "2.0"))
+DEEZER_TIMEOUT = float(os.getenv("DEEZER_TIMEOUT", "5.0"))
+DEEZER_POOL_SIZE = int(os.getenv("DEEZER_POOL_SIZE", "10"))
+
+# Quota de l'API Deezer : 50 requêtes par tranche de 5 secondes (limite appliquée par processus)
+DEEZER_RATE_LIMIT = int(os.getenv("DEEZER_RATE_LIMIT", "50"))
+DEEZER_RATE_PERIOD = float(os.getenv("DEEZER_RATE_PERIOD", "5.0"))
+
+# Nouvelles tentatives : attente aléatoire entre 0 et min(BACKOFF_MAX, BACKOFF_BASE * 2^tentative)
+DEEZER_MAX_RETRIES = int(os.getenv("DEEZER_MAX_RETRIES", "3"))
+DEEZER_BACKOFF_BASE = float(os.getenv("DEEZER_BACKOFF_BASE", "0.5"))
+DEEZER_BACKOFF_MAX = float(os.getenv("DEEZER_BACKOFF_MAX", "8.0"))
+
+# Disjoncteur : ouvert après N échecs consécutifs, nouvel essai après RESET secondes
+DEEZER_CIRCUIT_FAILURES = int(os.getenv("DEEZER_CIRCUIT_FAILURES", "5"))
+DEEZER_CIRCUIT_RESET = float(os.getenv("DEEZER_CIRCUIT_RESET", "30"))
+
+# Codes d'erreur que Deezer renvoie dans un corps {"error": {...}} avec un statut HTTP 200
+QUOTA_ERROR_CODE = 4
+SERVICE_BUSY_ERROR_CODE = 700
+DATA_NOT_FOUND_ERROR_CODE = 800
+
+# Résultats d'un appel (label 'outcome' des métriques)
+OK = "ok"
+NOT_FOUND = "not_found"
+QUOTA = "quota"
+SERVER_ERROR = "server_error"
+CLIENT_ERROR = "client_error"
+TIMEOUT = "timeout"
+CONNECTION_ERROR = "connection_error"
+INVALID_RESPONSE = "invalid_response"
+CIRCUIT_OPEN = "circuit_open"
+
+DEEZER_REQUEST_DURATION = REGISTRY.histogram(
+    "opensound_deezer_request_duration_seconds",
+    "Durée de chaque requête HTTP à l'API Deezer (hors attente du quota et des nouvelles tentatives)",
+    ["endpoint", "outcome"],
+)
+DEEZER_REQUESTS = REGISTRY.counter(
+    "opensound_deezer_requests_total",
+    "Requêtes à l'API Deezer par résultat (circuit_open : refusées sans appel)",
+    ["endpoint", "outcome"],
+)
+DEEZER_RETRIES = REGISTRY.counter(
+    "opensound_deezer_retries_total",
+    "Nouvelles tentatives après un échec transitoire",
+    ["endpoint"],
+)
+
+
+class DeezerError(Exception):
+    """
+    Échec d'un appel à l'API Deezer.
+
+    Attributes:
+        outcome: Type d'échec (label des métriques)
+        retryable: L'échec est transitoire (quota, timeout, erreur serveur)
+    """
+
+    def __init__(self, message: str, outcome: str, retryable: bool = True):
+        super().__init__(message)
+        self.outcome = outcome
+        self.retryable = retryable
+
+
+class DeezerCircuitOpenError(DeezerError):
+    """Appel refusé sans requête : Deezer est considéré indisponible."""
+
+    def __init__(self, message: str):
+        super().__init__(message, CIRCUIT_OPEN, retryable=False)
+
+
+class TokenBucket:
+    """
+    Limiteur de débit à seau de jetons, partagé entre threads et tâches asyncio.
+
+    Le seau contient au plus `rate` jetons et se remplit de `rate` jetons par
+    `period` secondes. Chaque requête réserve un jeton ; si le seau est vide,
+    la réservation est tout de même prise (solde négatif) et l'appelant attend
+    le délai retourné : les requêtes en attente sont servies dans l'ordre.
+    """
+
+    def __init__(self, rate: int = DEEZER_RATE_LIMIT, period: float = DEEZER_RATE_PERIOD):
+        """
+        Args:
+            rate: Nombre de requêtes autorisées par période (taille du seau)
+            period: Durée de la période (secondes)
+        """
+        self.capacity = float(rate)
+        self.fill_rate = rate / period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Réserve un jeton et retourne l'attente (secondes) avant de pouvoir l'utiliser."""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.fill_rate
+
+    def drain(self) -> None:
+        """Vide le seau (quota dépassé côté Deezer) : les requêtes suivantes attendent son remplissage."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+    def _refill(self) -> None:
+        """Ajoute les jetons accumulés depuis la dernière mise à jour."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.fill_rate)
+        self._updated = now
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur : coupe les appels à Deezer tant qu'il est en échec.
+
+    - fermé : les appels passent, les échecs consécutifs sont comptés ;
+    - ouvert (après `failure_threshold` échecs) : les appels échouent
+      immédiatement pendant `reset_timeout` secondes ;
+    - semi-ouvert : un seul appel d'essai passe ; son succès referme le
+      disjoncteur, son échec le rouvre.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = DEEZER_CIRCUIT_FAILURES, reset_timeout: float = DEEZER_CIRCUIT_RESET):
+        """
+        Args:
+            failure_threshold: Échecs consécutifs qui ouvrent le disjoncteur
+            reset_timeout: Durée (secondes) d'ouverture avant un appel d'essai
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._openings = 0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """
+        Vérifie qu'un appel peut être tenté.
+
+        Raises:
+            DeezerCircuitOpenError: Si le disjoncteur est ouvert (ou qu'un appel d'essai est déjà en cours)
+        """
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.CLOSED:
+                return
+            # Un appel d'essai sans issue (tâche annulée) n'en bloque pas d'autres indéfiniment
+            if self.state == self.HALF_OPEN and (
+                not self._trial_in_flight or time.monotonic() - self._trial_started >= self.reset_timeout
+            ):
+                self._trial_in_flight = True
+                self._trial_started = time.monotonic()
+                return
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        raise DeezerCircuitOpenError(f"API Deezer indisponible (disjoncteur ouvert, nouvel essai dans {retry_in:.0f} s)")
+
+    def record_success(self) -> None:
+        """Enregistre un appel réussi : referme le disjoncteur."""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Disjoncteur Deezer refermé")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Enregistre un échec transitoire : ouvre le disjoncteur au-delà du seuil."""
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self._failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+                self._openings += 1
+                logger.warning(
+                    "Disjoncteur Deezer ouvert",
+                    extra={"consecutive_failures": self._failures, "reset_timeout": self.reset_timeout},
+                )
+
+    def stats(self) -> Dict[str, float]:
+        """État du disjoncteur (0 fermé, 1 semi-ouvert, 2 ouvert), échecs consécutifs et nombre d'ouvertures."""
+        with self._lock:
+            return {
+                "state": {self.CLOSED: 0, self.HALF_OPEN: 1, self.OPEN: 2}[self.state],
+                "consecutive_failures": self._failures,
+                "openings": self._openings,
+            }
+
+
+# Quota et état de santé de Deezer, partagés par tous les clients du processus
+deezer_rate_limiter = TokenBucket()
+deezer_circuit_breaker = CircuitBreaker()
+
+
+class DeezerClient:
+    """
+    Client synchrone de l'API Deezer (extraction du chart, fonctions de genres synchrones).
+
+    Une session requests garde les connexions ouvertes (pool keep-alive).
+    Chaque requête passe par le limiteur de débit et le disjoncteur, avec des
+    timeouts stricts ; les échecs transitoires (quota, timeout, erreur
+    serveur) sont retentés avec un délai exponentiel aléatoire.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEEZER_API_URL,
+        timeout: float = DEEZER_TIMEOUT,
+        connect_timeout: float = DEEZER_CONNECT_TIMEOUT,
+        max_retries: int = DEEZER_MAX_RETRIES,
+        backoff_base: float = DEEZER_BACKOFF_BASE,
+        pool_size: int = DEEZER_POOL_SIZE,
+        rate_limiter: Optional[TokenBucket] = deezer_rate_limiter,
+        circuit_breaker: Optional[CircuitBreaker] = deezer_circuit_breaker,
+    ):
+        """
+        Args:
+            base_url: URL de base de l'API Deezer (ex: faux serveur local)
+            timeout: Timeout de lecture (secondes)
+            connect_timeout: Timeout de connexion (secondes)
+            max_retries: Nombre maximal de nouvelles tentatives par appel
+            backoff_base: Attente de base (secondes) avant une nouvelle tentative, doublée à chaque échec
+            pool_size: Nombre de connexions gardées ouvertes
+            rate_limiter: Limiteur de débit (None : aucun)
+            circuit_breaker: Disjoncteur (None : aucun)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self._pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Ferme les connexions du pool."""
+        if self._session is not None:
+            self._session.close()
+
+    def get_json(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Effectue un GET sur l'API Deezer.
+
+        Args:
+            path: Chemin de la ressource (ex: '/album/302127')
+
+        Returns:
+            Corps JSON de la réponse, ou None si la ressource n'existe pas
+
+        Raises:
+            DeezerError: Si l'appel échoue (après les nouvelles tentatives)
+        """
+        import requests
+
+        session = self._get_session()
+        endpoint = _endpoint_label(path)
+        attempt = 0
+        while True:
+            _before_call(self.circuit_breaker, endpoint)
+            if self.rate_limiter is not None:
+                time.sleep(self.rate_limiter.reserve())
+
+            start = time.perf_counter()
+            try:
+                response = session.get(f"{self.base_url}{path}", timeout=self.timeout)
+                payload = _parse_response(response.status_code, response.content)
+            except requests.Timeout as e:
+                error = DeezerError(f"Timeout Deezer: {e}", TIMEOUT)
+            except requests.RequestException as e:
+                error = DeezerError(f"Connexion Deezer impossible: {e}", CONNECTION_ERROR)
+            except DeezerError as e:
+                error = e
+            else:
+                return _record_success(self.circuit_breaker, endpoint, start, payload)
+
+            time.sleep(_record_failure(self, endpoint, path, start, error, attempt))
+            attempt += 1
+
+    def _get_session(self):
+        """
+        Retourne la session HTTP, créée au premier appel.
+
+        requests n'est importé qu'à ce moment : l'import de l'application n'en
+        paie pas le coût.
+        """
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+
+class AsyncDeezerClient:
+    """
+    Client asynchrone de l'API Deezer (enrichissement des genres).
+
+    Mêmes garanties que DeezerClient (pool de connexions, timeouts, quota,
+    nouvelles tentatives, disjoncteur) sur un httpx.AsyncClient.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEEZER_API_URL,
+        timeout: float = DEEZER_TIMEOUT,
+        connect_timeout: float = DEEZER_CONNECT_TIMEOUT,
+        max_retries: int = DEEZER_MAX_RETRIES,
+        backoff_base: float = DEEZER_BACKOFF_BASE,
+        pool_size: int = DEEZER_POOL_SIZE,
+        rate_limiter: Optional[TokenBucket] = deezer_rate_limiter,
+        circuit_breaker: Optional[CircuitBreaker] = deezer_circuit_breaker,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Args:
+            base_url: URL de base de l'API Deezer
+            timeout: Timeout de lecture (secondes)
+            connect_timeout: Timeout de connexion (secondes)
+            max_retries: Nombre maximal de nouvelles tentatives par appel
+            backoff_base: Attente de base (secondes) avant une nouvelle tentative, doublée à chaque échec
+            pool_size: Nombre maximal de connexions simultanées
+            rate_limiter: Limiteur de débit (None : aucun)
+            circuit_breaker: Disjoncteur (None : aucun)
+            transport: Transport httpx à utiliser (ex: httpx.MockTransport hors réseau)
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            transport=transport,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def aclose(self) -> None:
+        """Ferme le client HTTP et ses connexions."""
+        await self._client.aclose()
+
+    async def get_json(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Effectue un GET sur l'API Deezer.
+
+        Args:
+            path: Chemin de la ressource (ex: '/genre/132')
+
+        Returns:
+            Corps JSON de la réponse, ou None si la ressource n'existe pas
+
+        Raises:
+            DeezerError: Si l'appel échoue (après les nouvelles tentatives)
+        """
+        endpoint = _endpoint_label(path)
+        attempt = 0
+        while True:
+            _before_call(self.circuit_breaker, endpoint)
+            if self.rate_limiter is not None:
+                await asyncio.sleep(self.rate_limiter.reserve())
+
+            start = time.perf_counter()
+            try:
+                response = await self._client.get(path)
+                payload = _parse_response(response.status_code, response.content)
+            except httpx.TimeoutException as e:
+                error = DeezerError(f"Timeout Deezer: {e!r}", TIMEOUT)
+            except httpx.HTTPError as e:
+                error = DeezerError(f"Connexion Deezer impossible: {e!r}", CONNECTION_ERROR)
+            except DeezerError as e:
+                error = e
+            else:
+                return _record_success(self.circuit_breaker, endpoint, start, payload)
+
+            await asyncio.sleep(_record_failure(self, endpoint, path, start, error, attempt))
+            attempt += 1
+
+
+# Client synchrone partagé (pool de connexions unique par processus)
+deezer_client = DeezerClient()
+
+
+def _endpoint_label(path: str) -> str:
+    """Type de ressource d'un chemin (ex: '/album/302127' -> 'album'), nombre de séries borné."""
+    return path.strip("/").split("/")[0].split("?")[0] or "root"
+
+
+def _parse_response(status_code: int, content: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Interprète une réponse Deezer.
+
+    Deezer signale aussi ses erreurs (quota dépassé, ressource introuvable)
+    dans un corps {"error": {"code": ...}} avec un statut HTTP 200.
+
+    Returns:
+        Corps JSON, ou None si la ressource n'existe pas
+
+    Raises:
+        DeezerError: Réponse en erreur (transitoire ou non)
+    """
+    if status_code == 404:
+        return None
+    if status_code == 429:
+        raise DeezerError("Quota Deezer dépassé (HTTP 429)", QUOTA)
+    if status_code >= 500:
+        raise DeezerError(f"Erreur serveur Deezer: HTTP {status_code}", SERVER_ERROR)
+    if status_code != 200:
+        raise DeezerError(f"Requête Deezer refusée: HTTP {status_code}", CLIENT_ERROR, retryable=False)
+
+    try:
+        payload = json.loads(content)
+    except ValueError:
+        raise DeezerError("Réponse Deezer illisible (JSON invalide)", INVALID_RESPONSE)
+
+    error = payload.get("error") if isinstance(payload, dict) else None
+    if not error:
+        return payload
+    code = error.get("code") if isinstance(error, dict) else None
+    message = error.get("message", error) if isinstance(error, dict) else error
+    if code == DATA_NOT_FOUND_ERROR_CODE:
+        return None
+    if code == QUOTA_ERROR_CODE:
+        raise DeezerError(f"Quota Deezer dépassé: {message}", QUOTA)
+    if code == SERVICE_BUSY_ERROR_CODE:
+        raise DeezerError(f"Service Deezer occupé: {message}", SERVER_ERROR)
+    raise DeezerError(f"Erreur Deezer {code}: {message}", CLIENT_ERROR, retryable=False)
+
+
+def _before_call(circuit_breaker: Optional[CircuitBreaker], endpoint: str) -> None:
+    """Refuse l'appel si le disjoncteur est ouvert (compté dans les métriques)."""
+    if circuit_breaker is None:
+        return
+    try:
+        circuit_breaker.before_call()
+    except DeezerCircuitOpenError:
+        DEEZER_REQUESTS.inc(endpoint=endpoint, outcome=CIRCUIT_OPEN)
+        raise
+
+
+def _record_success(
+    circuit_breaker: Optional[CircuitBreaker],
+    endpoint: str,
+    start: float,
+    payload: Optional[Dict[str, Any]],
+) -> Optional[Dict[str, Any]]:
+    """Mesure un appel abouti (ressource trouvée ou non) et referme le disjoncteur."""
+    outcome = OK if payload is not None else NOT_FOUND
+    DEEZER_REQUEST_DURATION.observe(time.perf_counter() - start, endpoint=endpoint, outcome=outcome)
+    DEEZER_REQUESTS.inc(endpoint=endpoint, outcome=outcome)
+    if circuit_breaker is not None:
+        circuit_breaker.record_success()
+    return payload
+
+
+def _record_failure(
+    client: Union[DeezerClient, AsyncDeezerClient],
+    endpoint: str,
+    path: str,
+    start: float,
+    error: DeezerError,
+    attempt: int,
+) -> float:
+    """
+    Mesure un appel en échec et décide d'une nouvelle tentative.
+
+    Returns:
+        Attente (secondes) avant la nouvelle tentative
+
+    Raises:
+        DeezerError: Si l'échec est définitif ou si les tentatives sont épuisées
+    """
+    DEEZER_REQUEST_DURATION.observe(time.perf_counter() - start, endpoint=endpoint, outcome=error.outcome)
+    DEEZER_REQUESTS.inc(endpoint=endpoint, outcome=error.outcome)
+
+    # Quota dépassé : Deezer répond, mais trop vite. Le débit est réduit, le disjoncteur reste fermé
+    if error.outcome == QUOTA and client.rate_limiter is not None:
+        client.rate_limiter.drain()
+    if client.circuit_breaker is not None:
+        if error.retryable and error.outcome != QUOTA:
+            client.circuit_breaker.record_failure()
+        else:
+            client.circuit_breaker.record_success()
+
+    if not error.retryable or attempt >= client.max_retries:
+        logger.warning("Erreur Deezer", extra={"path": path, "attempts": attempt + 1, "error": str(error)})
+        raise error
+
+    DEEZER_RETRIES.inc(endpoint=endpoint)
+    # Full jitter : les appelants en échec ne retentent pas tous au même instant
+    return random.uniform(0, min(DEEZER_BACKOFF_MAX, client.backoff_base * 2 ** attempt))
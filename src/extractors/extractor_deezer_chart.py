@@ -1,25 +1,95 @@
-import requests
-import json
-from typing import Dict, Any
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List
 
+from src.extractors.deezer_client import DEEZER_POOL_SIZE, DeezerError, NOT_FOUND, deezer_client
+from src.observability.tracing import timed_stage
 
-def extract_deezer_chart() -> Dict[str, Any]:
+logger = logging.getLogger(__name__)
+
+# Catégories du chart Deezer (/chart/{id}/{catégorie})
+DEEZER_CHART_CATEGORIES = ("tracks", "albums", "artists", "playlists")
+
+# Chart récupéré : 0 pour tous les genres, sinon l'ID d'un genre Deezer
+DEEZER_CHART_ID = int(os.getenv("DEEZER_CHART_ID", "0"))
+
+# Nombre d'éléments récupérés par catégorie, et taille des pages demandées à Deezer
+DEEZER_CHART_LIMIT = int(os.getenv("DEEZER_CHART_LIMIT", "100"))
+DEEZER_CHART_PAGE_SIZE = int(os.getenv("DEEZER_CHART_PAGE_SIZE", "100"))
+
+
+@timed_stage("extract.deezer_chart")
+def extract_deezer_chart(
+    limit: int = DEEZER_CHART_LIMIT,
+    categories: Iterable[str] = ("tracks",),
+    chart_id: int = DEEZER_CHART_ID,
+    page_size: int = DEEZER_CHART_PAGE_SIZE,
+) -> Dict[str, Any]:
     """
     Extrait les données du chart Deezer depuis l'API publique.
 
+    Chaque catégorie est paginée (paramètres index / limit) et toutes les
+    pages sont demandées en parallèle : le nombre d'allers-retours
+    successifs ne dépend pas de la taille du chart.
+
+    Args:
+        limit: Nombre d'éléments par catégorie (le chart peut en contenir moins)
+        categories: Catégories à récupérer parmi DEEZER_CHART_CATEGORIES
+        chart_id: Chart à récupérer (0 : tous les genres, sinon ID de genre Deezer)
+        page_size: Nombre d'éléments par page
+
     Returns:
-        Dict[str, Any]: Données brutes du chart Deezer
+        Dict[str, Any]: {catégorie: {"data": [...], "total": n}}, au format de /chart
 
     Raises:
-        Exception: Si la requête API échoue
+        ValueError: Si une catégorie est inconnue
+        DeezerError: Si la requête API échoue (après les nouvelles tentatives)
     """
-    url = "https://api.deezer.com/chart"
-    response = requests.get(url)
-
-    if response.status_code == 200:
-        data = response.json()
-        print("✅ Données de l'API Deezer Chart récupérées avec succès!")
-        print(f"Clés disponibles : {data.keys()}")
-        return data
-    else:
-        raise Exception(f"❌ Erreur lors de la récupération du Chart de l'API Deezer: {response.status_code}")
+    categories = list(dict.fromkeys(categories))
+    unknown = [category for category in categories if category not in DEEZER_CHART_CATEGORIES]
+    if unknown:
+        raise ValueError(f"Catégories de chart inconnues: {unknown}. Valeurs possibles : {list(DEEZER_CHART_CATEGORIES)}")
+
+    pages = [
+        (category, index, min(page_size, limit - index))
+        for category in categories
+        for index in range(0, limit, page_size)
+    ]
+    with ThreadPoolExecutor(max_workers=max(1, min(len(pages), DEEZER_POOL_SIZE))) as executor:
+        responses = list(executor.map(lambda page: _fetch_chart_page(chart_id, *page), pages))
+
+    data: Dict[str, Any] = {category: {"data": [], "total": 0} for category in categories}
+    for (category, _, _), response in zip(pages, responses):
+        data[category]["data"].extend(response.get("data", []))
+        data[category]["total"] = max(data[category]["total"], response.get("total", 0))
+    for category in categories:
+        data[category]["data"] = _unique_items(data[category]["data"])[:limit]
+
+    counts = {category: len(data[category]["data"]) for category in categories}
+    logger.info("Données de l'API Deezer Chart récupérées", extra={"chart_id": chart_id, "pages": len(pages), **counts})
+    return data
+
+
+def _fetch_chart_page(chart_id: int, category: str, index: int, limit: int) -> Dict[str, Any]:
+    """Récupère une page d'une catégorie du chart."""
+    page = deezer_client.get_json(f"/chart/{chart_id}/{category}?index={index}&limit={limit}")
+    if page is None:
+        raise DeezerError(
+            f"❌ Erreur lors de la récupération du Chart de l'API Deezer: chart {chart_id} introuvable",
+            NOT_FOUND,
+            retryable=False,
+        )
+    return page
+
+
+def _unique_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Supprime les éléments présents sur deux pages (chart modifié entre deux requêtes), dans l'ordre."""
+    seen = set()
+    unique = []
+    for item in items:
+        item_id = item.get("id")
+        if item_id is None or item_id not in seen:
+            seen.add(item_id)
+            unique.append(item)
+    return unique
@@ -1,15 +1,47 @@
+import logging
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
+from typing import Iterator, List, Optional
 
-def extract_spotify_data(file_path: str) -> pd.DataFrame:
+from src.loaders.loader_spotify import (
+    ARROW_FORMAT,
+    COMPACT_STRING_DTYPE,
+    RELEASE_YEAR_COLUMN,
+    SPOTIFY_STORAGE_FORMAT,
+    SPOTIFY_URL_COLUMNS,
+    SPOTIFY_URL_COLUMNS_MODE,
+    URL_DROP,
+    URL_INTERN,
+    apply_spotify_schema,
+    compact_spotify_frame,
+    get_processed_path,
+    is_up_to_date,
+    publish_spotify_arrow,
+)
+from src.observability.tracing import timed_stage
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_spotify_source(file_path: str) -> Path:
     """
-    Charge les données Spotify depuis un fichier CSV.
+    Retourne le fichier réellement lu pour un CSV Spotify.
+
+    Le fichier Parquet de data/processed est utilisé s'il existe et qu'il est
+    au moins aussi récent que le CSV, sinon le CSV brut est utilisé. Un
+    chemin Parquet (dataset sans CSV brut) est retourné tel quel.
+
+    Avec SPOTIFY_STORAGE_FORMAT=arrow, c'est le fichier Arrow publié qui est
+    lu : il est (re)publié ici s'il est absent ou plus ancien que le dataset.
 
     Args:
-        file_path: Chemin vers le fichier CSV
+        file_path: Chemin vers le fichier CSV (ou Parquet)
 
     Returns:
-        DataFrame contenant les données Spotify
+        Chemin du fichier Arrow, Parquet ou du CSV
 
     Raises:
         FileNotFoundError: Si le fichier n'existe pas
@@ -19,7 +51,145 @@ def extract_spotify_data(file_path: str) -> pd.DataFrame:
     if not path.exists():
         raise FileNotFoundError(f"Le fichier {file_path} n'existe pas")
 
-    df = pd.read_csv(file_path)
-    print(f"✅ Données chargées : {df.shape[0]} lignes, {df.shape[1]} colonnes")
+    if SPOTIFY_STORAGE_FORMAT == ARROW_FORMAT:
+        return publish_spotify_arrow(file_path)
+
+    if path.suffix == ".parquet":
+        return path
+
+    processed_path = get_processed_path(file_path)
+    if is_up_to_date(processed_path, path):
+        return processed_path
+
+    return path
+
+
+@timed_stage("extract.spotify")
+def extract_spotify_data(file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Charge les données Spotify depuis le fichier Parquet traité ou, à défaut, le CSV.
+
+    Le DataFrame est compact (catégories, chaînes Arrow, entiers réduits, voir
+    compact_spotify_frame) ; si SPOTIFY_URL_COLUMNS vaut 'drop', les URLs ne
+    sont pas chargées, sauf si elles sont demandées explicitement. Un fichier
+    Arrow publié est projeté en mémoire : le DataFrame est en lecture seule.
+
+    Args:
+        file_path: Chemin vers le fichier CSV (ou Parquet)
+        columns: Colonnes à charger (toutes les colonnes du CSV si None).
+            'release_year' peut être demandée : elle est dérivée de la date de sortie.
+
+    Returns:
+        DataFrame contenant les données Spotify typées
+
+    Raises:
+        FileNotFoundError: Si le fichier n'existe pas
+    """
+    source = resolve_spotify_source(file_path)
+
+    if source.suffix == f".{ARROW_FORMAT}":
+        df = _read_arrow(source, columns)
+    elif source.suffix == ".parquet":
+        if columns is None:
+            df = _read_parquet(source)
+            df = df.drop(columns=[RELEASE_YEAR_COLUMN], errors="ignore")
+        else:
+            df = _read_parquet(source, columns)
+    else:
+        if columns is None:
+            df = apply_spotify_schema(pd.read_csv(source))
+            df = df.drop(columns=[RELEASE_YEAR_COLUMN], errors="ignore")
+        else:
+            csv_columns = [column for column in columns if column != RELEASE_YEAR_COLUMN]
+            if RELEASE_YEAR_COLUMN in columns and "track_album_release_date" not in csv_columns:
+                csv_columns.append("track_album_release_date")
+            df = apply_spotify_schema(pd.read_csv(source, usecols=csv_columns))[columns]
+
+    # Sans effet sur les colonnes déjà compactes (Parquet converti par le loader)
+    df = compact_spotify_frame(df, SPOTIFY_URL_COLUMNS_MODE if columns is None else URL_INTERN)
+
+    logger.info(
+        "Données chargées",
+        extra={"file_format": source.suffix[1:], "rows": df.shape[0], "columns": df.shape[1]},
+    )
 
     return df
+
+
+def _read_parquet(source: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Lit un fichier Parquet en gardant les chaînes dans des buffers Arrow (sans objets Python)."""
+    table = pq.read_table(source, columns=columns)
+    return table.to_pandas(types_mapper={
+        pa.string(): COMPACT_STRING_DTYPE,
+        pa.large_string(): COMPACT_STRING_DTYPE,
+    }.get)
+
+
+def _read_arrow(source: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Projette un fichier Arrow IPC en mémoire (mmap en lecture seule).
+
+    Les colonnes numériques sans valeur manquante et les chaînes pointent
+    directement dans le fichier projeté, sans copie : leurs pages sont
+    partagées par tous les processus qui lisent le même fichier. Seules les
+    colonnes catégorielles (codes) et les entiers nullables sont copiés.
+    """
+    table = pa.ipc.open_file(pa.memory_map(str(source), "r")).read_all()
+    if columns is None:
+        excluded = {RELEASE_YEAR_COLUMN}
+        if SPOTIFY_URL_COLUMNS_MODE == URL_DROP:
+            excluded.update(SPOTIFY_URL_COLUMNS)
+        columns = [column for column in table.column_names if column not in excluded]
+    table = table.select(columns)
+
+    pandas_types = {
+        column["name"]: column["numpy_type"] for column in (table.schema.pandas_metadata or {}).get("columns", [])
+    }
+    zero_copy = {
+        name: _zero_copy_array(column, pandas_types.get(name, ""))
+        for name, column in zip(table.column_names, table.columns)
+        if column.num_chunks == 1
+        and column.null_count == 0
+        and (pa.types.is_integer(column.type) or pa.types.is_floating(column.type))
+    }
+    others = table.drop_columns(list(zero_copy)).to_pandas(types_mapper={
+        pa.string(): COMPACT_STRING_DTYPE,
+        pa.large_string(): COMPACT_STRING_DTYPE,
+    }.get)
+    arrays = {name: zero_copy[name] if name in zero_copy else others[name] for name in table.column_names}
+    return pd.DataFrame(arrays, copy=False)
+
+
+def _zero_copy_array(column: pa.ChunkedArray, pandas_type: str):
+    """Tableau NumPy pointant dans le fichier projeté (entier nullable : seul le masque est alloué)."""
+    values = column.chunk(0).to_numpy(zero_copy_only=True)
+    if pandas_type.startswith(("Int", "UInt")):
+        return pd.arrays.IntegerArray(values, np.zeros(len(values), dtype=bool))
+    return values
+
+
+def iter_spotify_chunks(file_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Lit un CSV Spotify par blocs de taille bornée.
+
+    Les valeurs sont lues comme texte (valeurs manquantes exceptées) : deux
+    lignes identiques du fichier restent identiques quel que soit le bloc,
+    les colonnes utiles sont converties par le consommateur.
+
+    Args:
+        file_path: Chemin vers le fichier CSV
+        chunksize: Nombre de lignes par bloc
+
+    Yields:
+        DataFrame de chaque bloc
+
+    Raises:
+        FileNotFoundError: Si le fichier n'existe pas
+    """
+    path = Path(file_path)
+
+    if not path.exists():
+        raise FileNotFoundError(f"Le fichier {file_path} n'existe pas")
+
+    with pd.read_csv(path, chunksize=chunksize, dtype=str) as reader:
+        yield from reader
@@ -0,0 +1,429 @@
+import logging
+import os
+import sqlite3
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.loaders.materialized_store import payload_sha256
+
+logger = logging.getLogger(__name__)
+
+# Base SQLite de l'historique du chart Deezer, partagée entre les workers et le pipeline
+DEEZER_CHART_HISTORY_PATH = os.getenv("DEEZER_CHART_HISTORY_PATH", "data/history/deezer_chart.sqlite")
+
+# Enregistre chaque snapshot du chart dans l'historique ('0' : désactivé)
+DEEZER_CHART_HISTORY_ENABLED = os.getenv("DEEZER_CHART_HISTORY", "1") == "1"
+
+SECONDS_PER_DAY = 86400
+
+_SCHEMA = (
+    # Une ligne par version du chart : un snapshot identique au précédent prolonge seulement last_seen_at
+    "CREATE TABLE IF NOT EXISTS snapshots ("
+    "snapshot_at REAL PRIMARY KEY, day INTEGER NOT NULL, last_seen_at REAL NOT NULL, "
+    "total_tracks INTEGER NOT NULL, sha256 TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS tracks ("
+    "track_id INTEGER PRIMARY KEY, artist TEXT NOT NULL COLLATE NOCASE, track TEXT NOT NULL COLLATE NOCASE, "
+    "artist_picture TEXT, is_explicit_lyrics INTEGER, UNIQUE (artist, track))",
+    "CREATE TABLE IF NOT EXISTS genres (genre_id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    # Clé primaire (jour, version, rang) sans rowid : les lignes d'un jour sont contiguës sur disque
+    "CREATE TABLE IF NOT EXISTS chart_entries ("
+    "day INTEGER NOT NULL, snapshot_at REAL NOT NULL, rank INTEGER NOT NULL, "
+    "track_id INTEGER NOT NULL, genre_id INTEGER, "
+    "PRIMARY KEY (day, snapshot_at, rank)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS chart_entries_track ON chart_entries (track_id, day)",
+)
+
+
+@dataclass
+class ChartVersion:
+    """Version du chart : servie de snapshot_at jusqu'à la version suivante (until)."""
+
+    snapshot_at: float
+    last_seen_at: float
+    total_tracks: int
+    until: float
+
+    def overlap(self, start: float, end: float) -> float:
+        """Durée (secondes) pendant laquelle cette version était le chart, entre start et end."""
+        return max(0.0, min(self.until, end) - max(self.snapshot_at, start))
+
+    def describe(self) -> Dict[str, Any]:
+        """Retourne la version sous forme de dictionnaire (dates en timestamps Unix)."""
+        return {
+            "snapshot_at": self.snapshot_at,
+            "last_seen_at": self.last_seen_at,
+            "until": self.until,
+            "total_tracks": self.total_tracks,
+        }
+
+
+class DeezerChartHistory:
+    """
+    Historique des snapshots du chart Deezer (sortie de transform_deezer_chart), en ajout seul.
+
+    Le chart ne change que quelques fois par jour alors qu'il est récupéré
+    toutes les DEEZER_CHART_REFRESH_INTERVAL secondes, par chaque worker : un
+    snapshot identique à la dernière version prolonge seulement sa date de
+    dernière observation. Les titres et les genres sont stockés une fois
+    (dictionnaires) ; chaque version ajoute une ligne (rang, titre, genre) par
+    titre.
+
+    Les lignes du chart sont partitionnées par jour (UTC) : la clé primaire
+    commence par le jour, la table est rangée dans cet ordre (WITHOUT ROWID),
+    et une requête sur une période ne lit que les pages des jours concernés,
+    quelle que soit la profondeur de l'historique. L'index (titre, jour) sert
+    l'historique des rangs d'un titre ou d'un artiste.
+    """
+
+    def __init__(self, path: str = DEEZER_CHART_HISTORY_PATH):
+        """
+        Args:
+            path: Chemin de la base SQLite (créée à la première utilisation)
+        """
+        self._path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def append(self, tracks: List[Dict[str, Any]], fetched_at: float) -> bool:
+        """
+        Enregistre un snapshot du chart.
+
+        Args:
+            tracks: Tracks enrichies, dans l'ordre du chart (sortie de transform_deezer_chart)
+            fetched_at: Date de récupération du snapshot (timestamp Unix)
+
+        Returns:
+            True si une nouvelle version a été ajoutée, False si le chart est inchangé
+            (ou si une version plus récente a déjà été enregistrée par un autre worker)
+        """
+        digest = payload_sha256([[track["artist"], track["track"], track.get("genre")] for track in tracks])
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                latest = connection.execute(
+                    "SELECT snapshot_at, sha256 FROM snapshots ORDER BY snapshot_at DESC LIMIT 1"
+                ).fetchone()
+                appended = latest is None or (latest[1] != digest and fetched_at > latest[0])
+                if appended:
+                    _insert_version(connection, tracks, fetched_at, digest)
+                elif latest[1] == digest:
+                    connection.execute(
+                        "UPDATE snapshots SET last_seen_at = MAX(last_seen_at, ?) WHERE snapshot_at = ?",
+                        (fetched_at, latest[0]),
+                    )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        if appended:
+            logger.info("Nouvelle version du chart Deezer enregistrée", extra={"tracks": len(tracks)})
+        return appended
+
+    def versions(self, start: float, end: float) -> List[ChartVersion]:
+        """
+        Retourne les versions du chart servies entre start et end (timestamps Unix).
+
+        La version en place à start (enregistrée avant) est incluse.
+        """
+        with self._lock:
+            return _versions(self._connect(), start, end)
+
+    def track_history(
+        self, artist: str, track: Optional[str], start: float, end: float, top: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Retourne l'historique des rangs des titres d'un artiste (ou d'un seul titre) sur une période.
+
+        Args:
+            artist: Nom de l'artiste (sans tenir compte de la casse)
+            track: Titre (None : tous les titres de l'artiste)
+            start: Début de la période (timestamp Unix)
+            end: Fin de la période (timestamp Unix)
+            top: Rang limite pour le temps passé dans le top (ex: 10)
+
+        Returns:
+            Une entrée par titre présent dans le chart sur la période : rangs par
+            version, meilleur rang, temps passé dans le chart et dans le top
+        """
+        with self._lock:
+            connection = self._connect()
+            query = "SELECT track_id, artist, track FROM tracks WHERE artist = ?"
+            params: Tuple[Any, ...] = (artist,)
+            if track is not None:
+                query, params = query + " AND track = ?", params + (track,)
+            known = {row[0]: row[1:] for row in connection.execute(query, params)}
+            versions = _versions(connection, start, end) if known else []
+            if not versions:
+                return []
+            rows = connection.execute(
+                f"SELECT track_id, snapshot_at, rank FROM chart_entries "
+                f"WHERE track_id IN ({','.join('?' * len(known))}) AND day BETWEEN ? AND ? AND snapshot_at BETWEEN ? AND ? "
+                f"ORDER BY track_id, snapshot_at",
+                (*known, *_day_range(versions), versions[0].snapshot_at, versions[-1].snapshot_at),
+            ).fetchall()
+
+        by_time = {version.snapshot_at: version for version in versions}
+        history: Dict[int, Dict[str, Any]] = {}
+        for track_id, snapshot_at, rank in rows:
+            version = by_time.get(snapshot_at)
+            if version is None:
+                continue
+            artist_name, track_name = known[track_id]
+            entry = history.setdefault(track_id, {
+                "artist": artist_name, "track": track_name, "ranks": [],
+                "best_rank": rank, "seconds_in_chart": 0.0, "seconds_in_top": 0.0,
+            })
+            duration = version.overlap(start, end)
+            entry["ranks"].append({"at": snapshot_at, "until": version.until, "rank": rank})
+            entry["best_rank"] = min(entry["best_rank"], rank)
+            entry["seconds_in_chart"] += duration
+            if rank <= top:
+                entry["seconds_in_top"] += duration
+        return sorted(history.values(), key=lambda entry: (entry["best_rank"], entry["track"]))
+
+    def genre_share(self, start: float, end: float, top: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Retourne la part de chaque genre dans le chart, jour par jour, et son évolution sur la période.
+
+        La part d'un genre est son nombre de titres rapporté au nombre de titres
+        du chart, pondéré par la durée pendant laquelle chaque version a été
+        servie. Les titres sans genre comptent dans le total.
+
+        Args:
+            start: Début de la période (timestamp Unix)
+            end: Fin de la période (timestamp Unix)
+            top: Ne compte que les `top` premiers rangs (None : tout le chart)
+
+        Returns:
+            {"days": [{"day": jour, "shares": {genre: part}}], "genres": [{"genre", "share",
+            "first_share", "last_share", "change"}]} (genres triés par progression décroissante)
+        """
+        with self._lock:
+            connection = self._connect()
+            versions = _versions(connection, start, end)
+            if not versions:
+                return {"days": [], "genres": []}
+            names = dict(connection.execute("SELECT genre_id, name FROM genres"))
+            query = (
+                "SELECT snapshot_at, genre_id FROM chart_entries "
+                "WHERE day BETWEEN ? AND ? AND snapshot_at BETWEEN ? AND ?"
+            )
+            params: Tuple[Any, ...] = (*_day_range(versions), versions[0].snapshot_at, versions[-1].snapshot_at)
+            if top is not None:
+                query, params = query + " AND rank <= ?", params + (top,)
+            counts: Dict[float, Counter] = {version.snapshot_at: Counter() for version in versions}
+            for snapshot_at, genre_id in connection.execute(query, params):
+                if snapshot_at in counts:
+                    counts[snapshot_at][genre_id] += 1
+
+        # Durée de chaque version répartie sur les jours qu'elle couvre
+        day_weights: Dict[int, Counter] = {}
+        day_totals: Counter = Counter()
+        for version in versions:
+            version_counts = counts[version.snapshot_at]
+            first_day = int(max(version.snapshot_at, start) // SECONDS_PER_DAY)
+            last_day = int(min(version.until, end) // SECONDS_PER_DAY)
+            for day in range(first_day, last_day + 1):
+                duration = version.overlap(max(start, day * SECONDS_PER_DAY), min(end, (day + 1) * SECONDS_PER_DAY))
+                if duration > 0:
+                    weights = day_weights.setdefault(day, Counter())
+                    for genre_id, count in version_counts.items():
+                        weights[genre_id] += duration * count
+                    day_totals[day] += duration * sum(version_counts.values())
+
+        days = []
+        period_weights: Counter = Counter()
+        for day in sorted(day_weights):
+            if day_totals[day] > 0:
+                days.append({"day": day * SECONDS_PER_DAY, "shares": _shares(day_weights[day], day_totals[day], names)})
+                period_weights.update(day_weights[day])
+        period_total = sum(day_totals.values())
+
+        first, last = (days[0]["shares"], days[-1]["shares"]) if days else ({}, {})
+        genres = [
+            {
+                "genre": genre,
+                "share": share,
+                "first_share": first.get(genre, 0.0),
+                "last_share": last.get(genre, 0.0),
+                "change": round(last.get(genre, 0.0) - first.get(genre, 0.0), 4),
+            }
+            for genre, share in _shares(period_weights, period_total, names).items()
+        ]
+        genres.sort(key=lambda entry: (-entry["change"], -entry["share"], entry["genre"]))
+        return {"days": days, "genres": genres}
+
+    def changes(
+        self, from_at: Optional[float] = None, to_at: Optional[float] = None, top: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Compare deux versions du chart : titres entrés et sortis.
+
+        Args:
+            from_at: Date de la première version comparée (None : version précédant celle de to_at)
+            to_at: Date de la seconde version (None : dernière version)
+            top: Ne compare que les `top` premiers rangs (None : tout le chart)
+
+        Returns:
+            {"from_version": version, "to_version": version, "newcomers": [...], "dropouts": [...]}
+
+        Raises:
+            LookupError: Si aucune version n'existe aux dates demandées
+        """
+        with self._lock:
+            connection = self._connect()
+            to_version = _version_at(connection, to_at)
+            if to_version is None:
+                raise LookupError("Aucune version du chart enregistrée à cette date.")
+            if from_at is None:
+                from_version = _version_at(connection, to_version.snapshot_at, strictly_before=True)
+                if from_version is None:
+                    raise LookupError("Aucune version du chart antérieure à comparer.")
+            else:
+                from_version = _version_at(connection, from_at)
+                if from_version is None:
+                    raise LookupError("Aucune version du chart enregistrée à cette date.")
+            before = _ranked_tracks(connection, from_version.snapshot_at, top)
+            after = _ranked_tracks(connection, to_version.snapshot_at, top)
+
+        return {
+            "from_version": from_version.describe(),
+            "to_version": to_version.describe(),
+            "newcomers": [
+                {**track, "rank": rank} for key, (rank, track) in after.items() if key not in before
+            ],
+            "dropouts": [
+                {**track, "previous_rank": rank} for key, (rank, track) in before.items() if key not in after
+            ],
+        }
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Statistiques exposées dans /metrics (versions, lignes, titres, taille du fichier)."""
+        with self._lock:
+            connection = self._connect()
+            versions, entries = connection.execute("SELECT COUNT(*), COALESCE(SUM(total_tracks), 0) FROM snapshots").fetchone()
+            tracks = connection.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+        return {
+            "deezer_chart": {
+                "versions": versions,
+                "entries": entries,
+                "tracks": tracks,
+                "size_bytes": sum(path.stat().st_size for path in (self._path, self._path.with_name(self._path.name + "-wal"))
+                                  if path.exists()),
+            }
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        """Ouvre la base à la première utilisation (mode WAL : lectures pendant les ajouts d'autres workers)."""
+        if self._connection is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            self._connection = connection
+        return self._connection
+
+
+# Historique partagé par le rafraîchissement du chart et le pipeline
+deezer_chart_history = DeezerChartHistory()
+
+
+def _insert_version(connection: sqlite3.Connection, tracks: List[Dict[str, Any]], fetched_at: float, digest: str) -> None:
+    """Ajoute une version du chart (titres et genres inconnus ajoutés aux dictionnaires)."""
+    connection.executemany(
+        "INSERT INTO tracks (artist, track, artist_picture, is_explicit_lyrics) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (artist, track) DO UPDATE SET "
+        "artist_picture = excluded.artist_picture, is_explicit_lyrics = excluded.is_explicit_lyrics",
+        [(track["artist"], track["track"], track.get("artist_picture"), track.get("is_explicit_lyrics"))
+         for track in tracks],
+    )
+    genres = {track.get("genre") for track in tracks} - {None}
+    connection.executemany("INSERT OR IGNORE INTO genres (name) VALUES (?)", [(genre,) for genre in genres])
+    genre_ids = {
+        name: genre_id
+        for genre in genres
+        for genre_id, name in connection.execute("SELECT genre_id, name FROM genres WHERE name = ?", (genre,))
+    }
+
+    day = int(fetched_at // SECONDS_PER_DAY)
+    rows = []
+    for rank, track in enumerate(tracks, start=1):
+        track_id = connection.execute(
+            "SELECT track_id FROM tracks WHERE artist = ? AND track = ?", (track["artist"], track["track"])
+        ).fetchone()[0]
+        rows.append((day, fetched_at, rank, track_id, genre_ids.get(track.get("genre"))))
+    connection.executemany("INSERT INTO chart_entries VALUES (?, ?, ?, ?, ?)", rows)
+    connection.execute(
+        "INSERT INTO snapshots (snapshot_at, day, last_seen_at, total_tracks, sha256) VALUES (?, ?, ?, ?, ?)",
+        (fetched_at, day, fetched_at, len(tracks), digest),
+    )
+
+
+def _versions(connection: sqlite3.Connection, start: float, end: float) -> List[ChartVersion]:
+    """Versions servies entre start et end, avec la date de fin de chacune (version suivante ou dernière observation)."""
+    rows = connection.execute(
+        "SELECT snapshot_at, last_seen_at, total_tracks FROM snapshots "
+        "WHERE snapshot_at >= (SELECT COALESCE(MAX(snapshot_at), ?) FROM snapshots WHERE snapshot_at <= ?) "
+        "AND snapshot_at <= ? ORDER BY snapshot_at",
+        (start, start, end),
+    ).fetchall()
+    following = connection.execute("SELECT MIN(snapshot_at) FROM snapshots WHERE snapshot_at > ?", (end,)).fetchone()[0]
+
+    versions = []
+    for position, (snapshot_at, last_seen_at, total_tracks) in enumerate(rows):
+        until = rows[position + 1][0] if position + 1 < len(rows) else (following or last_seen_at)
+        versions.append(ChartVersion(snapshot_at, last_seen_at, total_tracks, until))
+    # Version antérieure à la période qui n'était plus observée à son début
+    return [version for version in versions if version.until >= start]
+
+
+def _version_at(connection: sqlite3.Connection, at: Optional[float], strictly_before: bool = False) -> Optional[ChartVersion]:
+    """Version servie à une date (None : dernière version), ou celle qui la précède."""
+    if at is None:
+        row = connection.execute(
+            "SELECT snapshot_at, last_seen_at, total_tracks FROM snapshots ORDER BY snapshot_at DESC LIMIT 1"
+        ).fetchone()
+    else:
+        row = connection.execute(
+            f"SELECT snapshot_at, last_seen_at, total_tracks FROM snapshots "
+            f"WHERE snapshot_at {'<' if strictly_before else '<='} ? ORDER BY snapshot_at DESC LIMIT 1",
+            (at,),
+        ).fetchone()
+    if row is None:
+        return None
+    following = connection.execute("SELECT MIN(snapshot_at) FROM snapshots WHERE snapshot_at > ?", (row[0],)).fetchone()[0]
+    return ChartVersion(row[0], row[1], row[2], following or row[1])
+
+
+def _ranked_tracks(
+    connection: sqlite3.Connection, snapshot_at: float, top: Optional[int]
+) -> Dict[int, Tuple[int, Dict[str, Any]]]:
+    """Titres d'une version (lecture de sa seule partition) : {track_id: (rang, titre)}."""
+    query = (
+        "SELECT e.track_id, e.rank, t.artist, t.track, g.name FROM chart_entries e "
+        "JOIN tracks t ON t.track_id = e.track_id LEFT JOIN genres g ON g.genre_id = e.genre_id "
+        "WHERE e.day = ? AND e.snapshot_at = ?"
+    )
+    params: Tuple[Any, ...] = (int(snapshot_at // SECONDS_PER_DAY), snapshot_at)
+    if top is not None:
+        query, params = query + " AND e.rank <= ?", params + (top,)
+    return {
+        track_id: (rank, {"artist": artist, "track": track, "genre": genre})
+        for track_id, rank, artist, track, genre in connection.execute(query + " ORDER BY e.rank", params)
+    }
+
+
+def _day_range(versions: List[ChartVersion]) -> Tuple[int, int]:
+    """Partitions (jours) contenant les lignes des versions."""
+    return int(versions[0].snapshot_at // SECONDS_PER_DAY), int(versions[-1].snapshot_at // SECONDS_PER_DAY)
+
+
+def _shares(weights: Counter, total: float, names: Dict[int, str]) -> Dict[str, float]:
+    """Parts des genres (titres sans genre exclus), triées par part décroissante."""
+    shares = {names[genre_id]: round(weight / total, 4) for genre_id, weight in weights.items() if genre_id is not None}
+    return dict(sorted(shares.items(), key=lambda item: (-item[1], item[0])))
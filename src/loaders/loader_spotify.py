@@ -0,0 +1,426 @@
+import argparse
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import fcntl
+except ImportError:  # Windows : sans verrou, deux workers peuvent publier le même fichier (sans risque)
+    fcntl = None
+
+from src.extractors.dataset_catalog import (
+    ARROW_FORMAT,
+    PARQUET_FORMAT,
+    RAW_DIR,
+    SPOTIFY_STORAGE_FORMAT,
+)
+from src.observability.logs import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Types des colonnes utilisées par les analyses (les autres colonnes gardent le type inféré)
+SPOTIFY_DTYPES = {
+    "playlist_genre": "category",
+    "playlist_subgenre": "category",
+    "track_popularity": "Int16",
+    "duration_ms": "float64",
+}
+
+# Colonne dérivée calculée une seule fois à la conversion
+RELEASE_YEAR_COLUMN = "release_year"
+
+# Colonnes texte aux valeurs répétées (genres, playlists, dates...) : stockées en catégories
+SPOTIFY_CATEGORY_COLUMNS = (
+    "playlist_genre",
+    "playlist_subgenre",
+    "playlist_name",
+    "playlist_id",
+    "type",
+    "track_album_release_date",
+)
+# Une colonne n'est convertie en catégories que si ses valeurs distinctes sont assez rares
+SPOTIFY_CATEGORY_MAX_RATIO = float(os.getenv("SPOTIFY_CATEGORY_MAX_RATIO", "0.5"))
+
+# URLs de l'API Spotify, jamais utilisées par les analyses
+SPOTIFY_URL_COLUMNS = ("track_href", "uri", "analysis_url")
+# 'intern' : conservées (chaînes compactes, catégories si répétées) ; 'drop' : supprimées au chargement
+URL_INTERN = "intern"
+URL_DROP = "drop"
+SPOTIFY_URL_COLUMNS_MODE = os.getenv("SPOTIFY_URL_COLUMNS", URL_INTERN)
+
+# Chaînes stockées dans des buffers Arrow contigus plutôt qu'en objets Python
+COMPACT_STRING_DTYPE = pd.StringDtype("pyarrow")
+
+
+def get_processed_path(
+    csv_path: str,
+    processed_dir: Optional[str] = None,
+    file_format: str = PARQUET_FORMAT,
+) -> Path:
+    """
+    Retourne le chemin du fichier traité (Parquet ou Arrow) associé à un CSV brut.
+
+    Par défaut, data/raw/<nom>.csv correspond à data/processed/<nom>.parquet.
+
+    Args:
+        csv_path: Chemin du fichier CSV brut
+        processed_dir: Dossier de sortie (par défaut, dossier 'processed' voisin de 'raw')
+        file_format: 'parquet' ou 'arrow'
+
+    Returns:
+        Chemin du fichier traité
+    """
+    path = Path(csv_path)
+    if processed_dir is None:
+        directory = path.parent.parent / "processed"
+    else:
+        directory = Path(processed_dir)
+    return directory / f"{path.stem}.{file_format}"
+
+
+def get_published_path(file_path: str) -> Path:
+    """
+    Retourne le chemin du fichier Arrow publié pour un dataset.
+
+    data/raw/<nom>.csv correspond à data/processed/<nom>.arrow ; un dataset
+    sans CSV (fichier Parquet seul) est publié à côté de son fichier Parquet.
+    """
+    path = Path(file_path)
+    if path.suffix == f".{PARQUET_FORMAT}":
+        return path.with_suffix(f".{ARROW_FORMAT}")
+    return get_processed_path(file_path, file_format=ARROW_FORMAT)
+
+
+def is_up_to_date(target: Path, source: Path) -> bool:
+    """Indique si le fichier dérivé existe et est au moins aussi récent que sa source."""
+    return target.exists() and target.stat().st_mtime_ns >= source.stat().st_mtime_ns
+
+
+def apply_spotify_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Applique les types du schéma Spotify aux colonnes présentes.
+
+    Les colonnes entières du schéma (ex: 'track_popularity') ne sont typées en
+    entiers que si toutes leurs valeurs le sont : sinon (ex: 75.5) elles restent
+    en float32, et les valeurs non numériques deviennent manquantes.
+
+    Ajoute la colonne 'release_year' si 'track_album_release_date' est présente.
+    La date brute est conservée telle quelle : les dates non interprétables
+    donnent une année manquante, comme dans le calcul par décennie.
+
+    Args:
+        df: DataFrame Spotify brut
+
+    Returns:
+        DataFrame typé
+    """
+    dtypes = {column: dtype for column, dtype in SPOTIFY_DTYPES.items() if column in df.columns}
+    integer_columns = {
+        column: dtype for column, dtype in dtypes.items() if pd.api.types.is_integer_dtype(pd.api.types.pandas_dtype(dtype))
+    }
+    df = df.astype({column: dtype for column, dtype in dtypes.items() if column not in integer_columns})
+    for column, dtype in integer_columns.items():
+        df[column] = _integer_or_float(df[column], dtype)
+
+    if "track_album_release_date" in df.columns:
+        release_year = pd.to_datetime(df["track_album_release_date"], errors="coerce").dt.year
+        df[RELEASE_YEAR_COLUMN] = release_year.astype("Int16")
+
+    return compact_spotify_frame(df)
+
+
+def compact_spotify_frame(df: pd.DataFrame, url_columns: str = URL_INTERN) -> pd.DataFrame:
+    """
+    Réduit l'empreinte mémoire d'un DataFrame Spotify sans changer ses valeurs.
+
+    - colonnes de SPOTIFY_CATEGORY_COLUMNS et URLs en catégories (si leurs valeurs sont répétées)
+    - autres colonnes texte en chaînes Arrow (un buffer contigu au lieu d'un objet par valeur)
+    - entiers, et flottants à valeurs entières, réduits au plus petit type entier suffisant
+    - autres flottants en float32 lorsque la conversion est exacte
+
+    Les valeurs manquantes et l'égalité entre lignes sont conservées : doublons
+    et lignes incomplètes sont les mêmes qu'avant la conversion. Les colonnes
+    déjà compactes sont laissées telles quelles.
+
+    Args:
+        df: DataFrame Spotify
+        url_columns: 'intern' pour conserver les URLs, 'drop' pour les supprimer
+
+    Returns:
+        DataFrame compact
+    """
+    if url_columns == URL_DROP:
+        dropped = [column for column in SPOTIFY_URL_COLUMNS if column in df.columns]
+        if dropped:
+            df = df.drop(columns=dropped)
+    elif url_columns != URL_INTERN:
+        raise ValueError(f"Mode des colonnes URL inconnu: '{url_columns}' (valeurs possibles : 'intern', 'drop')")
+
+    memory_before = memory_usage_mb(df) if logger.isEnabledFor(logging.DEBUG) else None
+
+    dtypes = {}
+    for column in df.columns:
+        categorical = column in SPOTIFY_CATEGORY_COLUMNS or column in SPOTIFY_URL_COLUMNS
+        dtype = _compact_dtype(df[column], categorical)
+        if dtype is not None:
+            dtypes[column] = dtype
+    if dtypes:
+        df = df.astype(dtypes)
+
+    if memory_before is not None:
+        logger.debug(
+            "DataFrame compacté",
+            extra={"memory_before_mb": memory_before, "memory_after_mb": memory_usage_mb(df), "columns": len(dtypes)},
+        )
+    return df
+
+
+def memory_usage_mb(df: pd.DataFrame) -> float:
+    """Mémoire occupée par le DataFrame, chaînes comprises (memory_usage(deep=True)), en Mo."""
+    return round(df.memory_usage(deep=True).sum() / 1024 ** 2, 3)
+
+
+def load_spotify_csv(csv_path: str, processed_dir: Optional[str] = None) -> Path:
+    """
+    Convertit un CSV Spotify brut en fichier Parquet typé.
+
+    Args:
+        csv_path: Chemin du fichier CSV brut
+        processed_dir: Dossier de sortie (par défaut, dossier 'processed' voisin de 'raw')
+
+    Returns:
+        Chemin du fichier Parquet écrit
+
+    Raises:
+        FileNotFoundError: Si le fichier CSV n'existe pas
+    """
+    path = Path(csv_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Le fichier {csv_path} n'existe pas")
+
+    output_path = get_processed_path(csv_path, processed_dir)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    raw = pd.read_csv(path)
+    memory_before = memory_usage_mb(raw)
+    df = apply_spotify_schema(raw)
+    del raw
+
+    # Écriture dans un fichier temporaire puis renommage atomique
+    tmp_path = output_path.with_suffix(".parquet.tmp")
+    df.to_parquet(tmp_path, index=False)
+    tmp_path.replace(output_path)
+
+    logger.info(
+        "CSV converti en Parquet",
+        extra={
+            "source": path.name,
+            "output": str(output_path),
+            "rows": df.shape[0],
+            "columns": df.shape[1],
+            "memory_before_mb": memory_before,
+            "memory_after_mb": memory_usage_mb(df),
+        },
+    )
+    return output_path
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """
+    Verrou exclusif inter-processus associé à un fichier (<fichier>.lock).
+
+    Sans effet si fcntl est absent (Windows) : les écritures concurrentes
+    restent alors possibles.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    with open(path.with_name(f"{path.name}.lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def publish_spotify_arrow(file_path: str) -> Path:
+    """
+    Publie un dataset au format Arrow IPC non compressé, pour être projeté en mémoire.
+
+    Les workers lisent ce fichier par mmap en lecture seule, sans copie : les
+    pages sont partagées entre processus par le cache du système. Un seul
+    processus convertit le dataset (verrou de fichier), les autres attendent
+    puis réutilisent le fichier publié. Le fichier est écrit à côté puis
+    renommé atomiquement : un worker qui projette encore l'ancienne version la
+    garde intacte jusqu'à ce qu'il la relâche.
+
+    Les flottants sont écrits sans masque de validité (NaN conservés comme
+    valeurs) pour rester lisibles sans copie.
+
+    Args:
+        file_path: Chemin du CSV brut (ou du Parquet d'un dataset sans CSV)
+
+    Returns:
+        Chemin du fichier Arrow publié
+
+    Raises:
+        FileNotFoundError: Si le fichier n'existe pas
+    """
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Le fichier {file_path} n'existe pas")
+
+    output_path = get_published_path(file_path)
+    if is_up_to_date(output_path, path):
+        return output_path
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with file_lock(output_path):
+        # Un autre worker a pu publier le fichier pendant l'attente du verrou
+        if is_up_to_date(output_path, path):
+            return output_path
+
+        df = _read_for_publication(path)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        for index, column in enumerate(df.columns):
+            if df[column].dtype.kind == "f":
+                values = pa.array(df[column].to_numpy(), from_pandas=False)
+                table = table.set_column(index, pa.field(column, values.type), values)
+
+        tmp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+        with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        tmp_path.replace(output_path)
+
+    logger.info(
+        "Dataset publié au format Arrow",
+        extra={"source": path.name, "output": str(output_path), "rows": table.num_rows, "columns": table.num_columns},
+    )
+    return output_path
+
+
+def publish_spotify_datasets(paths: Iterable[str]) -> List[Path]:
+    """
+    Publie plusieurs datasets au format Arrow (voir publish_spotify_arrow).
+
+    Un dataset dont la publication échoue est journalisé puis ignoré : il
+    sera republié à sa prochaine lecture.
+
+    Args:
+        paths: Chemins des datasets (CSV bruts ou Parquet)
+
+    Returns:
+        Liste des fichiers Arrow publiés
+    """
+    published = []
+    for file_path in paths:
+        try:
+            published.append(publish_spotify_arrow(file_path))
+        except Exception as e:
+            logger.warning("Publication Arrow échouée", extra={"source": file_path, "error": str(e)})
+    return published
+
+
+def load_all_spotify_csv(raw_dir: str = RAW_DIR, processed_dir: Optional[str] = None) -> List[Path]:
+    """
+    Convertit tous les CSV du dossier brut en fichiers Parquet.
+
+    Args:
+        raw_dir: Dossier contenant les CSV bruts
+        processed_dir: Dossier de sortie (par défaut, dossier 'processed' voisin de 'raw', seul lu par l'API)
+
+    Returns:
+        Liste des fichiers Parquet écrits
+    """
+    return [load_spotify_csv(str(csv_path), processed_dir) for csv_path in sorted(Path(raw_dir).glob("*.csv"))]
+
+
+def _read_for_publication(path: Path) -> pd.DataFrame:
+    """Lit un dataset à publier : le Parquet traité s'il est à jour, sinon le CSV brut."""
+    if path.suffix == f".{PARQUET_FORMAT}":
+        return compact_spotify_frame(pd.read_parquet(path))
+
+    processed_path = get_processed_path(str(path))
+    if is_up_to_date(processed_path, path):
+        return compact_spotify_frame(pd.read_parquet(processed_path))
+    return apply_spotify_schema(pd.read_csv(path))
+
+
+def _compact_dtype(series: pd.Series, categorical: bool) -> Optional[object]:
+    """Retourne le type compact d'une colonne, ou None si elle l'est déjà (ou ne peut pas l'être)."""
+    dtype = series.dtype
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        return None
+
+    if dtype == object or isinstance(dtype, pd.StringDtype):
+        # Les catégories conservent les valeurs telles quelles, même dans une colonne mixte
+        if categorical and series.nunique() <= SPOTIFY_CATEGORY_MAX_RATIO * len(series):
+            return "category"
+        if dtype == COMPACT_STRING_DTYPE:
+            return None
+        # Colonne mixte (nombres et texte) : la convertir en chaînes changerait ses valeurs
+        if pd.api.types.infer_dtype(series, skipna=True) not in ("string", "empty"):
+            return None
+        return COMPACT_STRING_DTYPE
+
+    if not pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return None
+
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    valid = values[~np.isnan(values)]
+    if len(valid) == 0:
+        return None
+
+    if np.array_equal(valid, np.trunc(valid)):
+        # Type nullable (Int8...) si la colonne a des valeurs manquantes ou l'était déjà
+        nullable = len(valid) < len(values) or isinstance(dtype, pd.api.extensions.ExtensionDtype)
+        target = _smallest_integer_dtype(valid.min(), valid.max(), nullable)
+        return None if target is None or dtype == target else target
+
+    if dtype == np.float64 and np.array_equal(valid.astype(np.float32).astype(np.float64), valid):
+        return np.float32
+    return None
+
+
+def _integer_or_float(series: pd.Series, dtype: str) -> pd.Series:
+    """Convertit une colonne dans le type entier demandé si ses valeurs le permettent, sinon en float32."""
+    values = pd.to_numeric(series, errors="coerce")
+    valid = values.dropna().to_numpy(dtype="float64")
+    info = np.iinfo(pd.api.types.pandas_dtype(dtype).numpy_dtype)
+    if np.array_equal(valid, np.trunc(valid)) and (len(valid) == 0 or info.min <= valid.min() and valid.max() <= info.max):
+        return values.astype(dtype)
+    return values.astype("float32")
+
+
+def _smallest_integer_dtype(low: float, high: float, nullable: bool) -> Optional[str]:
+    """Plus petit type entier contenant [low, high] ('int8', 'Int16'...), None si aucun."""
+    for name in ("int8", "int16", "int32", "int64"):
+        info = np.iinfo(name)
+        if info.min <= low and high <= info.max:
+            return name.capitalize() if nullable else name
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convertit les CSV Spotify bruts en fichiers Parquet typés.")
+    parser.add_argument("--raw-dir", default=RAW_DIR, help="Dossier des CSV bruts")
+    parser.add_argument(
+        "--publish-arrow",
+        action="store_true",
+        help="Publie aussi chaque dataset au format Arrow, projeté en mémoire par les workers",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+    load_all_spotify_csv(args.raw_dir)
+    if args.publish_arrow:
+        publish_spotify_datasets(str(csv_path) for csv_path in sorted(Path(args.raw_dir).glob("*.csv")))
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from src.transformers.transformer_spotify import TOP_DECADES, TOP_GENRES, TOP_SUBGENRES
+
+if TYPE_CHECKING:
+    from src.transformers.spotify_analytics import SpotifyAnalytics
+
+# Mode de service des routers : 'lazy' (calcul à la demande) ou 'materialized' (lecture du store)
+LAZY_MODE = "lazy"
+MATERIALIZED_MODE = "materialized"
+OPENSOUND_SERVING_MODE = os.getenv("OPENSOUND_SERVING_MODE", LAZY_MODE)
+
+# Dossier du store écrit par le pipeline (python -m src.pipeline)
+MATERIALIZED_DIR = os.getenv("MATERIALIZED_DIR", "data/processed/materialized")
+STORE_FILENAME = "store.json"
+STORE_VERSION = 2
+
+
+def combination_key(names: Iterable[str]) -> str:
+    """Clé d'une combinaison de datasets, indépendante de l'ordre (ex: 'high+low')."""
+    return "+".join(sorted(set(names)))
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """Empreinte SHA-256 du contenu d'un fichier, lu par blocs."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def payload_sha256(payload: Any) -> str:
+    """Empreinte SHA-256 d'un document JSON (clés triées)."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class MaterializedStore:
+    """
+    Résultats des endpoints précalculés par le pipeline hors ligne.
+
+    Le store est un unique document JSON compact (store.json) :
+      - 'inputs' : empreinte de contenu de chaque fichier source (exécutions incrémentales) ;
+      - 'spotify' : pour chaque combinaison de datasets, le classement complet des
+        genres, sous-genres et décennies (tout top_n est une tranche du
+        classement), la corrélation, la popularité moyenne et les erreurs ;
+      - 'deezer_chart' : le chart enrichi et sa date de récupération.
+    Les analyses partielles de chaque dataset sont conservées à côté (partials/)
+    pour recalculer les combinaisons sans relire les datasets inchangés.
+
+    En lecture, le document est gardé en mémoire et rechargé seulement si le
+    fichier change (date de modification et taille).
+    """
+
+    def __init__(self, directory: str = MATERIALIZED_DIR):
+        """
+        Args:
+            directory: Dossier du store
+        """
+        self.directory = Path(directory)
+        self.path = self.directory / STORE_FILENAME
+        self._document: Optional[Dict[str, Any]] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        """
+        Retourne le document du store (None s'il n'a pas encore été écrit).
+
+        Le fichier n'est relu que s'il a changé depuis la dernière lecture.
+        """
+        signature = self.version()
+        if signature is None:
+            return None
+
+        with self._lock:
+            if signature != self._signature:
+                self._document = json.loads(self.path.read_text())
+                self._signature = signature
+            return self._document
+
+    def version(self) -> Optional[Tuple[int, int]]:
+        """Signature (mtime, taille) du fichier du store, None s'il n'existe pas."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def write(self, document: Dict[str, Any]) -> Path:
+        """Écrit le document du store (fichier temporaire puis renommage atomique)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        document = {**document, "version": STORE_VERSION, "generated_at": time.time()}
+        tmp_path = self.path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(document, ensure_ascii=False, separators=(",", ":")))
+        tmp_path.replace(self.path)
+        return self.path
+
+    def spotify_summary(
+        self,
+        names: Iterable[str],
+        metrics: Iterable[str],
+        top_n_genres: int = 3,
+        top_n_decades: int = 3,
+        top_n_subgenres: int = 3,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Retourne les statistiques précalculées d'une combinaison de datasets.
+
+        Même format que summarize_spotify_analytics : les classements stockés
+        sont tronqués à top_n (tranche de liste, sans calcul).
+
+        Args:
+            names: Datasets analysés ensemble
+            metrics: Statistiques demandées
+            top_n_genres: Nombre de genres à retourner
+            top_n_decades: Nombre de décennies à retourner
+            top_n_subgenres: Nombre de sous-genres à retourner
+
+        Returns:
+            Dict des statistiques, ou None si la combinaison n'est pas matérialisée
+        """
+        document = self.read()
+        entry = (document or {}).get("spotify", {}).get(combination_key(names))
+        if entry is None:
+            return None
+
+        summary: Dict[str, Any] = {"total_tracks_analyzed": entry["total_tracks_analyzed"], "errors": {}}
+        for metric in dict.fromkeys(metrics):
+            if metric in entry["errors"]:
+                summary["errors"][metric] = entry["errors"][metric]
+            elif metric not in entry:
+                # Store écrit par une version antérieure du pipeline
+                summary["errors"][metric] = "Statistique non matérialisée : relancer python -m src.pipeline."
+            elif metric == TOP_GENRES:
+                summary[metric] = dict(entry[metric][:top_n_genres])
+            elif metric == TOP_SUBGENRES:
+                summary[metric] = dict(entry[metric][:top_n_subgenres])
+            elif metric == TOP_DECADES:
+                summary[metric] = {int(decade): value for decade, value in entry[metric][:top_n_decades]}
+            else:
+                summary[metric] = entry[metric]
+        return summary
+
+    def deezer_chart(self) -> Optional[Dict[str, Any]]:
+        """Retourne le chart Deezer précalculé ({'tracks', 'fetched_at'}), ou None."""
+        return (self.read() or {}).get("deezer_chart")
+
+    def partial_path(self, name: str) -> Path:
+        """Chemin de l'analyse partielle d'un dataset."""
+        return self.directory / "partials" / f"{name}.pkl"
+
+    def save_partial(self, name: str, analytics: SpotifyAnalytics) -> None:
+        """Conserve l'analyse partielle d'un dataset pour les exécutions suivantes."""
+        path = self.partial_path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".pkl.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(analytics, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    def load_partial(self, name: str) -> Optional[SpotifyAnalytics]:
+        """Retourne l'analyse partielle conservée d'un dataset, ou None (absente ou d'une version antérieure)."""
+        from src.transformers.spotify_analytics import is_current_analytics
+
+        path = self.partial_path(name)
+        if not path.exists():
+            return None
+        with open(path, "rb") as f:
+            analytics = pickle.load(f)
+        return analytics if is_current_analytics(analytics) else None
+
+    def remove_partials(self, keep: List[str]) -> None:
+        """Supprime les analyses partielles des datasets qui ne sont plus au catalogue."""
+        for path in (self.directory / "partials").glob("*.pkl"):
+            if path.stem not in keep:
+                path.unlink()
+
+
+# Store lu par les routers en mode matérialisé
+materialized_store = MaterializedStore()
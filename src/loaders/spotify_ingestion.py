@@ -0,0 +1,368 @@
+import argparse
+import io
+import json
+import logging
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.extractors.dataset_catalog import DatasetCatalog
+from src.extractors.extractor_spotify import iter_spotify_chunks
+from src.loaders.loader_spotify import file_lock, get_processed_path
+from src.observability.logs import configure_logging
+from src.transformers.spotify_analytics import (
+    SPOTIFY_STREAMING_CHUNKSIZE,
+    SpotifyAnalytics,
+    SpotifyAnalyticsAccumulator,
+    analyze_spotify_file,
+    is_current_analytics,
+    merge_spotify_analytics,
+)
+
+logger = logging.getLogger(__name__)
+
+TRACK_ID_COLUMN = "track_id"
+
+# Fichiers d'état de l'ingestion, dans le dossier des fichiers traités
+STATE_FORMAT = "ingest.pkl"
+TRACK_INDEX_FORMAT = "track_ids"
+
+CSV_BATCH = "csv"
+JSON_BATCH = "json"
+
+
+class TrackIdIndex:
+    """
+    Index des empreintes 64 bits des track_id d'un dataset.
+
+    L'index est une suite de tableaux triés (un fichier .npy par tableau,
+    projeté en mémoire à la lecture). Chaque ajout écrit un nouveau tableau
+    de la taille du lot, puis les deux derniers tableaux sont fusionnés tant
+    que le plus récent n'est pas nettement plus petit que le précédent : une
+    empreinte est réécrite O(log n) fois au total, le coût amorti d'un ajout
+    reste proportionnel au lot. Les fichiers sont écrits sous de nouveaux
+    noms ; l'état de l'ingestion, enregistré ensuite, indique ceux en vigueur.
+    """
+
+    def __init__(self, directory: Path, runs: Optional[List[str]] = None, next_run: int = 0):
+        """
+        Args:
+            directory: Dossier des fichiers de l'index
+            runs: Fichiers des tableaux triés, du plus ancien au plus récent
+            next_run: Numéro du prochain fichier écrit
+        """
+        self.directory = directory
+        self.runs = list(runs or [])
+        self.next_run = next_run
+        self._arrays = [np.load(directory / name, mmap_mode="r") for name in self.runs]
+
+    def __len__(self) -> int:
+        return sum(len(array) for array in self._arrays)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """Masque des empreintes déjà présentes dans l'index."""
+        found = np.zeros(len(hashes), dtype=bool)
+        for array in self._arrays:
+            found |= _sorted_contains(array, hashes)
+        return found
+
+    def add(self, hashes: np.ndarray) -> None:
+        """Ajoute des empreintes absentes de l'index (sans doublons)."""
+        if len(hashes) == 0:
+            return
+        self._append_run(np.sort(hashes))
+        while len(self._arrays) >= 2 and len(self._arrays[-2]) <= 2 * len(self._arrays[-1]):
+            # Deux suites triées : le tri stable (timsort / radix) les fusionne en temps linéaire
+            merged = np.sort(np.concatenate([self._arrays.pop(), self._arrays.pop()]), kind="stable")
+            del self.runs[-2:]
+            self._append_run(merged)
+
+    def remove_unused_files(self) -> None:
+        """Supprime les fichiers qui ne font plus partie de l'index."""
+        for path in self.directory.glob("*.npy"):
+            if path.name not in self.runs:
+                path.unlink()
+
+    def _append_run(self, array: np.ndarray) -> None:
+        """Écrit un tableau trié dans un nouveau fichier et l'ajoute à l'index."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = f"{self.next_run}.npy"
+        self.next_run += 1
+        np.save(self.directory / name, array)
+        self.runs.append(name)
+        self._arrays.append(np.load(self.directory / name, mmap_mode="r"))
+
+
+@dataclass
+class IngestionState:
+    """
+    Agrégats d'un dataset maintenus par l'ingestion, pour une version du fichier.
+
+    La signature (mtime, taille) est celle du CSV après le dernier ajout :
+    si le fichier a été modifié autrement, l'état est reconstruit.
+    """
+
+    signature: Tuple[int, int]
+    columns: List[str]
+    analytics: SpotifyAnalytics
+    date_format: Optional[str] = None
+    date_format_known: bool = False
+    index_runs: List[str] = field(default_factory=list)
+    index_next_run: int = 0
+
+
+def append_spotify_tracks(file_path: str, batch: pd.DataFrame) -> Dict[str, int]:
+    """
+    Ajoute de nouveaux morceaux à la fin du CSV d'un dataset.
+
+    Les lignes sans track_id et celles dont le track_id est déjà présent
+    (dans le dataset ou plus haut dans le lot) sont ignorées. Les agrégats
+    stockés (sommes et effectifs par genre, sous-genre et décennie, co-moments de la
+    corrélation) sont mis à jour à partir du lot seul, sans relire le fichier :
+    le coût d'un ajout est proportionnel à la taille du lot. La première fois
+    (ou si le fichier a été modifié hors ingestion), l'état est construit en
+    une lecture du fichier complet.
+
+    Args:
+        file_path: Chemin du CSV du dataset
+        batch: Morceaux à ajouter (colonnes du dataset, toutes facultatives sauf track_id)
+
+    Returns:
+        Bilan : lignes reçues, ajoutées, doublons, sans track_id, total du dataset
+
+    Raises:
+        FileNotFoundError: Si le fichier n'existe pas
+        ValueError: Si le dataset n'est pas un CSV ou si le lot a des colonnes inconnues
+    """
+    path = Path(file_path)
+    if path.suffix != ".csv":
+        raise ValueError(f"Seuls les datasets CSV acceptent l'ajout de lignes : {path.name}")
+    if not path.exists():
+        raise FileNotFoundError(f"Le fichier {file_path} n'existe pas")
+
+    with file_lock(path):
+        state, index = _load_state(path)
+        if state is None:
+            state, index = _build_state(path)
+
+        unknown = [column for column in batch.columns if column not in state.columns]
+        if unknown:
+            raise ValueError(f"Colonnes inconnues du dataset: {unknown}")
+        if TRACK_ID_COLUMN not in batch.columns:
+            raise ValueError(f"Colonne manquante: '{TRACK_ID_COLUMN}'")
+
+        # Mêmes valeurs texte que celles relues depuis le fichier (lecture par blocs)
+        rows = _as_csv_rows(batch, state.columns)
+        has_track_id = rows[TRACK_ID_COLUMN].notna().to_numpy()
+        rows = rows[has_track_id]
+
+        hashes = _hash_track_ids(rows[TRACK_ID_COLUMN])
+        new_rows = ~pd.Series(hashes).duplicated().to_numpy() & ~index.contains(hashes)
+        rows = rows[new_rows]
+
+        if len(rows):
+            _append_csv_rows(path, rows)
+            accumulator = SpotifyAnalyticsAccumulator(state.date_format, state.date_format_known)
+            accumulator.update(rows)
+            state.analytics = merge_spotify_analytics([state.analytics, accumulator.result()])
+            state.date_format = accumulator.date_format
+            state.date_format_known = accumulator.date_format_known
+            index.add(hashes[new_rows])
+
+        state.signature = _file_signature(path)
+        _save_state(path, state, index)
+
+    report = {
+        "received": len(batch),
+        "appended": len(rows),
+        "duplicates": int(has_track_id.sum()) - len(rows),
+        "missing_track_id": int((~has_track_id).sum()),
+        "total_tracks": state.analytics.total_tracks,
+    }
+    logger.info("Morceaux ajoutés au dataset", extra={"file": path.name, **report})
+    return report
+
+
+def get_spotify_analytics(file_path: str) -> SpotifyAnalytics:
+    """
+    Retourne les analyses d'un dataset, depuis l'état de l'ingestion s'il est à jour.
+
+    Sinon (dataset jamais alimenté par l'ingestion, fichier modifié depuis),
+    le fichier est analysé complètement (voir analyze_spotify_file).
+
+    Args:
+        file_path: Chemin vers le fichier CSV (ou Parquet)
+
+    Returns:
+        SpotifyAnalytics du fichier
+    """
+    path = Path(file_path)
+    if path.suffix == ".csv":
+        state = _read_state(path)
+        if (
+            state is not None
+            and state.signature == _file_signature(path)
+            and is_current_analytics(state.analytics)
+        ):
+            return state.analytics
+    return analyze_spotify_file(file_path)
+
+
+def parse_spotify_batch(data: bytes, batch_format: str) -> pd.DataFrame:
+    """
+    Lit un lot de morceaux à ajouter.
+
+    Args:
+        data: Contenu du lot
+        batch_format: 'csv' (fragment avec ligne d'en-tête) ou 'json'
+            (liste d'objets, ou objet {"tracks": [...]})
+
+    Returns:
+        DataFrame des morceaux du lot
+
+    Raises:
+        ValueError: Si le contenu ne peut pas être lu
+    """
+    if batch_format == CSV_BATCH:
+        try:
+            return pd.read_csv(io.BytesIO(data), dtype=str)
+        except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError) as e:
+            raise ValueError(f"Fragment CSV invalide: {e}")
+
+    if batch_format != JSON_BATCH:
+        raise ValueError(f"Format de lot inconnu: '{batch_format}' (valeurs possibles : 'csv', 'json')")
+    try:
+        payload = json.loads(data)
+    except ValueError as e:
+        raise ValueError(f"JSON invalide: {e}")
+
+    tracks = payload.get("tracks") if isinstance(payload, dict) else payload
+    if not isinstance(tracks, list) or not all(isinstance(track, dict) for track in tracks):
+        raise ValueError("Le lot JSON doit être une liste d'objets ou un objet {\"tracks\": [...]}")
+    return pd.DataFrame.from_records(tracks)
+
+
+def _load_state(path: Path) -> Tuple[Optional[IngestionState], Optional[TrackIdIndex]]:
+    """Retourne l'état de l'ingestion et son index s'ils correspondent au fichier actuel."""
+    state = _read_state(path)
+    if state is None or state.signature != _file_signature(path) or not is_current_analytics(state.analytics):
+        return None, None
+    try:
+        index = TrackIdIndex(_index_dir(path), state.index_runs, state.index_next_run)
+    except (FileNotFoundError, ValueError):
+        return None, None
+    return state, index
+
+
+def _build_state(path: Path) -> Tuple[IngestionState, TrackIdIndex]:
+    """Construit l'état de l'ingestion en une lecture par blocs du fichier complet."""
+    logger.info("Construction de l'état d'ingestion", extra={"file": path.name})
+    accumulator = SpotifyAnalyticsAccumulator()
+    hashes = []
+    for chunk in iter_spotify_chunks(str(path), SPOTIFY_STREAMING_CHUNKSIZE):
+        accumulator.update(chunk)
+        if TRACK_ID_COLUMN in chunk.columns:
+            hashes.append(_hash_track_ids(chunk[TRACK_ID_COLUMN].dropna()))
+
+    columns = list(pd.read_csv(path, nrows=0).columns)
+    if TRACK_ID_COLUMN not in columns:
+        raise ValueError(f"Le dataset n'a pas de colonne '{TRACK_ID_COLUMN}' : {path.name}")
+
+    # Les fichiers d'un index précédent ne sont plus référencés par aucun état valide
+    index = TrackIdIndex(_index_dir(path))
+    index.remove_unused_files()
+    if hashes:
+        index.add(np.unique(np.concatenate(hashes)))
+
+    state = IngestionState(
+        signature=_file_signature(path),
+        columns=columns,
+        analytics=accumulator.result(),
+        date_format=accumulator.date_format,
+        date_format_known=accumulator.date_format_known,
+    )
+    return state, index
+
+
+def _read_state(path: Path) -> Optional[IngestionState]:
+    """Lit l'état de l'ingestion d'un dataset, ou None."""
+    try:
+        with open(get_processed_path(str(path), file_format=STATE_FORMAT), "rb") as f:
+            return pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def _save_state(path: Path, state: IngestionState, index: TrackIdIndex) -> None:
+    """Enregistre l'état (fichier temporaire puis renommage atomique), puis nettoie l'index."""
+    state.index_runs = list(index.runs)
+    state.index_next_run = index.next_run
+    state_path = get_processed_path(str(path), file_format=STATE_FORMAT)
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_suffix(".pkl.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path.replace(state_path)
+    index.remove_unused_files()
+
+
+def _index_dir(path: Path) -> Path:
+    """Dossier de l'index des track_id d'un dataset."""
+    return get_processed_path(str(path), file_format=TRACK_INDEX_FORMAT)
+
+
+def _file_signature(path: Path) -> Tuple[int, int]:
+    """Signature (mtime, taille) d'un fichier."""
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _hash_track_ids(track_ids: pd.Series) -> np.ndarray:
+    """Empreintes 64 bits des track_id (valeurs texte)."""
+    return pd.util.hash_array(track_ids.to_numpy(dtype=object))
+
+
+def _sorted_contains(array: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Masque des valeurs présentes dans un tableau trié."""
+    positions = np.searchsorted(array, values)
+    found = np.zeros(len(values), dtype=bool)
+    inside = positions < len(array)
+    found[inside] = array[positions[inside]] == values[inside]
+    return found
+
+
+def _as_csv_rows(batch: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """Lignes du lot dans l'ordre des colonnes du dataset, converties en texte comme à la lecture du CSV."""
+    text = batch.reindex(columns=columns).to_csv(index=False, header=False, lineterminator="\n")
+    if not text.strip():
+        return pd.DataFrame(columns=columns, dtype=object)
+    return pd.read_csv(io.StringIO(text), header=None, names=columns, dtype=str)
+
+
+def _append_csv_rows(path: Path, rows: pd.DataFrame) -> None:
+    """Ajoute des lignes à la fin du CSV (après un saut de ligne s'il manque)."""
+    text = rows.to_csv(index=False, header=False, lineterminator="\n")
+    with open(path, "rb+") as f:
+        f.seek(0, io.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, io.SEEK_END)
+            if f.read(1) != b"\n":
+                text = "\n" + text
+        f.write(text.encode("utf-8"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ajoute des morceaux (fragment CSV ou lot JSON) à un dataset Spotify.")
+    parser.add_argument("--dataset", required=True, help="Nom du dataset dans le catalogue (ex: 'high')")
+    parser.add_argument("batch", help="Fichier du lot (.csv ou .json)")
+    args = parser.parse_args()
+
+    configure_logging()
+    dataset_path = DatasetCatalog().resolve([args.dataset])[args.dataset]
+    batch_path = Path(args.batch)
+    batch_df = parse_spotify_batch(batch_path.read_bytes(), JSON_BATCH if batch_path.suffix == ".json" else CSV_BATCH)
+    print(json.dumps(append_spotify_tracks(dataset_path, batch_df)))
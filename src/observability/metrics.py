@@ -0,0 +1,186 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Bornes (secondes) des histogrammes de durée
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Type MIME de l'exposition Prometheus au format texte
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+class Histogram:
+    """
+    Histogramme cumulatif au format Prometheus, étiqueté par labels.
+
+    Une observation coûte une recherche dichotomique et trois additions sous
+    verrou : l'instrumentation reste utilisable dans les chemins critiques.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            name: Nom de la métrique
+            documentation: Description (ligne HELP)
+            labelnames: Noms des labels
+            buckets: Bornes supérieures des buckets (croissantes)
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelValues, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Enregistre une valeur pour la série désignée par les labels."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Compteurs par bucket (+Inf compris), somme, nombre d'observations
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        """Retourne les lignes de l'exposition Prometheus."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in sorted(series):
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Counter:
+    """Compteur monotone au format Prometheus, étiqueté par labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        """
+        Args:
+            name: Nom de la métrique (suffixe _total recommandé)
+            documentation: Description (ligne HELP)
+            labelnames: Noms des labels
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Incrémente la série désignée par les labels."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        """Retourne les lignes de l'exposition Prometheus."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(list(zip(self.labelnames, key)))} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Registre des métriques exposées sur /metrics.
+
+    En plus des histogrammes et compteurs, des statistiques existantes (caches,
+    datasets) sont lues au moment de l'export via des fonctions enregistrées :
+    elles n'ajoutent aucun coût aux chemins critiques.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._stats: List[Tuple[str, str, Callable[[], Dict[str, Dict[str, float]]]]] = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        """Crée (ou retourne s'il existe déjà) un histogramme."""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+            return self._metrics[name]
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        """Crée (ou retourne s'il existe déjà) un compteur."""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, documentation, labelnames)
+            return self._metrics[name]
+
+    def register_stats(self, prefix: str, label: str, stats: Callable[[], Dict[str, Dict[str, float]]]) -> None:
+        """
+        Expose des statistiques imbriquées sous forme de gauges.
+
+        Exemple : register_stats("opensound_deezer_cache", "tier", cache.stats) produit
+        opensound_deezer_cache_hits{tier="memory"} 12, etc.
+
+        Args:
+            prefix: Préfixe des noms de métriques
+            label: Nom du label portant la clé de premier niveau
+            stats: Fonction retournant {clé: {statistique: valeur}}
+        """
+        with self._lock:
+            self._stats = [entry for entry in self._stats if entry[0] != prefix]
+            self._stats.append((prefix, label, stats))
+
+    def render(self) -> str:
+        """Retourne l'exposition Prometheus complète (format texte)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            stats = list(self._stats)
+
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for prefix, label, function in stats:
+            lines.extend(_render_stats(prefix, label, function()))
+        return "\n".join(lines) + "\n"
+
+
+def _render_stats(prefix: str, label: str, stats: Dict[str, Dict[str, float]]) -> List[str]:
+    """Convertit {clé: {statistique: valeur}} en gauges Prometheus."""
+    by_metric: Dict[str, List[str]] = {}
+    for key, values in sorted(stats.items()):
+        for stat, value in values.items():
+            # Booléens exportés en 0/1, comme toute valeur numérique
+            sample = f"{prefix}_{stat}{_format_labels([(label, key)])} {float(value):g}"
+            by_metric.setdefault(f"{prefix}_{stat}", []).append(sample)
+
+    lines = []
+    for name, samples in by_metric.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(samples)
+    return lines
+
+
+def _format_labels(labels: List[Tuple[str, str]]) -> str:
+    """Formate les labels Prometheus ({a="x",b="y"})."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels) + "}"
+
+
+def _escape_label(value: str) -> str:
+    """Échappe une valeur de label (antislash, guillemet, retour à la ligne)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Registre global de l'application
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,144 @@
+import cProfile
+import functools
+import inspect
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.observability.metrics import REGISTRY
+
+STAGE_DURATION = REGISTRY.histogram(
+    "opensound_stage_duration_seconds",
+    "Durée des étapes d'extraction, de transformation et des appels Deezer",
+    ["stage"],
+)
+
+
+@dataclass
+class RequestTrace:
+    """Étapes mesurées pendant une requête, et profils cProfile si le profilage est demandé."""
+
+    profile: bool = False
+    spans: List[Tuple[str, float]] = field(default_factory=list)
+    profiles: List[cProfile.Profile] = field(default_factory=list)
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Durée cumulée (secondes) par étape, dans l'ordre de première apparition."""
+        totals: Dict[str, float] = {}
+        for name, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+        return totals
+
+    def profile_summary(self, limit: int = 30) -> str:
+        """Résumé cProfile (fonctions triées par temps cumulé) de tous les threads profilés."""
+        if not self.profiles:
+            return ""
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiles[0], stream=stream)
+        for profiler in self.profiles[1:]:
+            stats.add(profiler)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("opensound_request_trace", default=None)
+_thread_state = threading.local()
+
+
+def start_request_trace(profile: bool = False) -> Tuple[RequestTrace, Token]:
+    """
+    Démarre la collecte des étapes de la requête courante.
+
+    Le contexte est propagé aux tâches asyncio et aux threads de
+    run_in_threadpool : les étapes exécutées par la requête y sont rattachées.
+
+    Args:
+        profile: Active cProfile sur les threads qui exécutent la requête
+
+    Returns:
+        La trace et le jeton à passer à end_request_trace
+    """
+    trace = RequestTrace(profile=profile)
+    return trace, _current_trace.set(trace)
+
+
+def end_request_trace(token: Token) -> None:
+    """Termine la collecte démarrée par start_request_trace."""
+    _current_trace.reset(token)
+
+
+@contextmanager
+def profile_thread(trace: RequestTrace) -> Iterator[None]:
+    """
+    Profile le thread courant pour la trace, sauf s'il l'est déjà.
+
+    Un seul profileur est actif par thread : une étape imbriquée, ou une autre
+    requête profilée sur le même thread, est comptée dans le profil en cours.
+    """
+    if getattr(_thread_state, "profiling", False):
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    _thread_state.profiling = True
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _thread_state.profiling = False
+        trace.profiles.append(profiler)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Mesure une étape : histogramme /metrics et, pendant une requête, trace de la requête.
+
+    Args:
+        name: Nom de l'étape (ex: 'extract.spotify', 'deezer.fetch_album')
+    """
+    trace = _current_trace.get()
+    profiling = profile_thread(trace) if trace is not None and trace.profile else nullcontext()
+
+    start = time.perf_counter()
+    try:
+        with profiling:
+            yield
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_DURATION.observe(duration, stage=name)
+        if trace is not None:
+            trace.spans.append((name, duration))
+
+
+def timed_stage(name: str) -> Callable[[Callable], Callable]:
+    """
+    Décorateur mesurant chaque appel d'une fonction (synchrone ou asynchrone) comme une étape.
+
+    Args:
+        name: Nom de l'étape
+    """
+
+    def decorator(function: Callable) -> Callable:
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await function(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,240 @@
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+from src.extractors.dataset_catalog import (
+    SPOTIFY_PROCESSED_DIR,
+    SPOTIFY_RAW_DIR,
+    DatasetCatalog,
+    get_loader_pool,
+    shutdown_loader_pool,
+)
+from src.extractors.extractor_deezer_chart import extract_deezer_chart
+from src.loaders.deezer_chart_history import DEEZER_CHART_HISTORY_ENABLED, deezer_chart_history
+from src.loaders.loader_spotify import load_spotify_csv
+from src.loaders.materialized_store import (
+    MATERIALIZED_DIR,
+    STORE_VERSION,
+    MaterializedStore,
+    combination_key,
+    file_sha256,
+    payload_sha256,
+)
+from src.loaders.spotify_ingestion import get_spotify_analytics
+from src.observability.logs import configure_logging
+from src.transformers.deezer_genre_enricher import DeezerGenreEnricher
+from src.transformers.spotify_analytics import (
+    SPOTIFY_STREAMING_THRESHOLD_MB,
+    SpotifyAnalytics,
+    merge_spotify_analytics,
+)
+from src.transformers.transformer_deezer_chart import transform_deezer_chart_async
+from src.transformers.transformer_spotify import (
+    SPOTIFY_METRICS,
+    TOP_DECADES,
+    TOP_GENRES,
+    TOP_SUBGENRES,
+    summarize_spotify_analytics,
+)
+
+logger = logging.getLogger(__name__)
+
+# Au-delà de ce nombre de datasets, seuls chaque dataset et 'all' sont matérialisés
+PIPELINE_MAX_COMBINATION_DATASETS = int(os.getenv("PIPELINE_MAX_COMBINATION_DATASETS", "6"))
+
+# Classement complet : tout top_n demandé à l'API en est une tranche
+FULL_RANKING = 2 ** 31 - 1
+
+
+def run_pipeline(
+    raw_dir: str = SPOTIFY_RAW_DIR,
+    store_dir: str = MATERIALIZED_DIR,
+    include_deezer: bool = True,
+    force: bool = False,
+) -> Dict[str, Any]:
+    """
+    Exécute l'ETL complet et matérialise les résultats des endpoints.
+
+    Spotify : chaque dataset dont le contenu a changé (empreinte SHA-256) est
+    converti en Parquet puis analysé ; les combinaisons de datasets sont
+    ensuite fusionnées à partir des analyses partielles. Deezer : le chart est
+    récupéré et n'est ré-enrichi que si son contenu a changé ; il est ajouté à
+    l'historique du chart.
+
+    Les datasets sont ceux du catalogue de l'API : les CSV de raw_dir et les
+    Parquet sans CSV de SPOTIFY_PROCESSED_DIR. Le Parquet d'un CSV est écrit,
+    comme tous ses fichiers traités, dans le dossier 'processed' voisin de
+    son dossier brut (voir get_processed_path).
+
+    Args:
+        raw_dir: Dossier des CSV bruts
+        store_dir: Dossier du store matérialisé
+        include_deezer: Récupère et enrichit aussi le chart Deezer
+        force: Recalcule tout, même les entrées inchangées
+
+    Returns:
+        Bilan de l'exécution (datasets recalculés, ignorés, combinaisons, chart)
+    """
+    store = MaterializedStore(store_dir)
+    previous = {} if force else (store.read() or {})
+    if previous.get("version") != STORE_VERSION:
+        # Store d'une version antérieure : les combinaisons sont recalculées
+        previous = {key: value for key, value in previous.items() if key != "spotify"}
+    catalog = DatasetCatalog(raw_dir, SPOTIFY_PROCESSED_DIR)
+    paths = catalog.discover()
+
+    inputs, partials, changed = _run_spotify_datasets(store, paths, previous.get("inputs", {}), get_loader_pool())
+    spotify = _materialize_combinations(partials, changed, previous.get("spotify", {}))
+    store.remove_partials(keep=list(paths))
+
+    deezer_chart = previous.get("deezer_chart")
+    deezer_status = "skipped"
+    if include_deezer:
+        deezer_chart, deezer_status = _run_deezer_chart(deezer_chart)
+        # Le chart récupéré (nouveau ou inchangé) alimente l'historique, comme en mode 'lazy'
+        if deezer_status != "failed" and DEEZER_CHART_HISTORY_ENABLED:
+            deezer_chart_history.append(deezer_chart["tracks"], deezer_chart["fetched_at"])
+
+    store.write({"inputs": inputs, "spotify": spotify, "deezer_chart": deezer_chart})
+
+    report = {
+        "datasets_recomputed": sorted(changed),
+        "datasets_unchanged": sorted(set(paths) - changed),
+        "combinations": len(spotify),
+        "deezer_chart": deezer_status,
+        "store": str(store.path),
+    }
+    logger.info("Pipeline terminé", extra=report)
+    return report
+
+
+def _run_spotify_datasets(
+    store: MaterializedStore,
+    paths: Dict[str, str],
+    previous_inputs: Dict[str, Dict[str, Any]],
+    executor: Optional[Executor],
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, SpotifyAnalytics], Set[str]]:
+    """
+    Convertit et analyse les datasets dont le contenu a changé.
+
+    Returns:
+        (empreintes des entrées, analyses partielles par dataset, noms recalculés)
+    """
+    inputs: Dict[str, Dict[str, Any]] = {}
+    partials: Dict[str, SpotifyAnalytics] = {}
+    pending: Dict[str, str] = {}
+
+    for name, file_path in paths.items():
+        digest = file_sha256(file_path)
+        inputs[name] = {"path": file_path, "sha256": digest, "size": Path(file_path).stat().st_size}
+
+        partial = None
+        if previous_inputs.get(name, {}).get("sha256") == digest:
+            partial = store.load_partial(name)
+        if partial is not None:
+            partials[name] = partial
+        else:
+            pending[name] = file_path
+
+    for name, file_path in pending.items():
+        path = Path(file_path)
+        # Étape load : Parquet typé, sauf pour les CSV analysés en streaming
+        if path.suffix == ".csv" and path.stat().st_size <= SPOTIFY_STREAMING_THRESHOLD_MB * 1024 ** 2:
+            load_spotify_csv(file_path)
+
+    if executor is not None and len(pending) > 1:
+        results = dict(zip(pending, executor.map(get_spotify_analytics, pending.values())))
+    else:
+        results = {name: get_spotify_analytics(file_path) for name, file_path in pending.items()}
+
+    for name, analytics in results.items():
+        store.save_partial(name, analytics)
+        partials[name] = analytics
+        logger.info("Dataset analysé", extra={"dataset": name, "rows": analytics.total_tracks})
+
+    return inputs, partials, set(pending)
+
+
+def _materialize_combinations(
+    partials: Dict[str, SpotifyAnalytics],
+    changed: Set[str],
+    previous: Dict[str, Dict[str, Any]],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Calcule les classements complets de chaque combinaison de datasets.
+
+    Toutes les combinaisons sont matérialisées jusqu'à
+    PIPELINE_MAX_COMBINATION_DATASETS datasets, sinon seulement chaque dataset
+    et l'ensemble. Une combinaison dont aucun dataset n'a changé est reprise
+    telle quelle.
+    """
+    names = sorted(partials)
+    if len(names) <= PIPELINE_MAX_COMBINATION_DATASETS:
+        combinations = [
+            list(combination) for size in range(1, len(names) + 1) for combination in itertools.combinations(names, size)
+        ]
+    else:
+        combinations = [[name] for name in names] + [names]
+
+    spotify: Dict[str, Dict[str, Any]] = {}
+    for combination in combinations:
+        key = combination_key(combination)
+        if key in previous and not changed.intersection(combination):
+            spotify[key] = previous[key]
+            continue
+
+        analytics = merge_spotify_analytics([partials[name] for name in combination])
+        summary = summarize_spotify_analytics(analytics, SPOTIFY_METRICS, FULL_RANKING, FULL_RANKING, FULL_RANKING)
+        spotify[key] = {
+            "datasets": combination,
+            **summary,
+            # Listes de paires : l'ordre du classement et le type des clés sont conservés
+            **{metric: list(summary[metric].items()) for metric in (TOP_GENRES, TOP_SUBGENRES, TOP_DECADES) if metric in summary},
+        }
+    return spotify
+
+
+def _run_deezer_chart(previous: Optional[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Récupère le chart Deezer et l'enrichit s'il a changé.
+
+    Returns:
+        (chart matérialisé, statut 'refreshed' | 'unchanged' | 'failed')
+    """
+    try:
+        raw_data = extract_deezer_chart()
+    except Exception as e:
+        logger.warning("Chart Deezer indisponible, chart précédent conservé", extra={"error": str(e)})
+        return previous, "failed"
+
+    digest = payload_sha256(raw_data["tracks"]["data"])
+    if previous is not None and previous.get("sha256") == digest:
+        return {**previous, "fetched_at": time.time()}, "unchanged"
+
+    async def enrich():
+        async with DeezerGenreEnricher() as enricher:
+            return await transform_deezer_chart_async(raw_data, enricher)
+
+    tracks = asyncio.run(enrich())
+    return {"tracks": tracks, "fetched_at": time.time(), "sha256": digest}, "refreshed"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ETL hors ligne : matérialise les résultats des endpoints.")
+    parser.add_argument("--raw-dir", default=SPOTIFY_RAW_DIR, help="Dossier des CSV bruts")
+    parser.add_argument("--store-dir", default=MATERIALIZED_DIR, help="Dossier du store matérialisé")
+    parser.add_argument("--skip-deezer", action="store_true", help="Ne récupère pas le chart Deezer")
+    parser.add_argument("--force", action="store_true", help="Recalcule même les entrées inchangées")
+    args = parser.parse_args()
+
+    configure_logging()
+    try:
+        run_pipeline(args.raw_dir, store_dir=args.store_dir, include_deezer=not args.skip_deezer, force=args.force)
+    finally:
+        shutdown_loader_pool()
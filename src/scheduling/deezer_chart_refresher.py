@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from src.extractors.extractor_deezer_chart import extract_deezer_chart
+from src.loaders.deezer_chart_history import DEEZER_CHART_HISTORY_ENABLED, DeezerChartHistory, deezer_chart_history
+from src.transformers.deezer_genre_enricher import DeezerGenreEnricher
+from src.transformers.transformer_deezer_chart import transform_deezer_chart_async
+
+logger = logging.getLogger(__name__)
+
+# Intervalle (secondes) entre deux rafraîchissements du chart
+DEEZER_CHART_REFRESH_INTERVAL = float(os.getenv("DEEZER_CHART_REFRESH_INTERVAL", "300"))
+
+
+@dataclass
+class ChartSnapshot:
+    """Chart Deezer enrichi, figé à la date de récupération."""
+
+    tracks: List[Dict[str, Any]]
+    fetched_at: float
+
+    @property
+    def age_seconds(self) -> float:
+        """Âge du snapshot en secondes."""
+        return time.time() - self.fetched_at
+
+
+class DeezerChartRefresher:
+    """
+    Rafraîchit le chart Deezer en tâche de fond et sert le dernier snapshot.
+
+    Le endpoint lit le snapshot en mémoire sans attendre Deezer. Si Deezer est
+    lent ou indisponible, l'ancien snapshot reste servi (stale-while-revalidate)
+    pendant qu'un nouveau rafraîchissement est tenté.
+    """
+
+    def __init__(
+        self,
+        enricher: DeezerGenreEnricher,
+        extractor: Callable[[], Dict[str, Any]] = extract_deezer_chart,
+        interval: float = DEEZER_CHART_REFRESH_INTERVAL,
+        history: Optional[DeezerChartHistory] = deezer_chart_history if DEEZER_CHART_HISTORY_ENABLED else None,
+    ):
+        """
+        Args:
+            enricher: Moteur d'enrichissement des genres
+            extractor: Fonction (synchrone) retournant le chart brut, injectable pour les tests
+            interval: Intervalle (secondes) entre deux rafraîchissements
+            history: Historique où enregistrer chaque snapshot (None : aucun)
+        """
+        self._enricher = enricher
+        self._extractor = extractor
+        self.interval = interval
+        self._history = history
+        self.snapshot: Optional[ChartSnapshot] = None
+        self.last_error: Optional[str] = None
+        self._refresh_lock = asyncio.Lock()
+        self._attempted = asyncio.Event()
+        self._revalidation: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def is_stale(self) -> bool:
+        """Indique si le snapshot est plus vieux que l'intervalle ou si le dernier rafraîchissement a échoué."""
+        return self.snapshot is None or self.last_error is not None or self.snapshot.age_seconds > self.interval
+
+    async def refresh(self) -> ChartSnapshot:
+        """
+        Récupère et enrichit le chart, puis remplace le snapshot.
+
+        Un seul rafraîchissement s'exécute à la fois : les appels concurrents
+        attendent le rafraîchissement en cours.
+
+        Raises:
+            Exception: Si l'extraction ou la transformation échoue
+        """
+        started_at = time.time()
+        async with self._refresh_lock:
+            # Un rafraîchissement terminé pendant l'attente suffit
+            if self.snapshot is not None and self.snapshot.fetched_at >= started_at:
+                return self.snapshot
+            try:
+                raw_data = await asyncio.to_thread(self._extractor)
+                tracks = await transform_deezer_chart_async(raw_data, self._enricher)
+            except Exception as e:
+                self.last_error = str(e)
+                raise
+            finally:
+                self._attempted.set()
+            self.snapshot = ChartSnapshot(tracks=tracks, fetched_at=time.time())
+            self.last_error = None
+            await self._record(self.snapshot)
+            return self.snapshot
+
+    async def wait_first_refresh(self) -> ChartSnapshot:
+        """
+        Attend la fin du premier rafraîchissement, sans en lancer un autre (préchauffage).
+
+        Raises:
+            RuntimeError: Si le premier rafraîchissement a échoué
+        """
+        await self._attempted.wait()
+        if self.snapshot is None:
+            raise RuntimeError(self.last_error or "Aucun snapshot du chart Deezer")
+        return self.snapshot
+
+    async def get_snapshot(self) -> ChartSnapshot:
+        """
+        Retourne le dernier snapshot disponible.
+
+        Le premier appel attend un rafraîchissement s'il n'existe encore aucun
+        snapshot. Ensuite, un snapshot périmé est servi immédiatement et un
+        rafraîchissement est lancé en tâche de fond.
+        """
+        if self.snapshot is None:
+            return await self.refresh()
+
+        if self.is_stale() and (self._revalidation is None or self._revalidation.done()):
+            self._revalidation = asyncio.create_task(self._refresh_quietly())
+
+        return self.snapshot
+
+    def start(self) -> None:
+        """Démarre la boucle de rafraîchissement périodique."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Arrête la boucle de rafraîchissement et les revalidations en cours."""
+        for task in (self._task, self._revalidation):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._revalidation = None
+
+    async def _run(self) -> None:
+        """Boucle : rafraîchit le chart puis attend l'intervalle configuré."""
+        while True:
+            await self._refresh_quietly()
+            await asyncio.sleep(self.interval)
+
+    async def _record(self, snapshot: ChartSnapshot) -> None:
+        """Enregistre le snapshot dans l'historique (une erreur n'empêche pas de servir le chart)."""
+        if self._history is None:
+            return
+        try:
+            await asyncio.to_thread(self._history.append, snapshot.tracks, snapshot.fetched_at)
+        except Exception as e:
+            logger.warning("Snapshot du chart Deezer non enregistré dans l'historique", extra={"error": str(e)})
+
+    async def _refresh_quietly(self) -> None:
+        """Rafraîchit le chart en journalisant l'erreur au lieu de la propager."""
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning(
+                "Rafraîchissement du chart Deezer échoué, snapshot précédent conservé", extra={"error": str(e)}
+            )
@@ -0,0 +1,169 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Threads exécutant le travail bloquant des requêtes (calculs, sérialisation) hors de la boucle d'événements
+OPENSOUND_REQUEST_WORKERS = int(os.getenv("OPENSOUND_REQUEST_WORKERS", str(min(32, (os.cpu_count() or 1) + 4))))
+
+
+class InstrumentedExecutor(Executor):
+    """
+    Executor qui compte les tâches soumises, en cours et en attente.
+
+    Les tâches en attente (queued) sont celles qui dépassent le nombre de
+    workers : c'est la profondeur de la file, à surveiller pour dimensionner
+    le pool.
+    """
+
+    def __init__(self, executor: Executor, workers: int):
+        """
+        Args:
+            executor: Executor enveloppé (pool de threads ou de processus)
+            workers: Nombre de workers de l'executor
+        """
+        self._executor = executor
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.submitted = 0
+        self.completed = 0
+
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> "Future[T]":
+        with self._lock:
+            self._pending += 1
+            self.submitted += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+                self.submitted -= 1
+            raise
+        future.add_done_callback(self._task_done)
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def stats(self) -> Dict[str, int]:
+        """Retourne les compteurs du pool (workers, tâches en cours et en attente)."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "running": min(self._pending, self.workers),
+                "queued": max(0, self._pending - self.workers),
+            }
+
+    def _task_done(self, _: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+
+class RequestExecutor:
+    """
+    Exécute le travail bloquant des requêtes dans un pool de threads dédié, une seule fois par clé en cours.
+
+    Les requêtes identiques qui arrivent pendant un calcul (même clé : endpoint,
+    paramètres, version des données) attendent ce calcul au lieu d'en lancer un
+    autre (single-flight) : une rafale de 50 requêtes identiques coûte un seul
+    calcul. L'attente ne bloque aucun thread. Un client qui abandonne ne
+    l'interrompt pas pour les autres.
+
+    Les étapes tracées pendant un calcul partagé (stage) sont rattachées à la
+    requête qui l'a lancé.
+    """
+
+    def __init__(self, workers: int = OPENSOUND_REQUEST_WORKERS):
+        """
+        Args:
+            workers: Nombre de threads du pool
+        """
+        self._workers = workers
+        self._threads: Optional[InstrumentedExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key: Optional[Hashable], function: Callable[[], T]) -> T:
+        """
+        Exécute une fonction bloquante dans le pool, ou attend le calcul en cours pour la même clé.
+
+        Args:
+            key: Clé du calcul (None : pas de mise en commun)
+            function: Fonction sans argument à exécuter
+
+        Returns:
+            Résultat de la fonction (partagé entre les requêtes mises en commun, à ne pas modifier)
+
+        Raises:
+            Exception: L'exception levée par la fonction, pour toutes les requêtes en attente
+        """
+        if key is None:
+            return await self._submit(function)
+
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+        else:
+            flight = asyncio.ensure_future(self._submit(function))
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._end_flight(key, done))
+        return await asyncio.shield(flight)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Retourne les statistiques de mise en commun et du pool de threads."""
+        calls = self.calls
+        threads = self._threads.stats() if self._threads is not None else {
+            "workers": self._workers, "submitted": 0, "completed": 0, "running": 0, "queued": 0,
+        }
+        return {
+            "requests": {
+                "calls": calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._flights),
+                "coalescing_ratio": round(self.coalesced / calls, 4) if calls else 0.0,
+            },
+            "threads": threads,
+        }
+
+    def shutdown(self) -> None:
+        """Arrête le pool de threads s'il a été créé (les calculs en cours se terminent)."""
+        with self._pool_lock:
+            if self._threads is not None:
+                self._threads.shutdown(wait=False, cancel_futures=True)
+                self._threads = None
+
+    async def _submit(self, function: Callable[[], T]) -> T:
+        """Exécute la fonction dans le pool, avec le contexte de la requête (trace des étapes)."""
+        context = contextvars.copy_context()
+        return await asyncio.wrap_future(self._get_threads().submit(context.run, function))
+
+    def _get_threads(self) -> InstrumentedExecutor:
+        """Retourne le pool de threads, créé à la première utilisation."""
+        with self._pool_lock:
+            if self._threads is None:
+                self._threads = InstrumentedExecutor(
+                    ThreadPoolExecutor(self._workers, thread_name_prefix="opensound-request"), self._workers
+                )
+            return self._threads
+
+    def _end_flight(self, key: Hashable, flight: asyncio.Future) -> None:
+        """Retire un calcul terminé (et marque son exception comme lue si plus personne ne l'attend)."""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            flight.exception()
+
+
+# Executor partagé par les routers
+request_executor = RequestExecutor()
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Datasets Spotify préparés au démarrage ('all', liste séparée par des virgules, vide : aucun)
+OPENSOUND_WARMUP_DATASETS = os.getenv("OPENSOUND_WARMUP_DATASETS", "all")
+
+# Attend le premier snapshot du chart Deezer (et remplit le cache des genres) avant d'être prêt
+OPENSOUND_WARMUP_DEEZER = os.getenv("OPENSOUND_WARMUP_DEEZER", "1") == "1"
+
+# Durée maximale (secondes) d'une étape de préchauffage
+OPENSOUND_WARMUP_TIMEOUT = float(os.getenv("OPENSOUND_WARMUP_TIMEOUT", "120"))
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class WarmupStep:
+    """Étape du préchauffage et son avancement."""
+
+    name: str
+    function: Callable[[], Awaitable[Any]]
+    status: str = PENDING
+    duration: Optional[float] = None
+    error: Optional[str] = None
+
+    def describe(self) -> Dict[str, Any]:
+        """Retourne l'état de l'étape (statut, durée en ms, erreur)."""
+        return {
+            "name": self.name,
+            "status": self.status,
+            "duration_ms": round(self.duration * 1000, 1) if self.duration is not None else None,
+            "error": self.error,
+        }
+
+
+class Warmup:
+    """
+    Préchauffe l'application après son démarrage : datasets, caches, connexions.
+
+    Les étapes s'exécutent en parallèle, en tâche de fond : le serveur accepte
+    les connexions (/health) pendant le préchauffage, et /ready indique quand
+    il est terminé. Une étape en échec (ou trop longue) n'empêche pas
+    l'application d'être prête : la donnée sera calculée à la première requête,
+    comme sans préchauffage. L'erreur reste visible dans /ready.
+    """
+
+    def __init__(self, timeout: float = OPENSOUND_WARMUP_TIMEOUT):
+        """
+        Args:
+            timeout: Durée maximale (secondes) d'une étape
+        """
+        self.timeout = timeout
+        self.steps: List[WarmupStep] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, name: str, function: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Ajoute une étape (avant start).
+
+        Args:
+            name: Nom de l'étape (ex: 'spotify.high')
+            function: Fonction asynchrone sans argument
+        """
+        self.steps.append(WarmupStep(name, function))
+
+    def start(self) -> None:
+        """Lance le préchauffage en tâche de fond."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def run(self) -> None:
+        """Exécute toutes les étapes en parallèle (les erreurs sont enregistrées, pas propagées)."""
+        self.started_at = time.perf_counter()
+        await asyncio.gather(*(self._run_step(step) for step in self.steps))
+        self.finished_at = time.perf_counter()
+        failed = [step.name for step in self.steps if step.status == FAILED]
+        logger.info(
+            "Préchauffage terminé",
+            extra={"duration_ms": round(self.elapsed() * 1000, 1), "steps": len(self.steps), "failed": failed},
+        )
+
+    async def stop(self) -> None:
+        """Interrompt le préchauffage s'il est encore en cours."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def ready(self) -> bool:
+        """Indique si toutes les étapes sont terminées (avec succès ou non)."""
+        return self.finished_at is not None
+
+    def elapsed(self) -> float:
+        """Durée du préchauffage en secondes (en cours ou terminé)."""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def status(self) -> Dict[str, Any]:
+        """Retourne l'avancement du préchauffage, étape par étape."""
+        return {
+            "ready": self.ready,
+            "elapsed_ms": round(self.elapsed() * 1000, 1),
+            "steps": [step.describe() for step in self.steps],
+        }
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Statistiques exposées dans /metrics (nombre d'étapes par statut, durée)."""
+        counts = {status: 0 for status in (PENDING, RUNNING, DONE, FAILED)}
+        for step in self.steps:
+            counts[step.status] += 1
+        return {
+            "warmup": {
+                "ready": int(self.ready),
+                **{f"steps_{status}": count for status, count in counts.items()},
+                "duration_seconds": round(self.elapsed(), 3),
+            }
+        }
+
+    async def _run_step(self, step: WarmupStep) -> None:
+        """Exécute une étape avec son délai maximal et enregistre son résultat."""
+        step.status = RUNNING
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(step.function(), self.timeout)
+        except asyncio.TimeoutError:
+            step.status, step.error = FAILED, f"Délai dépassé ({self.timeout:g} s)"
+        except Exception as e:
+            step.status, step.error = FAILED, str(e)
+        else:
+            step.status = DONE
+        step.duration = time.perf_counter() - start
+        if step.status == FAILED:
+            logger.warning("Étape de préchauffage échouée", extra={"step": step.name, "error": step.error})
+
+
+def warmup_dataset_names(value: str = OPENSOUND_WARMUP_DATASETS) -> List[str]:
+    """
+    Retourne les noms de datasets à préchauffer.
+
+    Args:
+        value: 'all', noms séparés par des virgules, ou vide
+
+    Returns:
+        Liste de noms (ou ['all']), vide si le préchauffage des datasets est désactivé
+    """
+    return [name.strip() for name in value.split(",") if name.strip()]
@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Iterable, Optional
+
+import httpx
+
+from src.cache.tiered_cache import MISSING, MemoryCacheTier, SQLiteCacheTier, TieredCache
+from src.extractors.deezer_client import (
+    DEEZER_API_URL,
+    DEEZER_TIMEOUT,
+    AsyncDeezerClient,
+    CircuitBreaker,
+    DeezerError,
+    TokenBucket,
+    deezer_circuit_breaker,
+    deezer_rate_limiter,
+)
+from src.observability.tracing import stage
+
+logger = logging.getLogger(__name__)
+
+# Paramètres configurables par variables d'environnement
+DEEZER_MAX_CONCURRENCY = int(os.getenv("DEEZER_MAX_CONCURRENCY", "10"))
+DEEZER_CACHE_PATH = os.getenv("DEEZER_CACHE_PATH", "data/cache/deezer_cache.sqlite")
+DEEZER_CACHE_TTL = float(os.getenv("DEEZER_CACHE_TTL", str(7 * 24 * 3600)))
+DEEZER_CACHE_NEGATIVE_TTL = float(os.getenv("DEEZER_CACHE_NEGATIVE_TTL", "300"))
+
+# Cache album -> genre_id et genre_id -> nom, partagé entre les workers via SQLite
+deezer_genre_cache = TieredCache(
+    [MemoryCacheTier(max_entries=1000), SQLiteCacheTier(DEEZER_CACHE_PATH, max_entries=50000)],
+    ttl=DEEZER_CACHE_TTL,
+    negative_ttl=DEEZER_CACHE_NEGATIVE_TTL,
+)
+
+
+def album_genre_key(album_id: int) -> str:
+    """Clé de cache du genre_id d'un album."""
+    return f"album_genre:{int(album_id)}"
+
+
+def genre_name_key(genre_id: int) -> str:
+    """Clé de cache du nom d'un genre."""
+    return f"genre_name:{int(genre_id)}"
+
+
+def genre_listing_names(listing: Optional[dict]) -> Dict[int, Optional[str]]:
+    """Retourne {genre_id: nom} à partir de la liste Deezer (réponse de /genre)."""
+    return {
+        genre['id']: genre.get('name')
+        for genre in (listing or {}).get('data', [])
+        if genre.get('id') is not None
+    }
+
+
+def cache_genre_listing(listing: Optional[dict], cache: TieredCache) -> None:
+    """Met en cache le nom de chaque genre de la liste Deezer (réponse de /genre)."""
+    for genre_id, name in genre_listing_names(listing).items():
+        cache.set(genre_name_key(genre_id), name)
+
+
+class DeezerGenreEnricher:
+    """
+    Moteur d'enrichissement des genres Deezer (album -> genre_id -> nom du genre).
+
+    Les IDs sont dédupliqués puis récupérés en parallèle, avec un nombre
+    maximal de requêtes simultanées, sur un unique client HTTP asynchrone
+    qui garde les connexions ouvertes (keep-alive). Le client respecte le
+    quota Deezer et coupe les appels tant que Deezer est indisponible
+    (voir src.extractors.deezer_client) ; un échec transitoire donne un
+    genre inconnu, sans être mis en cache.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEEZER_MAX_CONCURRENCY,
+        timeout: float = DEEZER_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        base_url: str = DEEZER_API_URL,
+        cache: TieredCache = deezer_genre_cache,
+        rate_limiter: Optional[TokenBucket] = deezer_rate_limiter,
+        circuit_breaker: Optional[CircuitBreaker] = deezer_circuit_breaker,
+    ):
+        """
+        Args:
+            max_concurrency: Nombre maximal de requêtes Deezer simultanées
+            timeout: Timeout (secondes) de chaque requête
+            transport: Transport httpx à utiliser (ex: httpx.MockTransport hors réseau)
+            base_url: URL de base de l'API Deezer
+            cache: Cache des genres (partagé avec les fonctions synchrones par défaut)
+            rate_limiter: Limiteur de débit (partagé par défaut avec le client synchrone, None : aucun)
+            circuit_breaker: Disjoncteur (partagé par défaut avec le client synchrone, None : aucun)
+        """
+        self._client = AsyncDeezerClient(
+            base_url=base_url,
+            timeout=timeout,
+            pool_size=max_concurrency,
+            rate_limiter=rate_limiter,
+            circuit_breaker=circuit_breaker,
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cache = cache
+
+    async def __aenter__(self) -> "DeezerGenreEnricher":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Ferme le client HTTP et ses connexions."""
+        await self._client.aclose()
+
+    async def get_album_genre(self, album_id: int) -> Optional[int]:
+        """
+        Récupère le genre_id d'un album.
+
+        Args:
+            album_id: ID de l'album Deezer
+
+        Returns:
+            int: ID du genre ou None si non trouvé
+        """
+        return (await self.get_album_genres([album_id]))[int(album_id)]
+
+    async def get_genre_name(self, genre_id: Optional[int]) -> Optional[str]:
+        """
+        Récupère le nom d'un genre à partir de son ID.
+
+        Args:
+            genre_id: ID du genre Deezer
+
+        Returns:
+            str: Nom du genre ou None si non trouvé
+        """
+        if genre_id is None:
+            return None
+        return (await self.get_genre_names([genre_id]))[genre_id]
+
+    async def get_album_genre_names(self, album_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+        """
+        Associe à chaque album le nom de son genre.
+
+        Les albums puis les genres sont dédupliqués (sur toutes les pages du
+        chart) avant tout appel, puis récupérés en parallèle.
+
+        Args:
+            album_ids: IDs des albums Deezer (doublons autorisés)
+
+        Returns:
+            Dict[int, Optional[str]]: {album_id: nom du genre}
+        """
+        album_genres = await self.get_album_genres(album_ids)
+        names = await self.get_genre_names(genre_id for genre_id in album_genres.values() if genre_id is not None)
+        return {album_id: names.get(genre_id) for album_id, genre_id in album_genres.items()}
+
+    async def get_album_genres(self, album_ids: Iterable[int]) -> Dict[int, Optional[int]]:
+        """
+        Récupère le genre_id de plusieurs albums.
+
+        Le cache est lu puis écrit en un seul appel chacun (le niveau SQLite
+        hors de la boucle asyncio) ; les albums absents du cache sont
+        récupérés en parallèle.
+
+        Args:
+            album_ids: IDs des albums Deezer (doublons autorisés)
+
+        Returns:
+            Dict[int, Optional[int]]: {album_id: ID du genre}
+        """
+        unique_albums = list(dict.fromkeys(int(album_id) for album_id in album_ids))
+        cached = await self._cache.aget_many(album_genre_key(album_id) for album_id in unique_albums)
+        album_genres = {
+            album_id: cached[album_genre_key(album_id)]
+            for album_id in unique_albums
+            if album_genre_key(album_id) in cached
+        }
+
+        missing = [album_id for album_id in unique_albums if album_id not in album_genres]
+        fetched = dict(zip(missing, await asyncio.gather(*(self._fetch_album_genre(album_id) for album_id in missing))))
+        await self._cache.aset_many({
+            album_genre_key(album_id): genre_id for album_id, genre_id in fetched.items() if genre_id is not MISSING
+        })
+        album_genres.update({album_id: genre_id for album_id, genre_id in fetched.items() if genre_id is not MISSING})
+        return {album_id: album_genres.get(album_id) for album_id in unique_albums}
+
+    async def get_genre_names(self, genre_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+        """
+        Récupère les noms de plusieurs genres.
+
+        Si plusieurs genres sont absents du cache, la liste complète des genres
+        (/genre) est récupérée en un seul appel et mise en cache ; seuls les
+        genres absents de cette liste sont ensuite demandés un par un.
+
+        Args:
+            genre_ids: IDs des genres Deezer (doublons autorisés)
+
+        Returns:
+            Dict[int, Optional[str]]: {genre_id: nom du genre}
+        """
+        unique_genres = list(dict.fromkeys(genre_ids))
+        cached = await self._cache.aget_many(genre_name_key(genre_id) for genre_id in unique_genres)
+        genre_names = {
+            genre_id: cached[genre_name_key(genre_id)]
+            for genre_id in unique_genres
+            if genre_name_key(genre_id) in cached
+        }
+
+        missing = [genre_id for genre_id in unique_genres if genre_id not in genre_names]
+        if len(missing) > 1:
+            try:
+                listed = genre_listing_names(await self._get_json("/genre"))
+            except DeezerError:
+                listed = {}
+            await self._cache.aset_many({genre_name_key(genre_id): name for genre_id, name in listed.items()})
+            genre_names.update({genre_id: listed[genre_id] for genre_id in missing if genre_id in listed})
+            missing = [genre_id for genre_id in missing if genre_id not in genre_names]
+
+        fetched = dict(zip(missing, await asyncio.gather(*(self._fetch_genre_name(genre_id) for genre_id in missing))))
+        await self._cache.aset_many({
+            genre_name_key(genre_id): name for genre_id, name in fetched.items() if name is not MISSING
+        })
+        genre_names.update({genre_id: name for genre_id, name in fetched.items() if name is not MISSING})
+        return {genre_id: genre_names.get(genre_id) for genre_id in unique_genres}
+
+    async def _fetch_album_genre(self, album_id: int) -> Any:
+        """Genre_id d'un album demandé à Deezer (None si inconnu), ou MISSING si l'appel échoue."""
+        try:
+            album_data = await self._get_json(f"/album/{album_id}")
+        except DeezerError:
+            return MISSING
+        genres = (album_data or {}).get('genres', {}).get('data', [])
+        return genres[0].get('id', None) if genres else None
+
+    async def _fetch_genre_name(self, genre_id: int) -> Any:
+        """Nom d'un genre demandé à Deezer (None si inconnu), ou MISSING si l'appel échoue."""
+        try:
+            genre_data = await self._get_json(f"/genre/{genre_id}")
+        except DeezerError:
+            return MISSING
+        return (genre_data or {}).get('name', None)
+
+    async def _get_json(self, path: str) -> Optional[dict]:
+        """
+        Effectue un GET limité par le sémaphore.
+
+        Returns:
+            Corps JSON, ou None si la ressource n'existe pas
+
+        Raises:
+            DeezerError: Si l'appel échoue (déjà journalisé par le client)
+        """
+        # Étape mesurée par type de ressource (album, genre), hors attente du sémaphore
+        resource = path.strip("/").split("/")[0]
+        async with self._semaphore:
+            with stage(f"deezer.fetch_{resource}"):
+                return await self._client.get_json(path)
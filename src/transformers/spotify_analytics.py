@@ -0,0 +1,738 @@
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from src.extractors.extractor_spotify import extract_spotify_data, iter_spotify_chunks, resolve_spotify_source
+from src.observability.tracing import timed_stage
+
+logger = logging.getLogger(__name__)
+
+# Au-delà de cette taille, un CSV est analysé en streaming par blocs
+SPOTIFY_STREAMING_THRESHOLD_MB = float(os.getenv("SPOTIFY_STREAMING_THRESHOLD_MB", "256"))
+SPOTIFY_STREAMING_CHUNKSIZE = int(os.getenv("SPOTIFY_STREAMING_CHUNKSIZE", "200000"))
+
+# Colonnes de genre agrégées après suppression des doublons et des lignes incomplètes
+GENRE_COLUMNS = ("playlist_genre", "playlist_subgenre")
+
+# Version du contenu de SpotifyAnalytics : les analyses conservées (pickle) d'une version antérieure sont recalculées
+SPOTIFY_ANALYTICS_VERSION = 2
+
+
+@dataclass
+class CorrelationMoments:
+    """
+    Co-moments de deux variables, suffisants pour la corrélation de Pearson.
+
+    Deux jeux de moments calculés séparément se fusionnent sans revenir aux
+    données brutes (formules de Chan et al.).
+    """
+
+    n: int = 0
+    mean_x: float = 0.0
+    mean_y: float = 0.0
+    m2_x: float = 0.0
+    m2_y: float = 0.0
+    c_xy: float = 0.0
+
+    @classmethod
+    def from_arrays(cls, x: np.ndarray, y: np.ndarray) -> "CorrelationMoments":
+        """Calcule les moments de deux tableaux de même taille (sans valeurs manquantes)."""
+        if len(x) == 0:
+            return cls()
+        mean_x = float(x.mean())
+        mean_y = float(y.mean())
+        dx = x - mean_x
+        dy = y - mean_y
+        return cls(len(x), mean_x, mean_y, float(dx @ dx), float(dy @ dy), float(dx @ dy))
+
+    def merge(self, other: "CorrelationMoments") -> "CorrelationMoments":
+        """Retourne les moments de la réunion des deux échantillons."""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            return other
+        n = self.n + other.n
+        delta_x = other.mean_x - self.mean_x
+        delta_y = other.mean_y - self.mean_y
+        weight = self.n * other.n / n
+        return CorrelationMoments(
+            n=n,
+            mean_x=self.mean_x + delta_x * other.n / n,
+            mean_y=self.mean_y + delta_y * other.n / n,
+            m2_x=self.m2_x + other.m2_x + delta_x * delta_x * weight,
+            m2_y=self.m2_y + other.m2_y + delta_y * delta_y * weight,
+            c_xy=self.c_xy + other.c_xy + delta_x * delta_y * weight,
+        )
+
+    def correlation(self) -> float:
+        """Coefficient de corrélation de Pearson (NaN si indéfini)."""
+        if self.n < 2:
+            return float("nan")
+        denominator = np.sqrt(self.m2_x * self.m2_y)
+        if denominator == 0:
+            return float("nan")
+        return float(self.c_xy / denominator)
+
+
+@dataclass
+class SpotifyAnalytics:
+    """
+    Résultat des analyses Spotify calculées en une seule passe sur un dataset.
+
+    Les tables agrégées (somme, effectif, moyenne) par genre, sous-genre et
+    décennie sont triées par popularité
+    moyenne décroissante. Une analyse impossible (colonnes manquantes, aucune
+    donnée valide...) est conservée sous forme de message d'erreur et lève
+    une ValueError lorsqu'elle est demandée.
+
+    Les sommes, effectifs et co-moments permettent de fusionner les résultats
+    de plusieurs datasets (voir merge_spotify_analytics).
+    """
+
+    total_tracks: int
+    genre_table: Optional[pd.DataFrame] = None
+    subgenre_table: Optional[pd.DataFrame] = None
+    decade_table: Optional[pd.DataFrame] = None
+    correlation: Optional[float] = None
+    correlation_moments: Optional[CorrelationMoments] = None
+    errors: Dict[str, str] = field(default_factory=dict)
+    # Sans valeur par défaut au niveau de la classe : absent des analyses conservées par une version antérieure
+    format_version: int = field(default_factory=lambda: SPOTIFY_ANALYTICS_VERSION)
+
+    def genre_popularity_table(self) -> pd.DataFrame:
+        """Retourne la table de popularité par genre (ValueError si indisponible)."""
+        return self._require("genres", self.genre_table)
+
+    def subgenre_popularity_table(self) -> pd.DataFrame:
+        """Retourne la table de popularité par sous-genre (ValueError si indisponible)."""
+        return self._require("subgenres", self.subgenre_table)
+
+    def mean_popularity(self) -> float:
+        """
+        Retourne la popularité moyenne arrondie des morceaux retenus pour les genres.
+
+        Mêmes règles de nettoyage que la popularité par genre (doublons et
+        lignes incomplètes supprimés) : la moyenne est celle de la table des genres.
+
+        Raises:
+            ValueError: Si la table des genres est indisponible ou vide
+        """
+        table = self.genre_popularity_table()
+        count = int(table["count"].sum())
+        if count == 0:
+            raise ValueError("Aucun morceau valide pour calculer la popularité moyenne.")
+        return round(float(table["sum"].sum()) / count, 2)
+
+    def decade_popularity_table(self) -> pd.DataFrame:
+        """Retourne la table de popularité par décennie (ValueError si indisponible)."""
+        return self._require("decades", self.decade_table)
+
+    def duration_popularity_correlation(self) -> float:
+        """Retourne la corrélation durée / popularité arrondie (ValueError si indisponible)."""
+        return self._require("correlation", self.correlation)
+
+    def _require(self, analysis: str, value):
+        if value is None:
+            raise ValueError(self.errors[analysis])
+        return value
+
+
+@dataclass
+class SpotifyColumns:
+    """
+    Colonnes utiles d'un dataset converties en tableaux NumPy, une valeur par ligne.
+
+    Toutes les conversions et le repérage des lignes à écarter (doublons,
+    lignes incomplètes) sont faits ici, une fois pour tout le dataset : les
+    analyses d'une sélection de lignes (voir analyze_spotify_rows) ne
+    lisent que les positions retenues, sans revenir au DataFrame.
+
+    Une ligne en double d'une ligne retenue par une sélection est elle-même
+    retenue (valeurs identiques) : les doublons repérés sur le dataset complet
+    sont ceux de toute sélection.
+    """
+
+    rows: int
+    columns: int
+    # Analyses impossibles quelle que soit la sélection (colonnes manquantes)
+    errors: Dict[str, str] = field(default_factory=dict)
+    popularity: Optional[np.ndarray] = None
+    duplicated: Optional[np.ndarray] = None
+    complete: Optional[np.ndarray] = None
+    # Codes de groupe et valeurs triées, par colonne de genre présente
+    genre_codes: Dict[str, Tuple[np.ndarray, pd.Index]] = field(default_factory=dict)
+    has_date: Optional[np.ndarray] = None
+    years: Optional[np.ndarray] = None
+    duration_min: Optional[np.ndarray] = None
+
+
+@timed_stage("transform.spotify_analytics")
+def compute_spotify_analytics(df: pd.DataFrame) -> SpotifyAnalytics:
+    """
+    Nettoie le dataset une seule fois et calcule toutes les analyses Spotify.
+
+    Les colonnes utiles sont converties une fois en tableaux NumPy typés
+    (popularité, codes de genre, durée en minutes, année), puis les
+    moyennes par genre, par sous-genre, par décennie et la corrélation durée / popularité
+    sont calculées de façon vectorisée, sans copie du DataFrame.
+
+    Les règles de nettoyage de chaque analyse sont conservées :
+    - genres et sous-genres : lignes dupliquées puis lignes incomplètes supprimées
+    - décennies : lignes sans date ou sans popularité ignorées
+    - corrélation : lignes sans durée ou sans popularité ignorées
+
+    Args:
+        df: DataFrame Spotify
+
+    Returns:
+        SpotifyAnalytics contenant les analyses
+    """
+    return analyze_spotify_rows(prepare_spotify_columns(df))
+
+
+def prepare_spotify_columns(df: pd.DataFrame) -> SpotifyColumns:
+    """
+    Convertit les colonnes utiles du dataset en tableaux NumPy (voir SpotifyColumns).
+
+    Args:
+        df: DataFrame Spotify
+
+    Returns:
+        SpotifyColumns du dataset
+    """
+    data = SpotifyColumns(rows=len(df), columns=df.shape[1])
+
+    if "track_popularity" not in df.columns:
+        message = "Colonne manquante: 'track_popularity'"
+        data.errors = {"genres": message, "subgenres": message, "decades": message, "correlation": message}
+        return data
+
+    data.popularity = df["track_popularity"].to_numpy(dtype="float64", na_value=np.nan)
+    _prepare_genres(df, data)
+    _prepare_years(df, data)
+    _prepare_durations(df, data)
+    return data
+
+
+def analyze_spotify_rows(data: SpotifyColumns, positions: Optional[np.ndarray] = None) -> SpotifyAnalytics:
+    """
+    Calcule les analyses Spotify d'une sélection de lignes.
+
+    Seules les valeurs des lignes sélectionnées sont lues : le coût dépend de
+    la taille de la sélection, pas de celle du dataset. Les résultats sont
+    ceux de compute_spotify_analytics sur le DataFrame restreint à ces lignes.
+
+    Args:
+        data: Colonnes préparées du dataset
+        positions: Positions triées des lignes à analyser (toutes si None)
+
+    Returns:
+        SpotifyAnalytics de la sélection
+    """
+    def rows(values: np.ndarray) -> np.ndarray:
+        return values if positions is None else values[positions]
+
+    analytics = SpotifyAnalytics(total_tracks=data.rows if positions is None else len(positions))
+    analytics.errors = dict(data.errors)
+    if data.popularity is None:
+        return analytics
+
+    popularity = rows(data.popularity)
+    popularity_valid = ~np.isnan(popularity)
+
+    if data.genre_codes:
+        duplicated = rows(data.duplicated)
+        complete = rows(data.complete)
+        keep = ~duplicated & complete
+        if logger.isEnabledFor(logging.INFO):
+            _log_cleaning(int(duplicated.sum()), int((~duplicated & ~complete).sum()), int(keep.sum()), data.columns)
+
+        for column, (codes, keys) in data.genre_codes.items():
+            table = _popularity_table(rows(codes)[keep], popularity[keep], keys)
+            if column == "playlist_genre":
+                analytics.genre_table = table
+            else:
+                analytics.subgenre_table = table
+
+    if data.years is not None:
+        _analyze_decades(rows(data.has_date), rows(data.years), popularity, popularity_valid, analytics)
+
+    if data.duration_min is not None:
+        duration_min = rows(data.duration_min)
+        valid = popularity_valid & ~np.isnan(duration_min)
+        if not valid.any():
+            analytics.errors["correlation"] = (
+                "Impossible de calculer la corrélation: aucune donnée valide après nettoyage."
+            )
+        else:
+            _set_correlation(analytics, CorrelationMoments.from_arrays(duration_min[valid], popularity[valid]))
+
+    return analytics
+
+
+def analyze_spotify_file(file_path: str) -> SpotifyAnalytics:
+    """
+    Analyse un fichier Spotify, en streaming si c'est un CSV volumineux.
+
+    Les CSV plus gros que SPOTIFY_STREAMING_THRESHOLD_MB sont lus par blocs
+    (mémoire bornée), les autres fichiers sont chargés en mémoire.
+
+    Args:
+        file_path: Chemin vers le fichier CSV (ou Parquet)
+
+    Returns:
+        SpotifyAnalytics du fichier
+    """
+    source = resolve_spotify_source(file_path)
+    if source.suffix == ".csv" and source.stat().st_size > SPOTIFY_STREAMING_THRESHOLD_MB * 1024 ** 2:
+        return compute_spotify_analytics_streaming(str(source))
+    return compute_spotify_analytics(extract_spotify_data(file_path))
+
+
+@timed_stage("transform.spotify_analytics_streaming")
+def compute_spotify_analytics_streaming(
+    file_path: str,
+    chunksize: int = SPOTIFY_STREAMING_CHUNKSIZE,
+) -> SpotifyAnalytics:
+    """
+    Calcule les analyses d'un CSV en le lisant par blocs, avec une mémoire bornée.
+
+    Les résultats sont identiques à ceux de compute_spotify_analytics sur le
+    fichier complet (voir SpotifyAnalyticsAccumulator).
+
+    Args:
+        file_path: Chemin vers le fichier CSV
+        chunksize: Nombre de lignes par bloc
+
+    Returns:
+        SpotifyAnalytics du fichier
+    """
+    return compute_spotify_analytics_from_chunks(iter_spotify_chunks(file_path, chunksize))
+
+
+def compute_spotify_analytics_from_chunks(chunks: Iterable[pd.DataFrame]) -> SpotifyAnalytics:
+    """
+    Calcule les analyses à partir de blocs successifs d'un même dataset.
+
+    Args:
+        chunks: Blocs du dataset, dans l'ordre du fichier
+
+    Returns:
+        SpotifyAnalytics du dataset complet
+    """
+    accumulator = SpotifyAnalyticsAccumulator()
+    for chunk in chunks:
+        accumulator.update(chunk)
+    return accumulator.result()
+
+
+class SpotifyAnalyticsAccumulator:
+    """
+    Accumulateurs incrémentaux des analyses Spotify, alimentés bloc par bloc.
+
+    - genres et décennies : somme et effectif de popularité par groupe
+    - corrélation : co-moments fusionnés bloc après bloc (Welford / Chan)
+    - doublons : les lignes complètes déjà vues sont repérées par leurs
+      empreintes 64 bits (8 octets par ligne unique, voir SortedHashRuns),
+      seule structure qui croît avec le fichier
+    - dates : le format est deviné une seule fois, sur la première date
+      valide du fichier, comme pandas le fait sur la colonne complète
+    """
+
+    def __init__(self, date_format: Optional[str] = None, date_format_known: bool = False):
+        """
+        Args:
+            date_format: Format des dates déjà deviné sur le début du dataset (ajout de lignes)
+            date_format_known: Indique si le format a déjà été deviné (il peut valoir None)
+        """
+        self.total_tracks = 0
+        self.columns: Optional[pd.Index] = None
+        self._seen_rows = SortedHashRuns()
+        self._duplicates = 0
+        self._incomplete = 0
+        self._kept_rows = 0
+        self._genre_totals: Optional[pd.DataFrame] = None
+        self._subgenre_totals: Optional[pd.DataFrame] = None
+        self._decade_totals: Optional[pd.DataFrame] = None
+        self._decade_valid_rows = 0
+        self.date_format = date_format
+        self.date_format_known = date_format_known
+        self._moments = CorrelationMoments()
+        self._correlation_valid_rows = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Intègre un bloc du dataset (colonnes identiques d'un bloc à l'autre)."""
+        if self.columns is None:
+            self.columns = chunk.columns
+        self.total_tracks += len(chunk)
+
+        if "track_popularity" not in chunk.columns:
+            return
+        popularity = pd.to_numeric(chunk["track_popularity"], errors="coerce").to_numpy(dtype="float64")
+        popularity_valid = ~np.isnan(popularity)
+
+        if chunk.columns.isin(GENRE_COLUMNS).any():
+            self._update_genres(chunk, popularity)
+        if "track_album_release_date" in chunk.columns:
+            self._update_decades(chunk["track_album_release_date"], popularity, popularity_valid)
+        if "duration_ms" in chunk.columns:
+            self._update_correlation(chunk["duration_ms"], popularity, popularity_valid)
+
+    def result(self) -> SpotifyAnalytics:
+        """Retourne les analyses de l'ensemble des blocs intégrés."""
+        analytics = SpotifyAnalytics(total_tracks=self.total_tracks)
+        columns = set() if self.columns is None else set(self.columns)
+
+        if "track_popularity" not in columns:
+            message = "Colonne manquante: 'track_popularity'"
+            analytics.errors = {"genres": message, "subgenres": message, "decades": message, "correlation": message}
+            return analytics
+
+        if columns & set(GENRE_COLUMNS):
+            _log_cleaning(self._duplicates, self._incomplete, self._kept_rows, len(columns))
+        for analysis, column, totals, attribute in (
+            ("genres", "playlist_genre", self._genre_totals, "genre_table"),
+            ("subgenres", "playlist_subgenre", self._subgenre_totals, "subgenre_table"),
+        ):
+            if column not in columns:
+                analytics.errors[analysis] = _missing_genre_column_error(column)
+            else:
+                setattr(analytics, attribute, _totals_to_table(totals, column))
+
+        if "track_album_release_date" not in columns:
+            analytics.errors["decades"] = (
+                "Colonnes manquantes pour le calcul de popularité par décennie: {'track_album_release_date'}"
+            )
+        elif self._decade_valid_rows == 0:
+            analytics.errors["decades"] = "Aucune donnée valide pour calculer la popularité par décennie."
+        elif self._decade_totals is None:
+            analytics.errors["decades"] = "Impossible de déterminer les années de sortie après conversion."
+        else:
+            analytics.decade_table = _totals_to_table(self._decade_totals, "decade")
+
+        if "duration_ms" not in columns:
+            analytics.errors["correlation"] = "Colonnes manquantes pour le calcul de corrélation: {'duration_ms'}"
+        elif self._correlation_valid_rows == 0:
+            analytics.errors["correlation"] = (
+                "Impossible de calculer la corrélation: aucune donnée valide après nettoyage."
+            )
+        else:
+            _set_correlation(analytics, self._moments)
+
+        return analytics
+
+    def _update_genres(self, chunk: pd.DataFrame, popularity: np.ndarray) -> None:
+        """Somme / effectif par genre et par sous-genre des lignes complètes jamais vues."""
+        complete = _complete_rows(chunk)
+        self._incomplete += int((~complete).sum())
+
+        # Une ligne en double d'une ligne complète est elle-même complète
+        hashes = pd.util.hash_pandas_object(chunk[complete], index=False).to_numpy()
+        in_chunk_duplicate = pd.Series(hashes).duplicated().to_numpy()
+
+        new_rows = ~in_chunk_duplicate & ~self._seen_rows.contains(hashes)
+        self._duplicates += int((~new_rows).sum())
+        self._seen_rows.add(hashes[new_rows])
+        self._kept_rows += int(new_rows.sum())
+
+        kept_popularity = popularity[complete][new_rows]
+        if "playlist_genre" in chunk.columns:
+            genres = chunk["playlist_genre"].to_numpy()[complete][new_rows]
+            self._genre_totals = _add_totals(self._genre_totals, genres, kept_popularity)
+        if "playlist_subgenre" in chunk.columns:
+            subgenres = chunk["playlist_subgenre"].to_numpy()[complete][new_rows]
+            self._subgenre_totals = _add_totals(self._subgenre_totals, subgenres, kept_popularity)
+
+    def _update_decades(self, dates: pd.Series, popularity: np.ndarray, popularity_valid: np.ndarray) -> None:
+        """Somme / effectif par décennie des lignes avec date et popularité."""
+        valid = popularity_valid & dates.notna().to_numpy()
+        if not valid.any():
+            return
+        self._decade_valid_rows += int(valid.sum())
+
+        if not self.date_format_known:
+            self.date_format = guess_datetime_format(dates[valid].iloc[0])
+            self.date_format_known = True
+
+        years = pd.to_datetime(
+            dates[valid], format=self.date_format or "mixed", errors="coerce"
+        ).dt.year.to_numpy(dtype="float64", na_value=np.nan)
+        has_year = ~np.isnan(years)
+        if not has_year.any():
+            return
+
+        decades = (years[has_year] // 10 * 10).astype("int64")
+        self._decade_totals = _add_totals(self._decade_totals, decades, popularity[valid][has_year])
+
+    def _update_correlation(self, durations: pd.Series, popularity: np.ndarray, popularity_valid: np.ndarray) -> None:
+        """Fusionne les co-moments durée / popularité du bloc."""
+        duration_min = pd.to_numeric(durations, errors="coerce").to_numpy(dtype="float64") / 60000
+        valid = popularity_valid & ~np.isnan(duration_min)
+        self._correlation_valid_rows += int(valid.sum())
+        self._moments = self._moments.merge(CorrelationMoments.from_arrays(duration_min[valid], popularity[valid]))
+
+
+class SortedHashRuns:
+    """
+    Ensemble d'empreintes 64 bits, en mémoire, sous forme de suites triées.
+
+    Chaque ajout trie seulement le bloc ajouté, puis les deux dernières suites
+    sont fusionnées tant que la plus récente n'est pas nettement plus petite
+    que la précédente (comme TrackIdIndex, sur disque) : une empreinte est
+    recopiée O(log n) fois au total et il reste O(log n) suites à consulter.
+    Le coût d'un bloc reste proportionnel au bloc, sans réallouer tout l'index.
+    """
+
+    def __init__(self):
+        self._runs: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self._runs)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """Masque des empreintes déjà présentes."""
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            positions = np.searchsorted(run, hashes)
+            inside = positions < len(run)
+            found[inside] |= run[positions[inside]] == hashes[inside]
+        return found
+
+    def add(self, hashes: np.ndarray) -> None:
+        """Ajoute des empreintes absentes de l'ensemble (sans doublons)."""
+        if len(hashes) == 0:
+            return
+        self._runs.append(np.sort(hashes))
+        while len(self._runs) >= 2 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            # Deux suites triées : le tri stable (radix) les fusionne en temps linéaire
+            self._runs.append(np.sort(np.concatenate([self._runs.pop(), self._runs.pop()]), kind="stable"))
+
+
+@timed_stage("transform.spotify_merge")
+def merge_spotify_analytics(parts: List[SpotifyAnalytics]) -> SpotifyAnalytics:
+    """
+    Fusionne les analyses de plusieurs datasets à partir de leurs agrégats partiels.
+
+    Les sommes et effectifs par genre et par décennie sont additionnés, et les
+    co-moments de la corrélation sont combinés : aucune donnée brute n'est
+    concaténée. Les doublons sont supprimés à l'intérieur de chaque dataset.
+
+    Args:
+        parts: Analyses calculées séparément pour chaque dataset
+
+    Returns:
+        SpotifyAnalytics de l'ensemble des datasets
+    """
+    if len(parts) == 1:
+        return parts[0]
+
+    merged = SpotifyAnalytics(total_tracks=sum(part.total_tracks for part in parts))
+
+    for analysis, attribute in (
+        ("genres", "genre_table"), ("subgenres", "subgenre_table"), ("decades", "decade_table")
+    ):
+        tables = [getattr(part, attribute) for part in parts if getattr(part, attribute) is not None]
+        if not tables:
+            merged.errors[analysis] = _first_error(parts, analysis)
+            continue
+        totals = pd.concat(tables)[["sum", "count"]].groupby(level=0).sum()
+        totals["mean"] = totals["sum"] / totals["count"]
+        setattr(merged, attribute, totals.sort_values("mean", ascending=False))
+
+    moments = [part.correlation_moments for part in parts if part.correlation_moments is not None]
+    if not moments:
+        merged.errors["correlation"] = _first_error(parts, "correlation")
+    else:
+        merged_moments = moments[0]
+        for other in moments[1:]:
+            merged_moments = merged_moments.merge(other)
+        _set_correlation(merged, merged_moments)
+
+    return merged
+
+
+def is_current_analytics(analytics: SpotifyAnalytics) -> bool:
+    """Indique si des analyses conservées (pickle) ont le contenu de la version actuelle."""
+    return getattr(analytics, "format_version", 1) == SPOTIFY_ANALYTICS_VERSION
+
+
+def _first_error(parts: List[SpotifyAnalytics], analysis: str) -> str:
+    """Retourne le premier message d'erreur d'une analyse parmi les datasets."""
+    return next(part.errors[analysis] for part in parts if analysis in part.errors)
+
+
+def _set_correlation(analytics: SpotifyAnalytics, moments: CorrelationMoments) -> None:
+    """Renseigne la corrélation arrondie à partir des co-moments (ou l'erreur si indéfinie)."""
+    # Les moments sont conservés même si la corrélation est indéfinie : ils restent fusionnables
+    analytics.correlation_moments = moments
+    corr = moments.correlation()
+    if np.isnan(corr):
+        analytics.errors["correlation"] = "Corrélation indéfinie (données constantes ou insuffisantes)."
+        return
+
+    analytics.correlation = round(corr, 2)
+
+
+def _prepare_genres(df: pd.DataFrame, data: SpotifyColumns) -> None:
+    """Codes de genre et de sous-genre, doublons et lignes incomplètes."""
+    present = [column for column in GENRE_COLUMNS if column in df.columns]
+    for analysis, column in (("genres", "playlist_genre"), ("subgenres", "playlist_subgenre")):
+        if column not in present:
+            data.errors[analysis] = _missing_genre_column_error(column)
+    if not present:
+        return
+
+    data.duplicated = _full_row_duplicates(df)
+    data.complete = _complete_rows(df)
+    for column in present:
+        codes, keys = pd.factorize(df[column], sort=True)
+        data.genre_codes[column] = (codes, pd.Index(keys, name=column))
+
+
+def _missing_genre_column_error(column: str) -> str:
+    """Message d'erreur d'une colonne de genre absente."""
+    analysis = "genre" if column == "playlist_genre" else "sous-genre"
+    return f"Colonnes manquantes pour le calcul de popularité par {analysis}: {{'{column}'}}"
+
+
+def _log_cleaning(duplicates: int, incomplete: int, rows: int, columns: int) -> None:
+    """Journalise le bilan du nettoyage (doublons, lignes incomplètes, dataset final)."""
+    logger.info(
+        "Nettoyage des données",
+        extra={"duplicates_removed": duplicates, "incomplete_removed": incomplete, "rows": rows, "columns": columns},
+    )
+
+
+def _prepare_years(df: pd.DataFrame, data: SpotifyColumns) -> None:
+    """Année de sortie de chaque ligne datée (NaN si la date n'est pas convertible)."""
+    # L'année de sortie peut avoir été dérivée au chargement (fichier Parquet)
+    date_column = "release_year" if "release_year" in df.columns else "track_album_release_date"
+    if date_column not in df.columns:
+        data.errors["decades"] = (
+            f"Colonnes manquantes pour le calcul de popularité par décennie: {{'{date_column}'}}"
+        )
+        return
+
+    dates = df[date_column]
+    data.has_date = dates.notna().to_numpy()
+    if date_column == "release_year":
+        data.years = dates.to_numpy(dtype="float64", na_value=np.nan)
+        return
+
+    # Format deviné sur la première date utilisable, comme pandas le ferait sur ces seules lignes
+    valid = data.has_date & ~np.isnan(data.popularity)
+    first_date = dates.iloc[int(np.argmax(valid))] if valid.any() else None
+    date_format = (guess_datetime_format(first_date) if isinstance(first_date, str) else None) or "mixed"
+
+    if isinstance(dates.dtype, pd.CategoricalDtype):
+        # Colonne catégorielle : chaque date distincte n'est convertie qu'une fois
+        category_years = pd.to_datetime(dates.cat.categories, format=date_format, errors="coerce").year.to_numpy(
+            dtype="float64", na_value=np.nan
+        )
+        codes = dates.cat.codes.to_numpy()
+        data.years = np.where(codes >= 0, category_years[codes], np.nan)
+        return
+
+    data.years = pd.to_datetime(dates, format=date_format, errors="coerce").dt.year.to_numpy(
+        dtype="float64", na_value=np.nan
+    )
+
+
+def _prepare_durations(df: pd.DataFrame, data: SpotifyColumns) -> None:
+    """Durée de chaque ligne en minutes."""
+    if "duration_ms" not in df.columns:
+        data.errors["correlation"] = "Colonnes manquantes pour le calcul de corrélation: {'duration_ms'}"
+        return
+    data.duration_min = df["duration_ms"].to_numpy(dtype="float64", na_value=np.nan) / 60000
+
+
+def _analyze_decades(
+    has_date: np.ndarray,
+    years: np.ndarray,
+    popularity: np.ndarray,
+    popularity_valid: np.ndarray,
+    analytics: SpotifyAnalytics,
+) -> None:
+    """Popularité moyenne par décennie de sortie."""
+    valid = popularity_valid & has_date
+    if not valid.any():
+        analytics.errors["decades"] = "Aucune donnée valide pour calculer la popularité par décennie."
+        return
+
+    years = years[valid]
+    has_year = ~np.isnan(years)
+    if not has_year.any():
+        analytics.errors["decades"] = "Impossible de déterminer les années de sortie après conversion."
+        return
+
+    decades = (years[has_year] // 10 * 10).astype("int64")
+    codes, unique_decades = pd.factorize(decades, sort=True)
+    analytics.decade_table = _popularity_table(
+        codes, popularity[valid][has_year], pd.Index(unique_decades, name="decade")
+    )
+
+
+def _full_row_duplicates(df: pd.DataFrame) -> np.ndarray:
+    """
+    Marque les lignes identiques à une ligne précédente (comme DataFrame.duplicated()).
+
+    Deux lignes identiques ont le même track_id : la comparaison complète n'est
+    faite que sur les lignes dont le track_id apparaît plusieurs fois.
+    """
+    if "track_id" not in df.columns:
+        return df.duplicated().to_numpy()
+
+    duplicated = np.zeros(len(df), dtype=bool)
+    candidates = df["track_id"].duplicated(keep=False).to_numpy()
+    if candidates.any():
+        duplicated[candidates] = df[candidates].duplicated().to_numpy()
+    return duplicated
+
+
+def _complete_rows(df: pd.DataFrame) -> np.ndarray:
+    """Marque les lignes sans valeur manquante, colonne par colonne (sans matrice booléenne lignes x colonnes)."""
+    complete = np.ones(len(df), dtype=bool)
+    for column in df.columns:
+        missing = df[column].isna().to_numpy()
+        if missing.any():
+            complete &= ~missing
+    return complete
+
+
+def _add_totals(totals: Optional[pd.DataFrame], keys: np.ndarray, popularity: np.ndarray) -> Optional[pd.DataFrame]:
+    """Ajoute la somme et l'effectif de popularité par clé aux totaux accumulés."""
+    if len(keys) == 0:
+        return totals
+    chunk_totals = pd.Series(popularity).groupby(keys).agg(["sum", "count"])
+    if totals is None:
+        return chunk_totals
+    return totals.add(chunk_totals, fill_value=0)
+
+
+def _totals_to_table(totals: Optional[pd.DataFrame], name: str) -> pd.DataFrame:
+    """Convertit des totaux accumulés en table de popularité triée par moyenne décroissante."""
+    if totals is None:
+        totals = pd.DataFrame({"sum": [], "count": []})
+    table = totals.sort_index().rename_axis(name)
+    table["count"] = table["count"].astype("int64")
+    table["mean"] = table["sum"] / table["count"]
+    return table.sort_values("mean", ascending=False)
+
+
+def _popularity_table(codes: np.ndarray, popularity: np.ndarray, keys: pd.Index) -> pd.DataFrame:
+    """Agrège la popularité (somme, effectif, moyenne) par code de groupe, triée par moyenne décroissante."""
+    valid = codes >= 0
+    sums = np.bincount(codes[valid], weights=popularity[valid], minlength=len(keys))
+    counts = np.bincount(codes[valid], minlength=len(keys))
+
+    observed = counts > 0
+    table = pd.DataFrame(
+        {"sum": sums[observed], "count": counts[observed], "mean": sums[observed] / counts[observed]},
+        index=keys[observed],
+    )
+    return table.sort_values("mean", ascending=False)
@@ -0,0 +1,30 @@
+from dataclasses import dataclass, fields
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True)
+class SpotifyFilters:
+    """
+    Filtres d'une analyse Spotify.
+
+    Pour chaque colonne indexée (genre, sous-genre, artiste, playlist : voir
+    SPOTIFY_INDEXED_COLUMNS), une ligne est retenue si sa valeur est l'une
+    des valeurs demandées (comparaison exacte) ; les bornes d'année de sortie
+    sont incluses. Les filtres sont combinés entre eux (ET). Aucun filtre :
+    toutes les lignes.
+    """
+
+    genre: Tuple[str, ...] = ()
+    subgenre: Tuple[str, ...] = ()
+    artist: Tuple[str, ...] = ()
+    playlist: Tuple[str, ...] = ()
+    year_min: Optional[int] = None
+    year_max: Optional[int] = None
+
+    def is_empty(self) -> bool:
+        """Indique si aucun filtre n'est demandé."""
+        return not any(getattr(self, f.name) not in ((), None) for f in fields(self))
+
+    def has_year_range(self) -> bool:
+        """Indique si une borne d'année est demandée."""
+        return self.year_min is not None or self.year_max is not None
@@ -0,0 +1,163 @@
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.extractors.extractor_spotify import extract_spotify_data
+from src.observability.tracing import timed_stage
+from src.transformers.spotify_analytics import SpotifyColumns, prepare_spotify_columns
+from src.transformers.spotify_filters import SpotifyFilters
+
+# Colonnes catégorielles indexées, par nom de filtre
+SPOTIFY_INDEXED_COLUMNS = {
+    "genre": "playlist_genre",
+    "subgenre": "playlist_subgenre",
+    "artist": "track_artist",
+    "playlist": "playlist_name",
+}
+
+
+class CategoryIndex:
+    """
+    Index secondaire d'une colonne catégorielle : valeur → positions des lignes.
+
+    Les positions sont regroupées par code de valeur (tri stable : ordre du
+    fichier à l'intérieur d'un groupe) ; offsets[code]:offsets[code + 1]
+    délimite les lignes d'une valeur. Les lignes sans valeur ne sont pas indexées.
+    """
+
+    def __init__(self, values: pd.Series):
+        """
+        Args:
+            values: Colonne à indexer
+        """
+        codes, uniques = pd.factorize(values)
+        self._codes: Dict[object, int] = {value: code for code, value in enumerate(uniques)}
+
+        order = np.argsort(codes, kind="stable")
+        indexed = codes >= 0
+        counts = np.bincount(codes[indexed], minlength=len(uniques))
+        self._positions = order[int((~indexed).sum()):].astype(_position_dtype(len(values)))
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def lookup(self, values: Iterable[str]) -> np.ndarray:
+        """Retourne les positions triées des lignes ayant l'une des valeurs (valeurs inconnues ignorées)."""
+        codes = sorted({self._codes[value] for value in values if value in self._codes})
+        slices = [self._positions[self._offsets[code]:self._offsets[code + 1]] for code in codes]
+        if len(slices) == 1:
+            return slices[0]
+        return np.sort(np.concatenate(slices)) if slices else self._positions[:0]
+
+
+class YearIndex:
+    """Index secondaire de l'année de sortie : années triées et positions des lignes correspondantes."""
+
+    def __init__(self, years: np.ndarray):
+        """
+        Args:
+            years: Année de sortie de chaque ligne (NaN si inconnue)
+        """
+        known = np.flatnonzero(~np.isnan(years))
+        order = np.argsort(years[known], kind="stable")
+        self._years = years[known][order]
+        self._positions = known[order].astype(_position_dtype(len(years)))
+
+    def lookup(self, year_min: Optional[int], year_max: Optional[int]) -> np.ndarray:
+        """Retourne les positions triées des lignes sorties entre les deux années (incluses)."""
+        start = 0 if year_min is None else np.searchsorted(self._years, year_min, side="left")
+        stop = len(self._years) if year_max is None else np.searchsorted(self._years, year_max, side="right")
+        return np.sort(self._positions[start:stop])
+
+
+class SpotifyIndex:
+    """
+    Index secondaires d'un dataset Spotify, construits une fois par version du fichier.
+
+    Le DataFrame n'est pas conservé : seules les colonnes utiles aux analyses
+    (voir SpotifyColumns) et les index le sont. Une sélection n'examine que
+    les listes de positions des valeurs demandées : son coût dépend du nombre
+    de lignes retenues, pas de la taille du dataset.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df: Dataset complet
+        """
+        self.data: SpotifyColumns = prepare_spotify_columns(df)
+        self.categories = {
+            name: CategoryIndex(df[column]) for name, column in SPOTIFY_INDEXED_COLUMNS.items() if column in df.columns
+        }
+        # Mêmes années que la popularité par décennie
+        self.years = None if self.data.years is None else YearIndex(self.data.years)
+
+    def positions(self, filters: SpotifyFilters) -> Optional[np.ndarray]:
+        """
+        Retourne les positions triées des lignes correspondant à tous les filtres (None : toutes).
+
+        Raises:
+            ValueError: Si un filtre porte sur une colonne absente du dataset
+        """
+        selections = []
+        for name, column in SPOTIFY_INDEXED_COLUMNS.items():
+            values = getattr(filters, name)
+            if not values:
+                continue
+            if name not in self.categories:
+                raise ValueError(f"Filtre '{name}' impossible : colonne manquante '{column}'")
+            selections.append(self.categories[name].lookup(values))
+
+        if filters.has_year_range():
+            if self.years is None:
+                raise ValueError("Filtre d'année impossible : colonne manquante 'track_album_release_date'")
+            selections.append(self.years.lookup(filters.year_min, filters.year_max))
+
+        if not selections:
+            return None
+
+        # Intersection en partant de la sélection la plus courte
+        selections.sort(key=len)
+        result = selections[0]
+        for other in selections[1:]:
+            result = _intersect_sorted(result, other)
+        return result
+
+
+@timed_stage("transform.spotify_index")
+def build_spotify_index(df: pd.DataFrame) -> SpotifyIndex:
+    """
+    Construit les index secondaires d'un dataset (genre, sous-genre, artiste, playlist, année).
+
+    Args:
+        df: Dataset complet
+
+    Returns:
+        SpotifyIndex du dataset
+    """
+    return SpotifyIndex(df)
+
+
+def build_spotify_file_index(file_path: str) -> SpotifyIndex:
+    """
+    Charge un fichier Spotify et construit ses index secondaires (le DataFrame n'est pas conservé).
+
+    Args:
+        file_path: Chemin vers le fichier CSV (ou Parquet)
+
+    Returns:
+        SpotifyIndex du fichier
+    """
+    return build_spotify_index(extract_spotify_data(file_path))
+
+
+def _intersect_sorted(small: np.ndarray, large: np.ndarray) -> np.ndarray:
+    """Intersection de deux tableaux triés sans doublons, par recherche dichotomique dans le plus grand."""
+    if len(small) == 0 or len(large) == 0:
+        return small[:0]
+    found = np.minimum(np.searchsorted(large, small), len(large) - 1)
+    return small[large[found] == small]
+
+
+def _position_dtype(rows: int) -> np.dtype:
+    """Type des positions : 32 bits tant que le dataset le permet (moitié moins de mémoire)."""
+    return np.dtype("int32") if rows < 2 ** 31 else np.dtype("int64")
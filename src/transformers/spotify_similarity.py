@@ -0,0 +1,213 @@
+import os
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.extractors.extractor_spotify import extract_spotify_data
+from src.observability.tracing import timed_stage
+
+# Caractéristiques audio comparées (standardisées : moyenne 0, écart-type 1)
+SIMILARITY_FEATURES = (
+    "energy", "tempo", "danceability", "loudness", "valence",
+    "acousticness", "speechiness", "instrumentalness", "liveness",
+)
+
+# Colonnes décrivant les morceaux retournés (absentes du dataset : None)
+SIMILARITY_TRACK_COLUMNS = ("track_id", "track_name", "track_artist", "playlist_genre")
+
+# Nombre maximal de distances calculées à la fois (morceaux de départ × lignes d'un bloc)
+SIMILARITY_BLOCK_SIZE = int(os.getenv("SIMILARITY_BLOCK_SIZE", str(4 * 1024 * 1024)))
+
+# Nombre de morceaux de départ traités ensemble (une multiplication matricielle par bloc)
+SIMILARITY_SEED_BATCH = 256
+
+
+class SimilarityIndex:
+    """
+    Matrice des caractéristiques audio d'un dataset, pour la recherche des plus proches voisins.
+
+    Construite une fois par version du fichier : une ligne par track_id (première
+    occurrence dont toutes les caractéristiques sont renseignées), en float32
+    contigu, avec la norme au carré de chaque ligne. Les distances euclidiennes
+    à un groupe de morceaux sont calculées par blocs de lignes
+    (‖x‖² − 2·x·q + ‖q‖², une multiplication matricielle par bloc) et seuls les
+    k meilleurs candidats de chaque bloc sont conservés : la mémoire utilisée ne
+    dépend pas de la taille du dataset.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df: Dataset complet
+
+        Raises:
+            ValueError: Si une caractéristique audio ou la colonne 'track_id' est absente
+        """
+        missing = [column for column in ("track_id", *SIMILARITY_FEATURES) if column not in df.columns]
+        if missing:
+            raise ValueError(f"Colonnes manquantes pour la similarité: {missing}")
+
+        values = df[list(SIMILARITY_FEATURES)].to_numpy(dtype=np.float64, na_value=np.nan)
+        track_ids = df["track_id"]
+        rows = np.flatnonzero(~np.isnan(values).any(axis=1) & track_ids.notna().to_numpy())
+        # Un morceau présent dans plusieurs playlists n'est comparé qu'une fois
+        rows = rows[~track_ids.iloc[rows].duplicated().to_numpy()]
+
+        values = values[rows]
+        self.mean = values.mean(axis=0) if len(rows) else np.zeros(len(SIMILARITY_FEATURES))
+        std = values.std(axis=0) if len(rows) else np.ones(len(SIMILARITY_FEATURES))
+        # Caractéristique constante : aucune contribution aux distances
+        self.std = np.where(std > 0, std, 1.0)
+
+        self.features = np.ascontiguousarray((values - self.mean) / self.std, dtype=np.float32)
+        self.norms = np.einsum("ij,ij->i", self.features, self.features)
+
+        columns = [column for column in SIMILARITY_TRACK_COLUMNS if column in df.columns]
+        self.tracks = df[columns].iloc[rows].reset_index(drop=True)
+        self._track_ids = pd.Index(self.tracks["track_id"].astype(object))
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    def positions(self, track_ids: Iterable[str]) -> np.ndarray:
+        """Retourne la ligne de chaque track_id dans la matrice (-1 si inconnu du dataset)."""
+        return self._track_ids.get_indexer(list(track_ids))
+
+    def nearest(self, positions: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retourne les k plus proches voisins de chaque morceau de départ (lui-même exclu).
+
+        Args:
+            positions: Lignes des morceaux de départ (voir positions)
+            k: Nombre de voisins par morceau (au plus le nombre de morceaux - 1)
+
+        Returns:
+            (lignes, distances) : tableaux (départs, k) triés par distance croissante
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        k = max(0, min(k, len(self) - 1))
+        neighbours = np.empty((len(positions), k), dtype=np.int64)
+        distances = np.empty((len(positions), k), dtype=np.float32)
+        for start in range(0, len(positions), SIMILARITY_SEED_BATCH):
+            seeds = positions[start:start + SIMILARITY_SEED_BATCH]
+            neighbours[start:start + len(seeds)], distances[start:start + len(seeds)] = self._nearest_batch(seeds, k)
+        return neighbours, distances
+
+    def describe(self, position: int, distance: Optional[float] = None) -> dict:
+        """Retourne la description d'un morceau de la matrice (avec sa distance au morceau de départ)."""
+        track = {column: _optional(self.tracks[column].iat[position]) for column in SIMILARITY_TRACK_COLUMNS
+                 if column in self.tracks.columns}
+        track.update({column: None for column in SIMILARITY_TRACK_COLUMNS if column not in track})
+        if distance is not None:
+            track["distance"] = round(float(distance), 4)
+        return track
+
+    def _nearest_batch(self, seeds: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """k plus proches voisins d'un groupe de morceaux, bloc de lignes par bloc de lignes."""
+        queries = self.features[seeds]
+        query_norms = self.norms[seeds]
+        best_rows = np.empty((len(seeds), 0), dtype=np.int64)
+        best_distances = np.empty((len(seeds), 0), dtype=np.float32)
+        if k == 0 or len(seeds) == 0:
+            return best_rows.reshape(len(seeds), k), best_distances.reshape(len(seeds), k)
+
+        block_rows = max(k + 1, SIMILARITY_BLOCK_SIZE // len(seeds))
+        seed_range = np.arange(len(seeds))
+        for block_start in range(0, len(self), block_rows):
+            block_stop = min(block_start + block_rows, len(self))
+            block = self.features[block_start:block_stop]
+            squared = self.norms[block_start:block_stop] - 2 * (queries @ block.T)
+            squared += query_norms[:, None]
+
+            # Le morceau de départ n'est pas son propre voisin
+            inside = (seeds >= block_start) & (seeds < block_stop)
+            squared[seed_range[inside], seeds[inside] - block_start] = np.inf
+
+            candidates = np.broadcast_to(np.arange(block_start, block_stop), squared.shape)
+            if squared.shape[1] > k:
+                top = np.argpartition(squared, k - 1, axis=1)[:, :k]
+                candidates = np.take_along_axis(candidates, top, axis=1)
+                squared = np.take_along_axis(squared, top, axis=1)
+
+            best_rows = np.concatenate([best_rows, candidates], axis=1)
+            best_distances = np.concatenate([best_distances, squared], axis=1)
+            if best_rows.shape[1] > k:
+                top = np.argpartition(best_distances, k - 1, axis=1)[:, :k]
+                best_rows = np.take_along_axis(best_rows, top, axis=1)
+                best_distances = np.take_along_axis(best_distances, top, axis=1)
+
+        # Distances exactes des k retenus (le développement ‖x‖² − 2·x·q + ‖q‖² perd
+        # en précision près de 0), puis tri par distance et par ligne (ordre stable)
+        differences = self.features[best_rows] - queries[:, None, :]
+        best_distances = np.sqrt(np.einsum("ijk,ijk->ij", differences, differences))
+        order = np.lexsort((best_rows, best_distances), axis=1)
+        return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_distances, order, axis=1)
+
+
+@timed_stage("transform.spotify_similarity")
+def build_similarity_index(df: pd.DataFrame) -> SimilarityIndex:
+    """
+    Construit la matrice standardisée des caractéristiques audio d'un dataset.
+
+    Args:
+        df: Dataset complet
+
+    Returns:
+        SimilarityIndex du dataset
+
+    Raises:
+        ValueError: Si une colonne nécessaire est absente
+    """
+    return SimilarityIndex(df)
+
+
+def build_file_similarity_index(file_path: str) -> SimilarityIndex:
+    """
+    Charge un fichier Spotify et construit sa matrice de similarité (le DataFrame n'est pas conservé).
+
+    Args:
+        file_path: Chemin vers le fichier CSV (ou Parquet)
+
+    Returns:
+        SimilarityIndex du fichier
+    """
+    df = extract_spotify_data(file_path)
+    return build_similarity_index(df[[column for column in (*SIMILARITY_TRACK_COLUMNS, *SIMILARITY_FEATURES)
+                                      if column in df.columns]])
+
+
+def find_similar_tracks(index: SimilarityIndex, track_ids: List[str], k: int) -> dict:
+    """
+    Retourne les k morceaux les plus proches de chaque morceau de départ.
+
+    Args:
+        index: Matrice de similarité du dataset
+        track_ids: Morceaux de départ
+        k: Nombre de voisins par morceau
+
+    Returns:
+        {"tracks": {track_id: {"track": ..., "similar_tracks": [...]}}, "not_found": [...]}
+    """
+    track_ids = list(dict.fromkeys(track_ids))
+    positions = index.positions(track_ids)
+    found = positions >= 0
+    neighbours, distances = index.nearest(positions[found], k)
+
+    tracks = {}
+    for seed, position, rows, row_distances in zip(
+        np.asarray(track_ids, dtype=object)[found], positions[found], neighbours, distances
+    ):
+        tracks[seed] = {
+            "track": index.describe(position),
+            "similar_tracks": [index.describe(row, distance) for row, distance in zip(rows, row_distances)],
+        }
+    return {
+        "tracks": tracks,
+        "not_found": [track_id for track_id, known in zip(track_ids, found) if not known],
+    }
+
+
+def _optional(value):
+    """Valeur manquante (NA pandas) → None."""
+    return None if pd.isna(value) else value
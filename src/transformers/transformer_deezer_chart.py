@@ -1,13 +1,28 @@
-import pandas as pd
-import requests
-from typing import Dict, Any, List, Optional
-from functools import lru_cache
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+
+from src.cache.tiered_cache import MISSING
+from src.extractors.deezer_client import DeezerError, deezer_client
+from src.observability.tracing import timed_stage
+from src.transformers.deezer_genre_enricher import (
+    DeezerGenreEnricher,
+    album_genre_key,
+    cache_genre_listing,
+    deezer_genre_cache,
+    genre_name_key,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
 
 
-@lru_cache(maxsize=500)
 def get_album_genre(album_id: int) -> Optional[int]:
     """
-    Récupère le genre_id d'un album avec mise en cache.
+    Récupère le genre_id d'un album avec mise en cache (mémoire + SQLite, avec TTL).
 
     Args:
         album_id: ID de l'album Deezer
@@ -15,24 +30,30 @@ def get_album_genre(album_id: int) -> Optional[int]:
     Returns:
         int: ID du genre ou None si non trouvé
     """
+    cached = deezer_genre_cache.get(album_genre_key(album_id))
+    if cached is not MISSING:
+        return cached
+
     try:
-        url = f"https://api.deezer.com/album/{album_id}"
-        response = requests.get(url)
-        if response.status_code == 200:
-            album_data = response.json()
-            genres = album_data.get('genres', {}).get('data', [])
-            if genres:
-                return genres[0].get('id', None)
-        return None
-    except Exception as e:
-        print(f"⚠️ Erreur album {album_id}: {e}")
+        genre_id = _fetch_album_genre(album_id)
+    except DeezerError:
+        # Échec transitoire (déjà journalisé par le client) : non mis en cache
         return None
+    deezer_genre_cache.set(album_genre_key(album_id), genre_id)
+    return genre_id
+
+
+@timed_stage("deezer.fetch_album")
+def _fetch_album_genre(album_id: int) -> Optional[int]:
+    """Interroge l'API Deezer pour le genre_id d'un album."""
+    album_data = deezer_client.get_json(f"/album/{album_id}")
+    genres = (album_data or {}).get('genres', {}).get('data', [])
+    return genres[0].get('id', None) if genres else None
 
 
-@lru_cache(maxsize=100)
 def get_genre_name(genre_id: Optional[int]) -> Optional[str]:
     """
-    Récupère le nom d'un genre à partir de son ID avec mise en cache.
+    Récupère le nom d'un genre à partir de son ID avec mise en cache (mémoire + SQLite, avec TTL).
 
     Args:
         genre_id: ID du genre Deezer
@@ -42,18 +63,55 @@ def get_genre_name(genre_id: Optional[int]) -> Optional[str]:
     """
     if genre_id is None:
         return None
+
+    cached = deezer_genre_cache.get(genre_name_key(genre_id))
+    if cached is not MISSING:
+        return cached
+
     try:
-        url = f"https://api.deezer.com/genre/{genre_id}"
-        response = requests.get(url)
-        if response.status_code == 200:
-            genre_data = response.json()
-            return genre_data.get('name', None)
-        return None
-    except Exception as e:
-        print(f"⚠️ Erreur genre {genre_id}: {e}")
+        genre_name = _fetch_genre_name(genre_id)
+    except DeezerError:
         return None
+    deezer_genre_cache.set(genre_name_key(genre_id), genre_name)
+    return genre_name
 
 
+def get_genre_names(genre_ids: List[int]) -> Dict[int, Optional[str]]:
+    """
+    Récupère les noms de plusieurs genres avec mise en cache.
+
+    Si plusieurs genres sont absents du cache, la liste complète des genres
+    (/genre) est récupérée en un seul appel et mise en cache.
+
+    Args:
+        genre_ids: IDs des genres Deezer (sans doublons)
+
+    Returns:
+        Dict[int, Optional[str]]: {genre_id: nom du genre}
+    """
+    missing = [genre_id for genre_id in genre_ids if deezer_genre_cache.get(genre_name_key(genre_id)) is MISSING]
+    if len(missing) > 1:
+        try:
+            cache_genre_listing(_fetch_genre_listing(), deezer_genre_cache)
+        except DeezerError:
+            pass
+    return {genre_id: get_genre_name(genre_id) for genre_id in genre_ids}
+
+
+@timed_stage("deezer.fetch_genre")
+def _fetch_genre_listing() -> Optional[Dict[str, Any]]:
+    """Interroge l'API Deezer pour la liste complète des genres."""
+    return deezer_client.get_json("/genre")
+
+
+@timed_stage("deezer.fetch_genre")
+def _fetch_genre_name(genre_id: int) -> Optional[str]:
+    """Interroge l'API Deezer pour le nom d'un genre."""
+    genre_data = deezer_client.get_json(f"/genre/{int(genre_id)}")
+    return (genre_data or {}).get('name', None)
+
+
+@timed_stage("transform.deezer_chart")
 def transform_deezer_chart(data: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Transforme les données brutes du chart Deezer en format exploitable.
@@ -65,15 +123,68 @@ def transform_deezer_chart(data: Dict[str, Any]) -> List[Dict[str, Any]]:
     Returns:
         List[Dict]: Liste des tracks avec leurs métadonnées enrichies
     """
+    df_tracks_filtered = _normalize_chart_tracks(data)
+
+    # Albums uniques (toutes pages confondues) : un seul appel par album
+    unique_albums = df_tracks_filtered['album.id'].unique()
+    logger.debug("Récupération des genres", extra={"unique_albums": len(unique_albums)})
+    album_genres = {album_id: get_album_genre(album_id) for album_id in unique_albums}
+
+    # Genres uniques : la liste complète des genres est récupérée en un appel s'il en manque plusieurs
+    unique_genres = list(dict.fromkeys(genre_id for genre_id in album_genres.values() if genre_id is not None))
+    logger.debug("Récupération des noms de genres", extra={"unique_genres": len(unique_genres)})
+    genre_names = get_genre_names(unique_genres)
+
+    df_tracks_filtered['genre_name'] = df_tracks_filtered['album.id'].map(
+        lambda album_id: genre_names.get(album_genres[album_id])
+    )
+
+    return _to_chart_records(df_tracks_filtered)
+
+
+@timed_stage("transform.deezer_chart")
+async def transform_deezer_chart_async(
+    data: Dict[str, Any],
+    enricher: DeezerGenreEnricher,
+) -> List[Dict[str, Any]]:
+    """
+    Transforme les données brutes du chart Deezer en récupérant les genres en parallèle.
+
+    Args:
+        data: Données brutes de l'API Deezer Chart
+        enricher: Moteur d'enrichissement partagé (client HTTP mutualisé)
+
+    Returns:
+        List[Dict]: Liste des tracks avec leurs métadonnées enrichies
+    """
+    df_tracks_filtered = _normalize_chart_tracks(data)
+
+    # Albums dédupliqués puis récupérés en parallèle
+    unique_albums = df_tracks_filtered['album.id'].unique()
+    logger.debug("Récupération des genres", extra={"unique_albums": len(unique_albums)})
+    album_genre_names = await enricher.get_album_genre_names(unique_albums)
+
+    df_tracks_filtered['genre_name'] = df_tracks_filtered['album.id'].map(
+        lambda album_id: album_genre_names.get(int(album_id))
+    )
+
+    return _to_chart_records(df_tracks_filtered)
+
+
+def _normalize_chart_tracks(data: Dict[str, Any]) -> pd.DataFrame:
+    """Aplatit les tracks du chart et sélectionne les colonnes utiles."""
+    # Import différé : pandas n'est chargé qu'à la première transformation du chart
+    import pandas as pd
+
     # Extraire les tracks
     tracks_data = data['tracks']['data']
 
     # Normaliser les données (aplatir les objets imbriqués)
     df_tracks_normalized = pd.json_normalize(tracks_data)
-    print(f"📊 {len(df_tracks_normalized)} tracks à traiter")
+    logger.debug("Tracks du chart à traiter", extra={"tracks": len(df_tracks_normalized)})
 
     # Sélectionner les colonnes pertinentes
-    df_tracks_filtered = df_tracks_normalized[[
+    return df_tracks_normalized[[
         'title',
         'artist.name',
         'artist.picture',
@@ -81,23 +192,9 @@ def transform_deezer_chart(data: Dict[str, Any]) -> List[Dict[str, Any]]:
         'explicit_lyrics'
     ]].copy()
 
-    # Récupérer les albums uniques pour optimiser les appels
-    unique_albums = df_tracks_filtered['album.id'].unique()
-    print(f"🔍 Récupération des genres pour {len(unique_albums)} albums uniques...")
-
-    # Appliquer la fonction avec cache
-    df_tracks_filtered['genre_id'] = df_tracks_filtered['album.id'].apply(
-        lambda album_id: get_album_genre(album_id)
-    )
-
-    # Récupérer les genres uniques
-    unique_genres = df_tracks_filtered['genre_id'].dropna().unique()
-    print(f"🎵 Récupération des noms pour {len(unique_genres)} genres uniques...")
-
-    df_tracks_filtered['genre_name'] = df_tracks_filtered['genre_id'].apply(
-        lambda genre_id: get_genre_name(genre_id)
-    )
 
+def _to_chart_records(df_tracks_filtered: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Renomme les colonnes enrichies et convertit le chart en liste de dictionnaires."""
     # Créer le DataFrame final avec les colonnes renommées
     df_tracks_final = df_tracks_filtered[[
         'title',
@@ -115,8 +212,13 @@ def transform_deezer_chart(data: Dict[str, Any]) -> List[Dict[str, Any]]:
     return result
 
 
-def clear_cache():
-    """Vide le cache des fonctions de récupération de genres."""
-    get_album_genre.cache_clear()
-    get_genre_name.cache_clear()
-    print("🗑️ Cache vidé")
+def clear_cache() -> Dict[str, Dict[str, int]]:
+    """
+    Vide le cache des genres (tous les niveaux).
+
+    Returns:
+        Dict: Statistiques par niveau ('memory', 'sqlite') avant vidage
+    """
+    stats = deezer_genre_cache.clear()
+    logger.info("Cache des genres Deezer vidé")
+    return stats
@@ -1,45 +1,72 @@
-import pandas as pd
-from typing import Dict
+from __future__ import annotations
 
-def get_top_genres_by_popularity(df: pd.DataFrame, top_n: int = 3) -> Dict[str, int]:
+from typing import TYPE_CHECKING, Any, Dict, Iterable
+
+from src.observability.tracing import timed_stage
+
+# Imports différés : les noms des statistiques sont disponibles sans charger pandas
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from src.transformers.spotify_analytics import SpotifyAnalytics
+    from src.transformers.spotify_filters import SpotifyFilters
+    from src.transformers.spotify_index import SpotifyIndex
+
+# Statistiques disponibles pour le calcul groupé
+TOP_GENRES = "top_genres"
+TOP_SUBGENRES = "top_subgenres"
+TOP_DECADES = "top_decades"
+DURATION_POPULARITY_CORRELATION = "duration_popularity_correlation"
+MEAN_POPULARITY = "mean_popularity"
+SPOTIFY_METRICS = (TOP_GENRES, TOP_SUBGENRES, TOP_DECADES, DURATION_POPULARITY_CORRELATION, MEAN_POPULARITY)
+
+
+def build_genre_popularity_table(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Nettoie les données et retourne les N genres les plus populaires.
+    Nettoie les données et construit la table agrégée de popularité par genre.
 
     Args:
         df: DataFrame Spotify contenant les colonnes 'playlist_genre' et 'track_popularity'
-        top_n: Nombre de genres à retourner (par défaut 3)
 
     Returns:
-        Dictionnaire {genre: popularité_moyenne} des top N genres (valeurs arrondies en entiers)
+        DataFrame indexé par genre avec les colonnes 'sum', 'count' et 'mean',
+        trié par popularité moyenne décroissante
     """
-    # Copie pour ne pas modifier l'original
-    df_clean = df.copy()
-
-    # Supprimer les doublons
-    nb_doublons = df_clean.duplicated().sum()
-    df_clean = df_clean.drop_duplicates()
-    print(f"🔄 {nb_doublons} doublons supprimés")
+    from src.transformers.spotify_analytics import compute_spotify_analytics
 
-    # Supprimer les valeurs manquantes
-    nb_lignes_avant = len(df_clean)
-    df_clean = df_clean.dropna()
-    nb_lignes_supprimees = nb_lignes_avant - len(df_clean)
-    print(f"🗑️ {nb_lignes_supprimees} lignes avec valeurs manquantes supprimées")
+    return compute_spotify_analytics(df).genre_popularity_table()
 
-    print(f"✅ Dataset final : {df_clean.shape[0]} lignes, {df_clean.shape[1]} colonnes")
 
-    # Calculer la popularité totale par genre
-    popularity_by_genre = df_clean.groupby('playlist_genre')['track_popularity'].mean().sort_values(ascending=False)
+def top_genres_from_table(table: pd.DataFrame, top_n: int = 3) -> Dict[str, int]:
+    """
+    Retourne les N genres les plus populaires depuis la table agrégée (déjà triée).
 
-    
+    Args:
+        table: Table construite par build_genre_popularity_table
+        top_n: Nombre de genres à retourner (par défaut 3)
 
-    # Trier et prendre les top N
-    top_genres = popularity_by_genre.sort_values(ascending=False).head(top_n)
+    Returns:
+        Dictionnaire {genre: popularité_moyenne} des top N genres (valeurs arrondies en entiers)
+    """
+    top_genres = table["mean"].head(top_n)
 
     # Convertir les valeurs en entiers (arrondir)
-    return {genre: int(round(popularity)) for genre, popularity in top_genres.to_dict().items()}
+    return {genre: int(round(popularity)) for genre, popularity in top_genres.items()}
 
 
+def get_top_genres_by_popularity(df: pd.DataFrame, top_n: int = 3) -> Dict[str, int]:
+    """
+    Nettoie les données et retourne les N genres les plus populaires.
+
+    Args:
+        df: DataFrame Spotify contenant les colonnes 'playlist_genre' et 'track_popularity'
+        top_n: Nombre de genres à retourner (par défaut 3)
+
+    Returns:
+        Dictionnaire {genre: popularité_moyenne} des top N genres (valeurs arrondies en entiers)
+    """
+    return top_genres_from_table(build_genre_popularity_table(df), top_n=top_n)
+
 
 def compute_duration_popularity_correlation(df: pd.DataFrame) -> float:
     """
@@ -54,23 +81,46 @@ def compute_duration_popularity_correlation(df: pd.DataFrame) -> float:
     Raises:
         ValueError: Si les colonnes requises sont absentes, ou si la corrélation est indéfinissable.
     """
-    required_columns = {"duration_ms", "track_popularity"}
-    missing = required_columns - set(df.columns)
-    if missing:
-        raise ValueError(f"Colonnes manquantes pour le calcul de corrélation: {missing}")
+    from src.transformers.spotify_analytics import compute_spotify_analytics
 
-    df_clean = df[list(required_columns)].dropna()
-    if df_clean.empty:
-        raise ValueError("Impossible de calculer la corrélation: aucune donnée valide après nettoyage.")
+    return compute_spotify_analytics(df).duration_popularity_correlation()
 
-    # Conversion en minutes pour plus de lisibilité
-    df_clean = df_clean.assign(duration_min=df_clean["duration_ms"] / 60000)
-    corr = df_clean[["duration_min", "track_popularity"]].corr().iloc[0, 1]
 
-    if pd.isna(corr):
-        raise ValueError("Corrélation indéfinie (données constantes ou insuffisantes).")
+def build_decade_popularity_table(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Construit la table agrégée de popularité par décennie.
+
+    Args:
+        df: DataFrame Spotify contenant 'track_popularity' et 'track_album_release_date'
+            (ou 'release_year', déjà dérivée au chargement)
 
-    return round(float(corr), 2)
+    Returns:
+        DataFrame indexé par décennie avec les colonnes 'sum', 'count' et 'mean',
+        trié par popularité moyenne décroissante
+
+    Raises:
+        ValueError: Si les colonnes requises sont absentes ou si aucune année n'est exploitable
+    """
+    from src.transformers.spotify_analytics import compute_spotify_analytics
+
+    return compute_spotify_analytics(df).decade_popularity_table()
+
+
+def top_decades_from_table(table: pd.DataFrame, top_n: int = 3) -> Dict[int, int]:
+    """
+    Retourne les N décennies les plus populaires depuis la table agrégée (déjà triée).
+
+    Args:
+        table: Table construite par build_decade_popularity_table
+        top_n: Nombre de décennies à retourner
+
+    Returns:
+        Dictionnaire {decade: popularité_moyenne} (valeurs arrondies en entiers)
+    """
+    top_decades = table["mean"].head(top_n)
+
+    # Convertir les valeurs de popularité en entiers (arrondir)
+    return {int(decade): int(round(popularity)) for decade, popularity in top_decades.items()}
 
 
 def get_top_decades_by_popularity(df: pd.DataFrame, top_n: int = 3) -> Dict[int, int]:
@@ -78,36 +128,85 @@ def get_top_decades_by_popularity(df: pd.DataFrame, top_n: int = 3) -> Dict[int,
     Retourne les décennies les plus populaires selon la popularité moyenne des morceaux.
 
     Args:
-        df: DataFrame Spotify contenant 'track_album_release_date' et 'track_popularity'
+        df: DataFrame Spotify contenant 'track_popularity' et 'track_album_release_date'
+            (ou 'release_year', déjà dérivée au chargement)
         top_n: Nombre de décennies à retourner
 
     Returns:
         Dictionnaire {decade: popularité_moyenne} (valeurs arrondies en entiers)
     """
-    required_columns = {"track_album_release_date", "track_popularity"}
-    missing = required_columns - set(df.columns)
-    if missing:
-        raise ValueError(f"Colonnes manquantes pour le calcul de popularité par décennie: {missing}")
+    return top_decades_from_table(build_decade_popularity_table(df), top_n=top_n)
+
+
+@timed_stage("transform.spotify_filtered_analytics")
+def compute_filtered_spotify_analytics(index: SpotifyIndex, filters: SpotifyFilters) -> SpotifyAnalytics:
+    """
+    Calcule les analyses sur les seules lignes correspondant aux filtres.
 
-    df_clean = df[list(required_columns)].dropna()
-    if df_clean.empty:
-        raise ValueError("Aucune donnée valide pour calculer la popularité par décennie.")
+    Les positions des lignes sont lues dans les index secondaires du dataset
+    (listes de positions par valeur, années triées), sans masque booléen sur
+    le DataFrame complet : seules les valeurs des lignes retenues sont lues
+    dans les colonnes préparées, avec les mêmes règles de nettoyage que
+    compute_spotify_analytics sur ces lignes.
 
-    # Conversion en année puis en décennie
-    df_clean = df_clean.assign(
-        release_year=pd.to_datetime(df_clean["track_album_release_date"], errors="coerce").dt.year
-    )
-    df_clean = df_clean.dropna(subset=["release_year"])
-    if df_clean.empty:
-        raise ValueError("Impossible de déterminer les années de sortie après conversion.")
+    Args:
+        index: Index secondaires du dataset (voir build_spotify_index)
+        filters: Filtres à appliquer
 
-    df_clean = df_clean.assign(decade=(df_clean["release_year"] // 10) * 10)
+    Returns:
+        SpotifyAnalytics des lignes retenues
 
-    decade_popularity = (
-        df_clean.groupby("decade")["track_popularity"].mean().sort_values(ascending=False)
-    )
+    Raises:
+        ValueError: Si un filtre porte sur une colonne absente du dataset
+    """
+    from src.transformers.spotify_analytics import analyze_spotify_rows
 
-    top_decades = decade_popularity.head(top_n)
+    return analyze_spotify_rows(index.data, index.positions(filters))
 
-    # Convertir les valeurs de popularité en entiers (arrondir)
-    return {int(decade): int(round(popularity)) for decade, popularity in top_decades.items()}
+
+def summarize_spotify_analytics(
+    analytics: SpotifyAnalytics,
+    metrics: Iterable[str] = SPOTIFY_METRICS,
+    top_n_genres: int = 3,
+    top_n_decades: int = 3,
+    top_n_subgenres: int = 3,
+) -> Dict[str, Any]:
+    """
+    Calcule plusieurs statistiques à partir des mêmes analyses (données chargées et nettoyées une fois).
+
+    Une statistique impossible à calculer (colonne manquante, corrélation
+    indéfinie) est signalée dans 'errors' sans empêcher les autres.
+
+    Args:
+        analytics: Analyses d'un ou plusieurs datasets
+        metrics: Statistiques demandées (parmi SPOTIFY_METRICS)
+        top_n_genres: Nombre de genres à retourner
+        top_n_decades: Nombre de décennies à retourner
+        top_n_subgenres: Nombre de sous-genres à retourner
+
+    Returns:
+        Dict avec 'total_tracks_analyzed', une clé par statistique calculée et 'errors'
+
+    Raises:
+        ValueError: Si une statistique demandée est inconnue
+    """
+    unknown = set(metrics) - set(SPOTIFY_METRICS)
+    if unknown:
+        raise ValueError(f"Statistique(s) inconnue(s): {sorted(unknown)}. Valeurs possibles : {list(SPOTIFY_METRICS)}")
+
+    summary: Dict[str, Any] = {"total_tracks_analyzed": analytics.total_tracks, "errors": {}}
+    for metric in dict.fromkeys(metrics):
+        try:
+            if metric == TOP_GENRES:
+                summary[metric] = top_genres_from_table(analytics.genre_popularity_table(), top_n=top_n_genres)
+            elif metric == TOP_SUBGENRES:
+                summary[metric] = top_genres_from_table(analytics.subgenre_popularity_table(), top_n=top_n_subgenres)
+            elif metric == TOP_DECADES:
+                summary[metric] = top_decades_from_table(analytics.decade_popularity_table(), top_n=top_n_decades)
+            elif metric == MEAN_POPULARITY:
+                summary[metric] = analytics.mean_popularity()
+            else:
+                summary[metric] = analytics.duration_popularity_correlation()
+        except ValueError as e:
+            summary["errors"][metric] = str(e)
+    return summary
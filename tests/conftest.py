@@ -0,0 +1,19 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Les tests importent src, app et benchmarks depuis la racine du dépôt
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(autouse=True, scope="session")
+def repo_root():
+    """Exécute les tests depuis la racine du dépôt (chemins data/ relatifs, comme l'application)."""
+    previous = os.getcwd()
+    os.chdir(ROOT)
+    yield ROOT
+    os.chdir(previous)
@@ -0,0 +1,124 @@
+import pytest
+
+from src.loaders.deezer_chart_history import SECONDS_PER_DAY, DeezerChartHistory
+
+# Début d'un jour UTC : les versions du premier jour sont dans la même partition
+T0 = 20000 * SECONDS_PER_DAY
+HOUR = 3600
+
+
+def track(artist: str, title: str, genre=None) -> dict:
+    return {"artist": artist, "track": title, "genre": genre, "artist_picture": None, "is_explicit_lyrics": False}
+
+
+CHART_A = [track("Artist A", "A1", "Pop"), track("Artist A", "A2", "Rap"), track("Artist B", "B1", "Pop"), track("Artist C", "C1")]
+CHART_B = [track("Artist B", "B1", "Pop"), track("Artist A", "A1", "Pop"), track("Artist D", "D1", "Rock"), track("Artist A", "A2", "Rap")]
+CHART_C = [track("Artist D", "D1", "Rock"), track("Artist B", "B1", "Pop"), track("Artist A", "A1", "Pop"), track("Artist C", "C1")]
+
+
+@pytest.fixture
+def history(tmp_path):
+    return DeezerChartHistory(str(tmp_path / "history" / "deezer_chart.sqlite"))
+
+
+@pytest.fixture
+def two_versions(history):
+    """Chart A servi de T0 à T0+2h (vu jusqu'à T0+1h), puis chart B (vu de T0+2h à T0+3h)."""
+    history.append(CHART_A, T0)
+    history.append(CHART_A, T0 + HOUR)
+    history.append(CHART_B, T0 + 2 * HOUR)
+    history.append(CHART_B, T0 + 3 * HOUR)
+    return history
+
+
+def test_identical_snapshot_is_not_stored_twice(history):
+    assert history.append(CHART_A, T0)
+    assert not history.append(CHART_A, T0 + HOUR)
+    assert history.stats()["deezer_chart"]["versions"] == 1
+
+    assert history.append(CHART_B, T0 + 2 * HOUR)
+    stats = history.stats()["deezer_chart"]
+    assert stats["versions"] == 2
+    assert stats["entries"] == 8
+    # Titres stockés une fois (dictionnaire)
+    assert stats["tracks"] == 5
+
+
+def test_identical_snapshot_extends_last_seen_at(history):
+    history.append(CHART_A, T0)
+    history.append(CHART_A, T0 + HOUR)
+    # Snapshot en retard d'un autre worker : la dernière observation ne recule pas
+    history.append(CHART_A, T0 + HOUR / 2)
+
+    [version] = history.versions(T0, T0 + 2 * HOUR)
+    assert version.snapshot_at == T0
+    assert version.last_seen_at == T0 + HOUR
+    assert version.until == T0 + HOUR
+
+
+def test_older_snapshot_is_not_appended_after_a_newer_version(history):
+    assert history.append(CHART_A, T0 + 2 * HOUR)
+    # Récupéré avant la dernière version mais enregistré après (autre worker)
+    assert not history.append(CHART_B, T0 + HOUR)
+
+    assert [version.snapshot_at for version in history.versions(T0, T0 + 3 * HOUR)] == [T0 + 2 * HOUR]
+    assert history.append(CHART_B, T0 + 3 * HOUR)
+
+
+def test_versions_include_the_version_in_place_at_start(two_versions):
+    first, second = two_versions.versions(T0 + HOUR / 2, T0 + 2.5 * HOUR)
+
+    assert (first.snapshot_at, first.until) == (T0, T0 + 2 * HOUR)
+    assert (second.snapshot_at, second.until) == (T0 + 2 * HOUR, T0 + 3 * HOUR)
+    assert first.overlap(T0 + HOUR / 2, T0 + 2.5 * HOUR) == 1.5 * HOUR
+    assert second.overlap(T0 + HOUR / 2, T0 + 2.5 * HOUR) == 0.5 * HOUR
+
+    assert [version.snapshot_at for version in two_versions.versions(T0 + 2.5 * HOUR, T0 + 4 * HOUR)] == [T0 + 2 * HOUR]
+    # Dernière version plus observée au début de la période
+    assert two_versions.versions(T0 + 4 * HOUR, T0 + 5 * HOUR) == []
+
+
+def test_track_history(two_versions):
+    history = two_versions.track_history("artist a", None, T0, T0 + 3 * HOUR, top=1)
+
+    assert [(entry["track"], entry["best_rank"]) for entry in history] == [("A1", 1), ("A2", 2)]
+    a1, a2 = history
+    assert [(rank["at"], rank["until"], rank["rank"]) for rank in a1["ranks"]] == [
+        (T0, T0 + 2 * HOUR, 1),
+        (T0 + 2 * HOUR, T0 + 3 * HOUR, 2),
+    ]
+    assert a1["seconds_in_chart"] == 3 * HOUR
+    assert a1["seconds_in_top"] == 2 * HOUR
+    assert a2["seconds_in_top"] == 0
+
+    [only] = two_versions.track_history("Artist A", "a2", T0 + 2 * HOUR, T0 + 3 * HOUR, top=10)
+    assert [rank["rank"] for rank in only["ranks"]] == [4]
+    assert two_versions.track_history("Unknown", None, T0, T0 + 3 * HOUR, top=10) == []
+
+
+def test_genre_share_weights_versions_by_duration(two_versions):
+    share = two_versions.genre_share(T0, T0 + 3 * HOUR)
+
+    # A : 2h (Pop 2, Rap 1, sans genre 1) ; B : 1h (Pop 2, Rap 1, Rock 1)
+    assert share["days"] == [{"day": T0, "shares": {"Pop": 0.5, "Rap": 0.25, "Rock": round(1 / 12, 4)}}]
+    assert {entry["genre"]: entry["change"] for entry in share["genres"]} == {"Pop": 0.0, "Rap": 0.0, "Rock": 0.0}
+
+    assert two_versions.genre_share(T0, T0 + 3 * HOUR, top=1)["days"][0]["shares"] == {"Pop": 1.0}
+    assert two_versions.genre_share(T0 - 2 * HOUR, T0 - HOUR) == {"days": [], "genres": []}
+
+
+def test_genre_share_change_across_days(two_versions):
+    two_versions.append(CHART_C, T0 + SECONDS_PER_DAY)
+    two_versions.append(CHART_C, T0 + SECONDS_PER_DAY + HOUR)
+
+    share = two_versions.genre_share(T0, T0 + SECONDS_PER_DAY + HOUR)
+
+    first_day, second_day = share["days"]
+    assert first_day["day"] == T0
+    assert second_day == {"day": T0 + SECONDS_PER_DAY, "shares": {"Pop": 0.5, "Rock": 0.25}}
+    genres = {entry["genre"]: entry for entry in share["genres"]}
+    assert genres["Rock"]["last_share"] == 0.25
+    assert genres["Rap"]["last_share"] == 0.0
+    # Triés par progression décroissante
+    assert share["genres"][0]["genre"] == "Rock"
+    assert share["genres"][-1]["genre"] == "Rap"
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+
+import pytest
+
+from benchmarks.fake_deezer import make_fake_chart, make_fake_deezer_transport
+from src.cache.tiered_cache import MemoryCacheTier, TieredCache
+from src.scheduling.deezer_chart_refresher import DeezerChartRefresher
+from src.transformers.deezer_genre_enricher import DeezerGenreEnricher
+
+
+class FakeExtractor:
+    """Extracteur de chart factice : compte les appels, peut échouer ou rester bloqué jusqu'à release()."""
+
+    def __init__(self, n_tracks: int = 10):
+        self.n_tracks = n_tracks
+        self.calls = 0
+        self.error = None
+        self._gate = threading.Event()
+        self._gate.set()
+
+    def __call__(self):
+        self.calls += 1
+        self._gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return make_fake_chart(self.n_tracks, 8)
+
+    def block(self) -> None:
+        self._gate.clear()
+
+    def release(self) -> None:
+        self._gate.set()
+
+
+def make_refresher(extractor: FakeExtractor, interval: float = 300) -> DeezerChartRefresher:
+    """Refresher hors réseau (faux transport Deezer, cache mémoire) et sans historique."""
+    enricher = DeezerGenreEnricher(
+        transport=make_fake_deezer_transport(latency=0.0),
+        cache=TieredCache([MemoryCacheTier()], ttl=3600, negative_ttl=3600),
+        rate_limiter=None,
+        circuit_breaker=None,
+    )
+    return DeezerChartRefresher(enricher, extractor=extractor, interval=interval, history=None)
+
+
+def run(scenario):
+    """Exécute un scénario async(refresher, extractor) puis arrête le refresher."""
+    extractor = FakeExtractor()
+    refresher = make_refresher(extractor)
+
+    async def main():
+        try:
+            await scenario(refresher, extractor)
+        finally:
+            extractor.release()
+            await refresher.stop()
+
+    asyncio.run(main())
+
+
+def test_first_get_snapshot_waits_for_a_refresh():
+    async def scenario(refresher, extractor):
+        assert refresher.snapshot is None
+        snapshot = await refresher.get_snapshot()
+        assert extractor.calls == 1
+        assert len(snapshot.tracks) == 10
+        assert snapshot.tracks[0]["genre"] is not None
+        assert refresher.snapshot is snapshot
+        assert not refresher.is_stale()
+
+    run(scenario)
+
+
+def test_stale_snapshot_is_served_while_one_revalidation_runs():
+    async def scenario(refresher, extractor):
+        first = await refresher.refresh()
+        first.fetched_at -= refresher.interval + 1
+        assert refresher.is_stale()
+
+        extractor.block()
+        served = [await refresher.get_snapshot() for _ in range(5)]
+        assert all(snapshot is first for snapshot in served)
+
+        # Laisse démarrer la revalidation : un seul appel à l'extracteur, bloqué
+        for _ in range(100):
+            if extractor.calls == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert extractor.calls == 2
+        assert await refresher.get_snapshot() is first
+
+        extractor.release()
+        await refresher._revalidation
+        assert extractor.calls == 2
+        assert refresher.snapshot is not first
+        assert not refresher.is_stale()
+
+    run(scenario)
+
+
+def test_failed_refresh_keeps_previous_snapshot_and_sets_last_error():
+    async def scenario(refresher, extractor):
+        first = await refresher.refresh()
+        extractor.error = RuntimeError("Deezer indisponible")
+
+        with pytest.raises(RuntimeError):
+            await refresher.refresh()
+        assert refresher.snapshot is first
+        assert refresher.last_error == "Deezer indisponible"
+        assert refresher.is_stale()
+
+        # Servi tel quel, revalidation en échec journalisée sans être propagée
+        assert await refresher.get_snapshot() is first
+        await refresher._revalidation
+        assert refresher.snapshot is first
+
+        extractor.error = None
+        await refresher.refresh()
+        assert refresher.last_error is None
+        assert refresher.snapshot is not first
+
+    run(scenario)
+
+
+def test_wait_first_refresh_raises_when_first_attempt_fails():
+    async def scenario(refresher, extractor):
+        extractor.error = RuntimeError("Deezer indisponible")
+        waiter = asyncio.create_task(refresher.wait_first_refresh())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        refresher.start()
+        with pytest.raises(RuntimeError, match="Deezer indisponible"):
+            await waiter
+        assert refresher.snapshot is None
+
+    run(scenario)
+
+
+def test_wait_first_refresh_returns_first_snapshot():
+    async def scenario(refresher, extractor):
+        refresher.start()
+        snapshot = await refresher.wait_first_refresh()
+        assert snapshot is refresher.snapshot
+        assert extractor.calls == 1
+
+    run(scenario)
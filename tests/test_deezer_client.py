@@ -0,0 +1,193 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from benchmarks.fake_deezer import QUOTA_ERROR, FakeDeezerServer
+from src.extractors.deezer_client import (
+    CIRCUIT_OPEN,
+    DEEZER_REQUEST_DURATION,
+    DEEZER_REQUESTS,
+    DEEZER_RETRIES,
+    NOT_FOUND,
+    OK,
+    QUOTA,
+    SERVER_ERROR,
+    AsyncDeezerClient,
+    CircuitBreaker,
+    DeezerCircuitOpenError,
+    DeezerClient,
+    DeezerError,
+)
+
+BUSY_ERROR = {"error": {"type": "Exception", "message": "Service busy", "code": 700}}
+NO_DATA_ERROR = {"error": {"type": "DataException", "message": "no data", "code": 800}}
+ALBUM = {"genres": {"data": [{"id": 132}]}}
+
+
+class ScriptedTransport(httpx.AsyncBaseTransport):
+    """Transport httpx qui répond (statut, corps) à chaque requête et compte les requêtes reçues."""
+
+    def __init__(self, status_code: int = 200, payload=ALBUM):
+        self.status_code = status_code
+        self.payload = payload
+        self.requests = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        return httpx.Response(self.status_code, json=self.payload)
+
+
+def make_client(transport: ScriptedTransport, max_retries: int = 2, circuit_breaker=None) -> AsyncDeezerClient:
+    """Client sans quota local ni attente entre les tentatives."""
+    return AsyncDeezerClient(
+        base_url="https://deezer.test",
+        max_retries=max_retries,
+        backoff_base=0.0,
+        rate_limiter=None,
+        circuit_breaker=circuit_breaker,
+        transport=transport,
+    )
+
+
+async def get_json(client: AsyncDeezerClient, path: str):
+    try:
+        return await client.get_json(path)
+    finally:
+        await client.aclose()
+
+
+def requests_count(outcome: str, endpoint: str = "album") -> float:
+    return DEEZER_REQUESTS._values.get((endpoint, outcome), 0)
+
+
+def retries_count(endpoint: str = "album") -> float:
+    return DEEZER_RETRIES._values.get((endpoint,), 0)
+
+
+def duration_count(outcome: str, endpoint: str = "album") -> int:
+    series = DEEZER_REQUEST_DURATION._series.get((endpoint, outcome))
+    return series[2] if series else 0
+
+
+@pytest.mark.parametrize("payload, outcome", [(QUOTA_ERROR, QUOTA), (BUSY_ERROR, SERVER_ERROR)])
+def test_error_body_with_status_200_is_retried_then_fails(payload, outcome):
+    transport = ScriptedTransport(200, payload)
+    before = (requests_count(outcome), retries_count(), duration_count(outcome))
+
+    with pytest.raises(DeezerError) as error:
+        asyncio.run(get_json(make_client(transport, max_retries=2), "/album/1"))
+
+    assert error.value.outcome == outcome
+    assert transport.requests == 3
+    assert requests_count(outcome) - before[0] == 3
+    assert retries_count() - before[1] == 2
+    assert duration_count(outcome) - before[2] == 3
+
+
+def test_no_data_error_body_is_not_found_without_retry():
+    transport = ScriptedTransport(200, NO_DATA_ERROR)
+    before = (requests_count(NOT_FOUND), retries_count())
+
+    assert asyncio.run(get_json(make_client(transport), "/album/1")) is None
+
+    assert transport.requests == 1
+    assert requests_count(NOT_FOUND) - before[0] == 1
+    assert retries_count() == before[1]
+
+
+def test_success_is_counted():
+    transport = ScriptedTransport(200, ALBUM)
+    before = (requests_count(OK), duration_count(OK))
+
+    assert asyncio.run(get_json(make_client(transport), "/album/1")) == ALBUM
+
+    assert requests_count(OK) - before[0] == 1
+    assert duration_count(OK) - before[1] == 1
+
+
+def test_circuit_opens_after_failures_then_half_opens():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    transport = ScriptedTransport(500, {"error": "internal"})
+
+    async def scenario():
+        client = make_client(transport, max_retries=0, circuit_breaker=breaker)
+        try:
+            for _ in range(3):
+                with pytest.raises(DeezerError):
+                    await client.get_json("/album/1")
+            assert breaker.state == CircuitBreaker.OPEN
+
+            # Ouvert : refusé sans requête
+            rejected = requests_count(CIRCUIT_OPEN)
+            with pytest.raises(DeezerCircuitOpenError):
+                await client.get_json("/album/1")
+            assert transport.requests == 3
+            assert requests_count(CIRCUIT_OPEN) - rejected == 1
+
+            # Après le délai : un appel d'essai, dont l'échec rouvre le disjoncteur
+            await asyncio.sleep(0.06)
+            with pytest.raises(DeezerError) as error:
+                await client.get_json("/album/1")
+            assert error.value.outcome == SERVER_ERROR
+            assert transport.requests == 4
+            assert breaker.state == CircuitBreaker.OPEN
+
+            # Appel d'essai réussi : le disjoncteur se referme
+            await asyncio.sleep(0.06)
+            transport.status_code, transport.payload = 200, ALBUM
+            assert await client.get_json("/album/1") == ALBUM
+            assert breaker.state == CircuitBreaker.CLOSED
+        finally:
+            await client.aclose()
+
+    asyncio.run(scenario())
+    assert breaker.stats()["openings"] == 2
+
+
+def test_half_open_circuit_lets_a_single_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(DeezerCircuitOpenError):
+        breaker.before_call()
+
+
+def test_quota_errors_do_not_open_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    transport = ScriptedTransport(200, QUOTA_ERROR)
+
+    with pytest.raises(DeezerError):
+        asyncio.run(get_json(make_client(transport, max_retries=3, circuit_breaker=breaker), "/album/1"))
+
+    assert transport.requests == 4
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_sync_client_retries_server_errors_against_fake_server():
+    with FakeDeezerServer(server_errors=2) as server:
+        client = DeezerClient(base_url=server.url, backoff_base=0.0, rate_limiter=None, circuit_breaker=None)
+        try:
+            before = retries_count("genre")
+            assert client.get_json("/genre/132") == {"name": "Pop"}
+            assert server.requests == 3
+            assert retries_count("genre") - before == 2
+        finally:
+            client.close()
+
+
+def test_sync_client_fails_after_retries_on_quota_errors():
+    with FakeDeezerServer(quota_every=1) as server:
+        client = DeezerClient(base_url=server.url, max_retries=1, backoff_base=0.0, rate_limiter=None, circuit_breaker=None)
+        try:
+            with pytest.raises(DeezerError) as error:
+                client.get_json("/genre/132")
+            assert error.value.outcome == QUOTA
+            assert server.requests == 2
+        finally:
+            client.close()
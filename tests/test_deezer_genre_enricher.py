@@ -0,0 +1,112 @@
+import asyncio
+from collections import Counter
+
+import httpx
+
+from src.cache.tiered_cache import MISSING, MemoryCacheTier, TieredCache
+from src.transformers.deezer_genre_enricher import DeezerGenreEnricher, album_genre_key, genre_name_key
+
+GENRE_NAMES = {100: "Pop", 101: "Rock"}
+
+
+class FakeDeezer:
+    """Handler httpx.MockTransport : compte les requêtes par chemin et les requêtes simultanées."""
+
+    def __init__(self, latency: float = 0.0, listed=(100,), failing_albums=()):
+        self.latency = latency
+        self.listed = listed
+        self.failing_albums = set(failing_albums)
+        self.requests = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests[request.url.path] += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return self._respond(request.url.path.strip("/").split("/"))
+        finally:
+            self.in_flight -= 1
+
+    def _respond(self, parts) -> httpx.Response:
+        if parts == ["genre"]:
+            return httpx.Response(200, json={"data": [{"id": genre_id, "name": GENRE_NAMES[genre_id]} for genre_id in self.listed]})
+        resource, item = parts[0], int(parts[1])
+        if resource == "album":
+            if item in self.failing_albums:
+                return httpx.Response(503, json={"error": "unavailable"})
+            return httpx.Response(200, json={"genres": {"data": [{"id": 100 + item % 2}]}})
+        return httpx.Response(200, json={"name": GENRE_NAMES[item]})
+
+
+def make_cache() -> TieredCache:
+    return TieredCache([MemoryCacheTier()], ttl=3600, negative_ttl=60)
+
+
+def make_enricher(server: FakeDeezer, cache: TieredCache, max_concurrency: int = 10) -> DeezerGenreEnricher:
+    """Enrichisseur hors réseau, sans quota ni disjoncteur, une seule nouvelle tentative immédiate."""
+    enricher = DeezerGenreEnricher(
+        max_concurrency=max_concurrency,
+        transport=httpx.MockTransport(server),
+        base_url="https://deezer.test",
+        cache=cache,
+        rate_limiter=None,
+        circuit_breaker=None,
+    )
+    enricher._client.max_retries = 1
+    enricher._client.backoff_base = 0.0
+    return enricher
+
+
+def album_genre_names(enricher: DeezerGenreEnricher, album_ids):
+    async def main():
+        try:
+            return await enricher.get_album_genre_names(album_ids)
+        finally:
+            await enricher.aclose()
+
+    return asyncio.run(main())
+
+
+def test_concurrency_is_limited():
+    server = FakeDeezer(latency=0.02)
+
+    names = album_genre_names(make_enricher(server, make_cache(), max_concurrency=3), range(20))
+
+    assert len(names) == 20
+    assert server.max_in_flight == 3
+
+
+def test_album_and_genre_ids_are_deduplicated():
+    server = FakeDeezer()
+    cache = make_cache()
+
+    names = album_genre_names(make_enricher(server, cache), [1, 2, 1, 3, 2, 3])
+
+    assert names == {1: "Rock", 2: "Pop", 3: "Rock"}
+    # Un appel par album, la liste des genres une fois, puis le seul genre absent de la liste
+    assert server.requests == Counter({"/album/1": 1, "/album/2": 1, "/album/3": 1, "/genre": 1, "/genre/101": 1})
+
+    # Tout est ensuite servi depuis le cache
+    assert album_genre_names(make_enricher(server, cache), [3, 2, 1]) == {3: "Rock", 2: "Pop", 1: "Rock"}
+    assert sum(server.requests.values()) == 5
+
+
+def test_transient_failure_is_unknown_and_not_cached():
+    server = FakeDeezer(failing_albums={5})
+    cache = make_cache()
+
+    assert album_genre_names(make_enricher(server, cache), [4, 5]) == {4: "Pop", 5: None}
+    # Réponse 503 : une nouvelle tentative, puis genre inconnu
+    assert server.requests["/album/5"] == 2
+    assert cache.get(album_genre_key(5)) is MISSING
+    assert cache.get(album_genre_key(4)) == 100
+    assert cache.get(genre_name_key(100)) == "Pop"
+
+    # Deezer rétabli : l'album est de nouveau demandé
+    server.failing_albums.clear()
+    assert album_genre_names(make_enricher(server, cache), [4, 5]) == {4: "Pop", 5: "Rock"}
+    assert server.requests["/album/4"] == 1
+    assert server.requests["/album/5"] == 3
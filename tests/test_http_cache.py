@@ -0,0 +1,75 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import deezer_chart, spotify
+from benchmarks.synthetic_spotify import write_synthetic_spotify_csv
+from src.cache.response_cache import response_cache
+from src.extractors.dataset_catalog import DatasetCatalog, shutdown_loader_pool
+from src.extractors.dataset_registry import DatasetRegistry
+from tests.test_deezer_chart_refresher import FakeExtractor, make_refresher
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Client de l'API sur un catalogue temporaire (sans préchauffage ni rafraîchissement en tâche de fond)."""
+    raw_dir = tmp_path / "raw"
+    write_synthetic_spotify_csv(str(raw_dir / "tiny_spotify_data.csv"), 200, seed=3, duplicate_ratio=0.0)
+    catalog = DatasetCatalog(str(raw_dir), str(tmp_path / "processed"))
+    monkeypatch.setattr(spotify, "dataset_catalog", catalog)
+    monkeypatch.setattr(spotify, "dataset_registry", DatasetRegistry(catalog.discover()))
+    response_cache.clear()
+    yield TestClient(app)
+    response_cache.clear()
+    shutdown_loader_pool()
+
+
+def test_response_has_etag_and_revalidates_with_304(client):
+    response = client.get("/spotify/top-genres", params={"dataset": "tiny"})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('"')
+    assert "must-revalidate" in response.headers["cache-control"]
+
+    not_modified = client.get("/spotify/top-genres", params={"dataset": "tiny"}, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert response_cache.stats()["not_modified"] == 1
+
+    # Autres paramètres : autre réponse, autre ETag
+    other = client.get("/spotify/top-genres", params={"dataset": "tiny", "top_n": 1}, headers={"If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["etag"] != etag
+
+
+def test_etag_changes_when_dataset_file_changes(client, tmp_path):
+    first = client.get("/spotify/top-genres", params={"dataset": "tiny"})
+    etag = first.headers["etag"]
+
+    # Nouvel export déposé à la place du fichier
+    write_synthetic_spotify_csv(str(tmp_path / "raw" / "tiny_spotify_data.csv"), 250, seed=3, duplicate_ratio=0.0)
+
+    response = client.get("/spotify/top-genres", params={"dataset": "tiny"}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["total_tracks_analyzed"] != first.json()["total_tracks_analyzed"]
+
+
+def test_deezer_chart_has_weak_etag(client, monkeypatch):
+    monkeypatch.setattr(deezer_chart, "OPENSOUND_SERVING_MODE", "lazy")
+    monkeypatch.setattr(app.state, "deezer_chart_refresher", make_refresher(FakeExtractor()), raising=False)
+
+    response = client.get("/deezer/chart", params={"limit": 5})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+    assert len(response.json()["tracks"]) == 5
+
+    # Comparaison faible : l'ETag fort équivalent est accepté
+    for candidate in (etag, etag.removeprefix("W/")):
+        not_modified = client.get("/deezer/chart", params={"limit": 5}, headers={"If-None-Match": candidate})
+        assert not_modified.status_code == 304
+        assert not_modified.headers["etag"] == etag
+
+    assert client.get("/deezer/chart", params={"limit": 3}, headers={"If-None-Match": etag}).status_code == 200
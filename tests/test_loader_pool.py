@@ -0,0 +1,84 @@
+import os
+import signal
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from src.extractors import dataset_catalog
+from src.extractors.dataset_catalog import get_loader_pool, loader_pool_stats, shutdown_loader_pool
+from src.extractors.dataset_registry import DatasetRegistry
+from src.scheduling.request_executor import InstrumentedExecutor
+
+
+@pytest.fixture
+def loader_pool(monkeypatch):
+    """Pool de chargement réduit à deux processus, arrêté après le test."""
+    monkeypatch.setattr(dataset_catalog, "SPOTIFY_LOADER_WORKERS", 2)
+    shutdown_loader_pool()
+    yield get_loader_pool()
+    shutdown_loader_pool()
+
+
+@pytest.fixture
+def registry(tmp_path):
+    path = tmp_path / "raw" / "tiny.csv"
+    path.parent.mkdir()
+    path.write_text("track_id,track_popularity\na,1\n")
+    return DatasetRegistry({"tiny": str(path)}), path
+
+
+def kill_worker(pool) -> None:
+    """Tue un processus du pool comme le ferait le noyau à court de mémoire."""
+    os.kill(pool.submit(os.getpid).result(timeout=60), signal.SIGKILL)
+
+
+def test_killed_worker_does_not_break_next_requests(loader_pool, registry):
+    registry, path = registry
+    kill_worker(loader_pool)
+    restarts = loader_pool_stats()["restarts"]
+
+    # Tâche soumise au pool cassé (ou pendant la détection de la panne) : relancée sur un nouveau pool
+    assert registry.get_derived_many(["tiny"], "size", os.path.getsize, loader_pool) == [path.stat().st_size]
+
+    # Requêtes suivantes servies normalement
+    assert loader_pool.submit(os.getpid).result(timeout=60) != os.getpid()
+    assert loader_pool_stats()["restarts"] == restarts + 1
+
+
+def test_task_running_when_worker_dies_is_retried(loader_pool):
+    pid = loader_pool.submit(os.getpid).result(timeout=60)
+    futures = [loader_pool.submit(time.sleep, 0.5) for _ in range(4)]
+    os.kill(pid, signal.SIGKILL)
+
+    assert [future.result(timeout=60) for future in futures] == [None] * 4
+    assert loader_pool_stats()["restarts"] >= 1
+
+
+def test_builder_errors_are_not_retried(loader_pool, registry):
+    registry, path = registry
+    restarts = loader_pool_stats()["restarts"]
+
+    with pytest.raises(FileNotFoundError):
+        loader_pool.submit(os.path.getsize, str(path) + ".missing").result(timeout=60)
+    assert loader_pool_stats()["restarts"] == restarts
+
+
+class BrokenExecutor:
+    """Pool de processus inutilisable (ex: lancement des processus impossible)."""
+
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("A process in the process pool was terminated abruptly")
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        pass
+
+
+def test_build_runs_in_thread_when_new_pool_is_broken_too(loader_pool, registry, monkeypatch):
+    registry, path = registry
+    monkeypatch.setattr(dataset_catalog, "_create_process_pool", lambda: InstrumentedExecutor(BrokenExecutor(), 2))
+    restarts = loader_pool_stats()["restarts"]
+
+    assert registry.get_derived_many(["tiny"], "size", os.path.getsize, loader_pool) == [path.stat().st_size]
+    assert loader_pool.submit(os.getpid).result(timeout=60) == os.getpid()
+    assert loader_pool_stats()["restarts"] == restarts + 4
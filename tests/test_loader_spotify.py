@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+from src.loaders.loader_spotify import apply_spotify_schema
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        (["75", "80", None], [75, 80, None]),
+        (["75", "n/a", "3"], [75, None, 3]),
+    ],
+)
+def test_integral_popularity_is_stored_as_integers(values, expected):
+    popularity = apply_spotify_schema(pd.DataFrame({"track_popularity": values}))["track_popularity"]
+
+    assert pd.api.types.is_integer_dtype(popularity.dtype)
+    assert [None if pd.isna(value) else value for value in popularity] == expected
+
+
+def test_non_integral_popularity_stays_float():
+    popularity = apply_spotify_schema(pd.DataFrame({"track_popularity": [75.5, 80, None]}))["track_popularity"]
+
+    assert popularity.dtype == "float32"
+    assert popularity.iloc[0] == 75.5
+    assert popularity.isna().iloc[2]
@@ -0,0 +1,94 @@
+import pytest
+
+from benchmarks.synthetic_spotify import write_synthetic_spotify_csv
+from src import pipeline
+from src.extractors.dataset_catalog import shutdown_loader_pool
+from src.loaders import materialized_store
+from src.loaders.materialized_store import MaterializedStore
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    """Dossiers brut (deux datasets), traité et store dans tmp_path."""
+    raw_dir = tmp_path / "raw"
+    write_synthetic_spotify_csv(str(raw_dir / "a_spotify_data.csv"), 200, seed=1, duplicate_ratio=0.0)
+    write_synthetic_spotify_csv(str(raw_dir / "b_spotify_data.csv"), 150, seed=2, duplicate_ratio=0.0)
+    monkeypatch.setattr(pipeline, "SPOTIFY_PROCESSED_DIR", str(tmp_path / "processed"))
+    yield raw_dir, tmp_path / "store"
+    shutdown_loader_pool()
+
+
+def run(dirs, **kwargs):
+    raw_dir, store_dir = dirs
+    return pipeline.run_pipeline(str(raw_dir), str(store_dir), include_deezer=False, **kwargs)
+
+
+def record_merges(monkeypatch):
+    """Enregistre les combinaisons fusionnées (recalculées) par le pipeline."""
+    merged = []
+    merge = pipeline.merge_spotify_analytics
+
+    def recording_merge(partials):
+        merged.append(sorted(partial.total_tracks for partial in partials))
+        return merge(partials)
+
+    monkeypatch.setattr(pipeline, "merge_spotify_analytics", recording_merge)
+    return merged
+
+
+def test_second_run_reuses_unchanged_datasets_and_combinations(dirs, monkeypatch):
+    first = run(dirs)
+    assert first["datasets_recomputed"] == ["a", "b"]
+    assert first["combinations"] == 3
+    store = MaterializedStore(str(dirs[1]))
+    spotify = store.read()["spotify"]
+    assert (dirs[0].parent / "processed" / "a_spotify_data.parquet").exists()
+
+    with monkeypatch.context() as patch:
+        patch.setattr(pipeline, "get_spotify_analytics", lambda file_path: pytest.fail("dataset réanalysé"))
+        patch.setattr(pipeline, "merge_spotify_analytics", lambda partials: pytest.fail("combinaison recalculée"))
+        second = run(dirs)
+
+    assert second["datasets_recomputed"] == []
+    assert second["datasets_unchanged"] == ["a", "b"]
+    assert store.read()["spotify"] == spotify
+
+
+def test_changed_dataset_recomputes_only_its_combinations(dirs, monkeypatch):
+    run(dirs)
+    write_synthetic_spotify_csv(str(dirs[0] / "b_spotify_data.csv"), 180, seed=3, duplicate_ratio=0.0)
+
+    merged = record_merges(monkeypatch)
+    report = run(dirs)
+
+    assert report["datasets_recomputed"] == ["b"]
+    assert report["datasets_unchanged"] == ["a"]
+    # 'a' seul est repris ; 'b' et 'a+b' sont recalculés depuis les analyses partielles
+    assert merged == [[180], [180, 200]]
+    assert MaterializedStore(str(dirs[1])).read()["spotify"]["b"]["total_tracks_analyzed"] == 180
+
+
+def test_force_recomputes_everything(dirs, monkeypatch):
+    run(dirs)
+
+    merged = record_merges(monkeypatch)
+    report = run(dirs, force=True)
+
+    assert report["datasets_recomputed"] == ["a", "b"]
+    assert len(merged) == 3
+
+
+def test_store_version_bump_recomputes_combinations_from_partials(dirs, monkeypatch):
+    run(dirs)
+    bumped = materialized_store.STORE_VERSION + 1
+    monkeypatch.setattr(pipeline, "STORE_VERSION", bumped)
+    monkeypatch.setattr(materialized_store, "STORE_VERSION", bumped)
+
+    merged = record_merges(monkeypatch)
+    monkeypatch.setattr(pipeline, "get_spotify_analytics", lambda file_path: pytest.fail("dataset réanalysé"))
+    report = run(dirs)
+
+    # Analyses partielles reprises (fichiers inchangés), combinaisons recalculées
+    assert report["datasets_recomputed"] == []
+    assert len(merged) == 3
+    assert MaterializedStore(str(dirs[1])).read()["version"] == bumped
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from benchmarks.synthetic_spotify import write_synthetic_spotify_csv
+from src.loaders import spotify_ingestion
+from src.loaders.spotify_ingestion import (
+    CSV_BATCH,
+    JSON_BATCH,
+    append_spotify_tracks,
+    get_spotify_analytics,
+    parse_spotify_batch,
+)
+from src.transformers.spotify_analytics import analyze_spotify_file
+
+ROWS = 300
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """CSV d'un dataset dans raw/ (l'état de l'ingestion est écrit dans le dossier processed/ voisin)."""
+    path = tmp_path / "raw" / "tiny_spotify_data.csv"
+    write_synthetic_spotify_csv(str(path), ROWS, seed=2, duplicate_ratio=0.0)
+    return path
+
+
+def new_tracks(dataset, count: int, prefix: str = "new") -> pd.DataFrame:
+    """Lot de morceaux copiés du dataset, avec de nouveaux track_id."""
+    rows = pd.read_csv(dataset, dtype=str).head(count).copy()
+    rows["track_id"] = [f"{prefix}{index}" for index in range(count)]
+    return rows
+
+
+def as_batch(rows: pd.DataFrame) -> pd.DataFrame:
+    """Lot tel que reçu par l'API (fragment CSV)."""
+    return parse_spotify_batch(rows.to_csv(index=False).encode(), CSV_BATCH)
+
+
+def file_track_ids(dataset) -> pd.Series:
+    return pd.read_csv(dataset, dtype=str)["track_id"]
+
+
+def assert_same_analytics(actual, expected) -> None:
+    assert actual.total_tracks == expected.total_tracks
+    for table in ("genre_table", "subgenre_table", "decade_table"):
+        left, right = getattr(actual, table), getattr(expected, table)
+        assert list(left.index.astype(str)) == list(right.index.astype(str))
+        pdt.assert_frame_equal(left.reset_index(drop=True), right.reset_index(drop=True), check_dtype=False)
+    assert actual.correlation == pytest.approx(expected.correlation, abs=1e-9)
+
+
+def test_appends_new_tracks(dataset):
+    report = append_spotify_tracks(str(dataset), as_batch(new_tracks(dataset, 5)))
+
+    assert report == {"received": 5, "appended": 5, "duplicates": 0, "missing_track_id": 0, "total_tracks": ROWS + 5}
+    track_ids = file_track_ids(dataset)
+    assert len(track_ids) == ROWS + 5
+    assert list(track_ids.tail(5)) == [f"new{index}" for index in range(5)]
+
+
+def test_skips_duplicates_in_batch_and_in_file(dataset):
+    existing = pd.read_csv(dataset, dtype=str).iloc[[10, 20]]
+    fresh = new_tracks(dataset, 1)
+    batch = pd.concat([existing, fresh, fresh], ignore_index=True)
+
+    report = append_spotify_tracks(str(dataset), as_batch(batch))
+    assert report["appended"] == 1
+    assert report["duplicates"] == 3
+
+    # Lot renvoyé : déjà présent dans le fichier (index persistant)
+    report = append_spotify_tracks(str(dataset), as_batch(fresh))
+    assert report["appended"] == 0
+    assert report["duplicates"] == 1
+    assert report["total_tracks"] == ROWS + 1
+    assert file_track_ids(dataset).is_unique
+
+
+def test_skips_rows_without_track_id(dataset):
+    batch = new_tracks(dataset, 3)
+    batch.loc[1, "track_id"] = np.nan
+
+    report = append_spotify_tracks(str(dataset), as_batch(batch))
+
+    assert report["missing_track_id"] == 1
+    assert report["appended"] == 2
+    assert len(file_track_ids(dataset)) == ROWS + 2
+
+
+def test_json_batch(dataset):
+    records = new_tracks(dataset, 2).to_json(orient="records")
+    batch = parse_spotify_batch(f'{{"tracks": {records}}}'.encode(), JSON_BATCH)
+
+    assert append_spotify_tracks(str(dataset), batch)["appended"] == 2
+
+
+def test_rejects_unknown_columns(dataset):
+    batch = new_tracks(dataset, 1).assign(unknown="x")
+
+    with pytest.raises(ValueError, match="Colonnes inconnues"):
+        append_spotify_tracks(str(dataset), as_batch(batch))
+
+
+def test_state_is_rebuilt_after_external_modification(dataset):
+    append_spotify_tracks(str(dataset), as_batch(new_tracks(dataset, 2)))
+
+    # Modification hors ingestion : l'état enregistré ne correspond plus au fichier
+    external = new_tracks(dataset, 3, prefix="external")
+    external.to_csv(dataset, mode="a", header=False, index=False)
+
+    batch = pd.concat([external.head(1), new_tracks(dataset, 1, prefix="after")], ignore_index=True)
+    report = append_spotify_tracks(str(dataset), as_batch(batch))
+
+    assert report["appended"] == 1
+    assert report["duplicates"] == 1
+    assert report["total_tracks"] == ROWS + 2 + 3 + 1
+    assert_same_analytics(get_spotify_analytics(str(dataset)), analyze_spotify_file(str(dataset)))
+
+
+def test_analytics_after_append_match_full_analysis(dataset, monkeypatch):
+    before = get_spotify_analytics(str(dataset))
+    append_spotify_tracks(str(dataset), as_batch(new_tracks(dataset, 40)))
+    append_spotify_tracks(str(dataset), as_batch(new_tracks(dataset, 60, prefix="second")))
+
+    # Servies depuis l'état de l'ingestion, sans relire le fichier
+    with monkeypatch.context() as patch:
+        patch.setattr(spotify_ingestion, "analyze_spotify_file", lambda file_path: pytest.fail("fichier relu"))
+        analytics = get_spotify_analytics(str(dataset))
+    assert analytics.total_tracks == before.total_tracks + 100
+    assert_same_analytics(analytics, analyze_spotify_file(str(dataset)))
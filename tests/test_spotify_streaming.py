@@ -0,0 +1,91 @@
+import tracemalloc
+
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from benchmarks.synthetic_spotify import write_synthetic_spotify_csv
+from src.extractors.extractor_spotify import extract_spotify_data
+from src.transformers.spotify_analytics import compute_spotify_analytics, compute_spotify_analytics_streaming
+
+ROWS = 5000
+
+
+@pytest.fixture(scope="module")
+def synthetic_csv(tmp_path_factory):
+    """CSV synthétique avec des lignes en double (chaque doublon suit la ligne qu'il recopie)."""
+    path = tmp_path_factory.mktemp("raw") / "synthetic.csv"
+    return write_synthetic_spotify_csv(str(path), ROWS, seed=1, block_size=1000, duplicate_ratio=0.05)
+
+
+@pytest.fixture(scope="module")
+def raw_rows(synthetic_csv):
+    """Lignes du CSV lues comme texte, telles que les compare la suppression des doublons."""
+    return pd.read_csv(synthetic_csv, dtype=str)
+
+
+@pytest.fixture(scope="module")
+def in_memory(synthetic_csv):
+    return compute_spotify_analytics(extract_spotify_data(str(synthetic_csv)))
+
+
+def split_duplicate_chunksize(raw_rows: pd.DataFrame) -> int:
+    """Taille de bloc qui sépare un doublon complet (même track_id) de la ligne qu'il recopie."""
+    duplicated = raw_rows.duplicated() & raw_rows.notna().all(axis=1)
+    position = int(duplicated.to_numpy().nonzero()[0][0])
+    assert raw_rows["track_id"].iloc[position - 1] == raw_rows["track_id"].iloc[position]
+    return position
+
+
+def assert_same_table(streamed: pd.DataFrame, in_memory: pd.DataFrame) -> None:
+    """Mêmes groupes, dans le même ordre, et mêmes agrégats (le type de l'index peut différer : texte ou catégorie)."""
+    assert list(streamed.index.astype(str)) == list(in_memory.index.astype(str))
+    pdt.assert_frame_equal(streamed.reset_index(drop=True), in_memory.reset_index(drop=True), check_dtype=False)
+
+
+def test_synthetic_csv_contains_duplicates(raw_rows):
+    assert len(raw_rows) == ROWS
+    assert raw_rows.duplicated().sum() > 0
+
+
+@pytest.mark.parametrize("chunksize", [7, 97, 1000, ROWS, 10 * ROWS, "split_duplicate"])
+def test_streaming_matches_in_memory(synthetic_csv, raw_rows, in_memory, chunksize):
+    if chunksize == "split_duplicate":
+        chunksize = split_duplicate_chunksize(raw_rows)
+    streamed = compute_spotify_analytics_streaming(str(synthetic_csv), chunksize)
+
+    assert streamed.errors == in_memory.errors == {}
+    assert streamed.total_tracks == in_memory.total_tracks == ROWS
+    for table in ("genre_table", "subgenre_table", "decade_table"):
+        assert_same_table(getattr(streamed, table), getattr(in_memory, table))
+    assert streamed.correlation == pytest.approx(in_memory.correlation, abs=1e-9)
+
+    # Lignes retenues pour les genres : lignes complètes moins leurs doublons, quel que soit le découpage
+    complete = raw_rows.dropna()
+    duplicates = int(complete.duplicated().sum())
+    assert duplicates > 0
+    for analytics in (streamed, in_memory):
+        assert len(complete) - int(analytics.genre_table["count"].sum()) == duplicates
+
+
+def peak_memory_mb(function) -> float:
+    """Pic de mémoire allouée (Python et NumPy, tracemalloc) pendant l'appel, en Mo."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    finally:
+        tracemalloc.stop()
+
+
+def test_streaming_memory_is_bounded_by_chunk_size(tmp_path):
+    small = write_synthetic_spotify_csv(str(tmp_path / "raw" / "small.csv"), 8000, seed=3)
+    large = write_synthetic_spotify_csv(str(tmp_path / "raw" / "large.csv"), 32000, seed=3)
+
+    small_peak = peak_memory_mb(lambda: compute_spotify_analytics_streaming(str(small), 2000))
+    large_peak = peak_memory_mb(lambda: compute_spotify_analytics_streaming(str(large), 2000))
+    in_memory_peak = peak_memory_mb(lambda: compute_spotify_analytics(extract_spotify_data(str(large))))
+
+    # Fichier 4 fois plus grand : seul l'index des empreintes (8 octets par ligne) grandit
+    assert large_peak < 1.5 * small_peak
+    assert large_peak < in_memory_peak / 3
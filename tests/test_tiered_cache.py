@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+from src.cache.tiered_cache import MemoryCacheTier, SQLiteCacheTier, TieredCache
+
+
+class CountingConnection:
+    """Connexion SQLite enveloppée qui enregistre les requêtes exécutées."""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self.statements = []
+
+    def execute(self, sql, *args):
+        self.statements.append(sql)
+        return self._connection.execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        self.statements.append(sql)
+        return self._connection.executemany(sql, *args)
+
+
+def counting_tier(tmp_path, max_entries: int) -> SQLiteCacheTier:
+    tier = SQLiteCacheTier(str(tmp_path / "cache.sqlite"), max_entries=max_entries)
+    tier._connection = CountingConnection(tier._connect())
+    return tier
+
+
+def test_batch_is_written_in_one_transaction_without_counting(tmp_path):
+    tier = counting_tier(tmp_path, max_entries=1000)
+    cache = TieredCache([MemoryCacheTier(), tier], ttl=60, negative_ttl=5)
+
+    asyncio.run(cache.aset_many({f"album:{index}": index for index in range(50)}))
+
+    statements = tier._connection.statements
+    assert statements.count("BEGIN IMMEDIATE") == 1
+    assert statements.count("COMMIT") == 1
+    assert not any("COUNT" in sql for sql in statements)
+    assert tier.size() == 50
+
+
+def test_entries_are_bounded_and_counted_once_per_headroom(tmp_path):
+    tier = counting_tier(tmp_path, max_entries=100)
+    expires_at = time.time() + 60
+
+    for index in range(300):
+        tier.set(f"album:{index}", index, expires_at)
+
+    # Comptage tous les 10 ajouts (marge de 10 % de la capacité), pas à chaque écriture
+    assert sum("COUNT" in sql for sql in tier._connection.statements) == 300 // 10
+    assert tier.size() <= 100
+    assert tier.stats()["evictions"] == 300 - tier.size()
+    # Les plus anciennes entrées sont évincées en premier
+    assert tier.get("album:299")[0] == 299
+    assert tier.get("album:0")[1] == 0
+
+
+def test_expired_entries_are_evicted_first(tmp_path):
+    tier = SQLiteCacheTier(str(tmp_path / "cache.sqlite"), max_entries=10)
+    tier.set_many([(f"old:{index}", index, time.time() - 1) for index in range(8)])
+    tier.set_many([(f"new:{index}", index, time.time() + 60) for index in range(8)])
+
+    assert tier.size() == 8
+    assert all(tier.get(f"new:{index}")[0] == index for index in range(8))
+
+
+def test_count_is_reloaded_from_existing_database(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SQLiteCacheTier(path, max_entries=20).set_many([(f"album:{index}", index, time.time() + 60) for index in range(15)])
+
+    # Nouveau processus : l'estimation repart du contenu de la base
+    tier = SQLiteCacheTier(path, max_entries=20)
+    tier.set_many([(f"genre:{index}", index, time.time() + 60) for index in range(10)])
+
+    assert tier.size() <= 20